@@ -1,17 +1,176 @@
-import os.path
-from src.hack_assambler import HackAssambler
+#!/usr/bin/env python3
+"""
+Hack Assembler - Translates Hack assembly language to Hack machine code
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from hack_assambler.src.batch_assambler import BatchAssambler
+from hack_assambler.src.hack_disassembler import HackDisassembler
+from hack_assambler.src.hack_linker import HackLinker
+from hack_assambler.src.hack_writer import HackWriter
+from hack_assambler.src.static_analysis import StaticAnalysis
+from vm_translator.src.labels import report_labels
 
 
 def main():
-  path = "/Users/leonardoferigutti/Documents/nand2Tetris/hack_assambler/tests/test_files"
-  add_file = os.path.join(path, "Pong.asm")
-  assambler = HackAssambler(add_file)
-  assambler.parse()
-  print(assambler.file_parsed)
-  assambler.compile()
-  print(assambler.file_parsed_cleaned)
-  assambler.print_compiled_file()
-  assambler.store_file()
+  """Main entry point for the Hack assembler"""
+  parser = argparse.ArgumentParser(
+    description="Translate Hack assembly to Hack machine code"
+  )
+
+  parser.add_argument(
+    "input",
+    type=str,
+    nargs="+",
+    help="Input .asm file or directory. Directories are searched recursively for .asm files. "
+         "With --link, the .asm or .hobj modules to link, in order",
+  )
+
+  parser.add_argument(
+    "-j",
+    "--jobs",
+    type=int,
+    help="Number of worker processes (default: one per CPU)",
+    default=None,
+  )
+
+  parser.add_argument(
+    "-f",
+    "--format",
+    type=str,
+    choices=list(HackWriter.EXTENSIONS),
+    help="Output format (default: hack)",
+    default="hack",
+  )
+
+  parser.add_argument(
+    "--byteorder",
+    type=str,
+    choices=["big", "little"],
+    help="Byte order of the bin and hex formats (default: big)",
+    default="big",
+  )
+
+  parser.add_argument(
+    "-O",
+    "--optimize",
+    action="store_true",
+    help="Run the peephole optimizer before resolving labels",
+  )
+
+  parser.add_argument(
+    "-l",
+    "--listing",
+    action="store_true",
+    help="Also write a .lst listing mapping ROM addresses to source lines, labels and variables",
+  )
+
+  parser.add_argument(
+    "-d",
+    "--disassemble",
+    action="store_true",
+    help="Disassemble the input .hack or .bin file instead",
+  )
+
+  parser.add_argument(
+    "-a",
+    "--analyze",
+    action="store_true",
+    help="Print the ROM words, straight line cycles and loops of every function of the input .asm, "
+         ".hack or .bin file instead, without running it",
+  )
+
+  parser.add_argument(
+    "--vm-functions",
+    action="store_true",
+    help="Group the analysis by VM function, for programs translated by the VM translator",
+  )
+
+  parser.add_argument(
+    "--top",
+    type=int,
+    help="Number of functions in the analysis, largest first (default: all)",
+    default=None,
+  )
+
+  parser.add_argument(
+    "--link",
+    type=str,
+    metavar="OUTPUT",
+    help="Assemble every input .asm into a relocatable object file (.hobj, reused while the source does "
+         "not change) and link them into the OUTPUT program, in the format given by --format",
+    default=None,
+  )
+
+  parser.add_argument(
+    "-o",
+    "--output",
+    type=str,
+    help="Output file of the disassembly (default: standard output)",
+    default=None,
+  )
+
+  args = parser.parse_args()
+
+  for input_name in args.input:
+    if not Path(input_name).exists():
+      print(f"Error: Input path '{input_name}' does not exist", file=sys.stderr)
+      sys.exit(1)
+
+  if args.link:
+    link(args.input, args.link, args.format, args.byteorder, args.optimize)
+    return
+
+  if len(args.input) > 1:
+    print("Error: Only one input is accepted, except with --link", file=sys.stderr)
+    sys.exit(1)
+  input_path = Path(args.input[0])
+
+  if args.disassemble:
+    disassemble(input_path, args.output, args.byteorder)
+    return
+
+  if args.analyze:
+    if input_path.is_dir():
+      print("Error: --analyze needs a single .asm, .hack or .bin file", file=sys.stderr)
+      sys.exit(1)
+    group_labels = report_labels if args.vm_functions else None
+    print(StaticAnalysis.from_file(input_path, args.byteorder, args.optimize, group_labels).report(args.top))
+    return
+
+  batch = BatchAssambler(input_path, jobs=args.jobs, output_format=args.format, byteorder=args.byteorder,
+                         optimize=args.optimize, listing=args.listing)
+  batch.run()
+  print(batch.summary())
+  if batch.errors:
+    sys.exit(1)
+
+
+def link(input_names, output: str, output_format: str, byteorder: str, optimize: bool):
+  start = time.perf_counter()
+  try:
+    result = HackLinker.link_files(input_names, optimize)
+  except (KeyError, SyntaxError, ValueError) as e:
+    print(f"Error: {type(e).__name__}: {e}", file=sys.stderr)
+    sys.exit(1)
+  HackWriter(output).write(result.words, output_format, byteorder)
+  elapsed = time.perf_counter() - start
+  print(f"Linked {len(result.linker.modules)} modules ({result.reused} unchanged) into {output}, "
+        f"{len(result.words)} words in {elapsed:.3f}s")
+
+
+def disassemble(input_path: Path, output: str, byteorder: str):
+  disassembler = HackDisassembler()
+  if output is None:
+    disassembler.disassemble_file(input_path, sys.stdout, byteorder)
+    return
+  with open(output, "w") as file:
+    words = disassembler.disassemble_file(input_path, file, byteorder)
+  print(f"Disassembled {words} words into {output}")
 
 
 if __name__ == "__main__":
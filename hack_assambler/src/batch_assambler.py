@@ -0,0 +1,98 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+from hack_assambler.src.hack_assambler import HackAssambler
+
+
+class AssemblyResult:
+  def __init__(self, input_path: Path, output_path: Optional[str] = None, words: int = 0, error: Optional[str] = None,
+               removed: int = 0):
+    self.input_path = input_path
+    self.output_path = output_path
+    self.words = words
+    self.error = error
+    self.removed = removed
+
+  @property
+  def ok(self):
+    return self.error is None
+
+  def __repr__(self):
+    return f"AssemblyResult(input_path={self.input_path!r}, words={self.words!r}, error={self.error!r})"
+
+
+def assemble_file(input_path: Path, output_format: str = "hack", byteorder: str = "big",
+                  optimize: bool = False, listing: bool = False) -> AssemblyResult:
+  """Assemble a single file. Module level so it can be sent to the worker processes."""
+  try:
+    assambler = HackAssambler(str(input_path), optimize=optimize)
+    assambler.parse()
+    assambler.compile()
+    output_path = assambler.store_file(output_format, byteorder)
+    if listing:
+      assambler.store_source_map()
+    removed = assambler.optimizer.total_removed if optimize else 0
+    return AssemblyResult(input_path, output_path, len(assambler.file_compiled), removed=removed)
+  except Exception as e:
+    return AssemblyResult(input_path, error=f"{type(e).__name__}: {e}")
+
+
+class BatchAssambler:
+  """
+  Assembles every .asm file of a directory tree in a pool of processes. Files are processed and
+  reported in sorted order, so the output does not depend on the scheduling of the workers.
+  """
+
+  def __init__(self, input_path: Path, jobs: Optional[int] = None, output_format: str = "hack", byteorder: str = "big",
+               optimize: bool = False, listing: bool = False):
+    self.input_path = Path(input_path)
+    self.jobs = jobs
+    self.output_format = output_format
+    self.byteorder = byteorder
+    self.optimize = optimize
+    self.listing = listing
+    self.results: List[AssemblyResult] = []
+    self.elapsed = 0.0
+
+  def get_files(self) -> List[Path]:
+    if self.input_path.is_dir():
+      return sorted(self.input_path.rglob("*.asm"))
+    return [self.input_path]
+
+  def run(self) -> List[AssemblyResult]:
+    files = self.get_files()
+    formats = [self.output_format] * len(files)
+    byteorders = [self.byteorder] * len(files)
+    optimize = [self.optimize] * len(files)
+    listing = [self.listing] * len(files)
+    start = time.perf_counter()
+    if self.jobs == 1 or len(files) <= 1:
+      self.results = list(map(assemble_file, files, formats, byteorders, optimize, listing))
+    else:
+      jobs = self.jobs or os.cpu_count() or 1
+      chunksize = max(1, len(files) // (4 * jobs))
+      with ProcessPoolExecutor(max_workers=jobs) as executor:
+        self.results = list(executor.map(assemble_file, files, formats, byteorders, optimize, listing, chunksize=chunksize))
+    self.elapsed = time.perf_counter() - start
+    return self.results
+
+  @property
+  def errors(self) -> List[AssemblyResult]:
+    return [result for result in self.results if not result.ok]
+
+  def summary(self) -> str:
+    files = len(self.results)
+    words = sum(result.words for result in self.results)
+    elapsed = self.elapsed or float("inf")
+    lines = [f"Error: {result.input_path}: {result.error}" for result in self.errors]
+    if self.optimize:
+      removed = sum(result.removed for result in self.results)
+      lines.append(f"Peephole optimizer removed {removed} instructions ({removed / ((words + removed) or 1):.1%})")
+    lines.append(
+      f"Assembled {files - len(self.errors)}/{files} files, {words} words in {self.elapsed:.3f}s "
+      f"({files / elapsed:.1f} files/sec, {words / elapsed:.0f} words/sec)"
+    )
+    return "\n".join(lines)
@@ -1,34 +1,143 @@
+from array import array
+from typing import Iterable, IO
+
 from hack_assambler.src.hack_compiler import HackCompiler
+from hack_assambler.src.hack_object import ObjectModule
+from hack_assambler.src.hack_writer import HackWriter
 from hack_assambler.src.parser import Parser
+from hack_assambler.src.peephole_optimizer import PeepholeOptimizer
+from hack_assambler.src.source_map import SourceMap
 from hack_assambler.src.symbol_table import SymbolTable
 
 
 class HackAssambler:
-  def __init__(self, path):
+  WORD_LENGTH = 16
+  PLACEHOLDER = "0" * WORD_LENGTH
+
+  def __init__(self, path=None, optimize: bool = False, lines: Iterable[str] = None):
+    """Assemble the .asm file at path or, if given, the lines of any iterable, with no file involved."""
     self.path = path
-    self.parser = Parser(path)
+    self.optimizer = PeepholeOptimizer() if optimize else None
+    self.parser = Parser(path, lines)
     self.file_parsed = None
+    self.file_line_numbers = None
     self.file_parsed_cleaned = None
+    self.rom_line_numbers = None
+    self.labels = {}
+    self.variables = {}
     self.compiler = HackCompiler()
     self.file_compiled = None
     self.symbol_table = SymbolTable()
     self.pointer_ram_address = 16
 
   def parse(self):
-    self.file_parsed = self.parser.parse()
+    self.file_parsed = []
+    self.file_line_numbers = array('I')
+    for line_number, instruction in self.parser.stream_with_line_numbers():
+      self.file_parsed.append(instruction)
+      self.file_line_numbers.append(line_number)
 
   def compile(self):
-    self._set_labels_for_symbol_table()
-    file_compiled = []
+    self._resolve_labels()
+    # words are kept as integers, they are only formatted when the file is stored or printed
+    file_compiled = array('H')
     for instruction in self.file_parsed_cleaned:
       if instruction.startswith('@'):
         instruction = self._replace_symbol_in_instruction(instruction)
-      print(instruction)
-      bin_instruction = self.compiler.compile(instruction)
-      file_compiled.append(bin_instruction)
+      file_compiled.append(self.compiler.encode(instruction))
 
     self.file_compiled = file_compiled
 
+  def compile_object(self, name: str = None) -> ObjectModule:
+    """
+    Assemble into a relocatable ObjectModule instead of words: A-instructions loading a label of this
+    source are relocated by the linker, the other symbols are resolved by it (see HackLinker).
+    """
+    self._resolve_labels()
+    words = array('H')
+    relocations = array('I')
+    references = {}
+    for address, instruction in enumerate(self.file_parsed_cleaned):
+      if instruction.startswith('@') and not instruction[1:].isdigit():
+        symbol = instruction[1:]
+        value = self.symbol_table.get_symbol_value(symbol)
+        if symbol in self.labels:
+          relocations.append(address)
+        elif value is None:
+          references.setdefault(symbol, array('I')).append(address)
+          value = 0
+        instruction = f"@{value}"
+      words.append(self.compiler.encode(instruction))
+    return ObjectModule(name or self.path or "<memory>", words, dict(self.labels), relocations, references)
+
+  def _resolve_labels(self):
+    if self.optimizer:
+      self.file_parsed = self.optimizer.optimize(self.file_parsed)
+      self.file_line_numbers = array('I', (self.file_line_numbers[i] for i in self.optimizer.kept_indices))
+    self._set_labels_for_symbol_table()
+
+  @classmethod
+  def assemble_lines(cls, lines: Iterable[str], optimize: bool = False) -> array:
+    """Assemble an iterable of assembly lines, e.g. the output of VMTranslator.translate(), into words."""
+    assambler = cls(lines=lines, optimize=optimize)
+    assambler.parse()
+    assambler.compile()
+    return assambler.file_compiled
+
+  def assemble_streaming(self, output_path: str = None, stream: IO[bytes] = None) -> int:
+    """
+    Single pass assembly. The source is read once and every word is written as soon as it is
+    compiled. A-instructions pointing to a symbol that is not known yet are written as a placeholder
+    and backpatched at the end: symbols that turned out to be labels get the label address, the rest
+    are allocated as variables. Only the pending references are kept in memory.
+    The .hack text is written to output_path or, if given, to a seekable binary stream.
+    Returns the number of words written.
+    """
+    if stream is not None:
+      return self._assemble_streaming(stream)
+    with open(output_path or self._get_output_path(), "wb") as file:
+      return self._assemble_streaming(file)
+
+  def _assemble_streaming(self, file: IO[bytes]) -> int:
+    # symbol -> ROM addresses waiting for its value, in order of first appearance
+    pending = {}
+    address = 0
+    start = file.tell()
+    for instruction in self.parser.stream():
+      if instruction.startswith("(") and instruction.endswith(")"):
+        label = instruction.strip("(").strip(")")
+        self.symbol_table.add_symbol(label, address)
+        continue
+      if instruction.startswith('@'):
+        a_value = instruction[1:]
+        if not a_value.isdigit():
+          value = self.symbol_table.get_symbol_value(a_value)
+          if value is None:
+            pending.setdefault(a_value, []).append(address)
+            instruction = None
+          else:
+            instruction = f"@{value}"
+      bin_instruction = self.PLACEHOLDER if instruction is None else self.compiler.compile(instruction)
+      # every word but the first is preceded by a new line, so word i always starts at start + i * 17
+      if address:
+        file.write(b"\n")
+      file.write(bin_instruction.encode())
+      address += 1
+
+    self._backpatch(file, pending, start)
+
+    return address
+
+  def _backpatch(self, file: IO[bytes], pending: dict, start: int = 0):
+    line_length = self.WORD_LENGTH + 1
+    end = file.tell()
+    for symbol, addresses in pending.items():
+      bin_instruction = self.compiler.compile(f"@{self._replace_symbol_by_number(symbol)}").encode()
+      for address in addresses:
+        file.seek(start + address * line_length)
+        file.write(bin_instruction)
+    file.seek(end)
+
   def _replace_symbol_in_instruction(self, instruction: str) -> str:
     instruction_list = instruction.split('@')
     if len(instruction_list) > 1:
@@ -42,43 +151,70 @@ class HackAssambler:
 
   def _replace_symbol_by_number(self, symbol: str) -> str:
     value = self.symbol_table.get_symbol_value(symbol)
-    if not value:
+    if value is None:
       self.symbol_table.add_symbol(symbol, self.pointer_ram_address)
+      self.variables[symbol] = self.pointer_ram_address
       value = self.pointer_ram_address
       self.pointer_ram_address += 1
     return value
 
   def _set_labels_for_symbol_table(self):
     clean_file = []
+    rom_line_numbers = array('I')
     deleted_lines = 0
     for i, instruction in enumerate(self.file_parsed):
       if instruction.startswith("(") and instruction.endswith(")"):
         label = instruction.strip("(").strip(")")
         line = i - deleted_lines
         self.symbol_table.add_symbol(label, line)
+        self.labels[label] = line
         deleted_lines += 1
         continue
       clean_file.append(instruction)
+      rom_line_numbers.append(self.file_line_numbers[i])
     self.file_parsed_cleaned = clean_file
+    self.rom_line_numbers = rom_line_numbers
+
+  def get_source_map(self) -> SourceMap:
+    if self.file_compiled is None:
+      raise NameError("File not compiled. Compile it first.")
+    return SourceMap(self.path or "<memory>", self.rom_line_numbers, self.file_parsed_cleaned, self.labels, self.variables)
+
+  def store_source_map(self, output_path: str = None) -> str:
+    """Store the ROM address -> source line listing and the symbols (see SourceMap). Returns the path."""
+    output_path = output_path or self._get_output_path(".lst")
+    self.get_source_map().write(output_path)
+    return output_path
 
   def print_compiled_file(self):
     if not self.file_compiled:
       raise NameError("File not compiled. Compile it first.")
-    for instruction in self.file_compiled:
-      print(instruction)
+    for word in self.file_compiled:
+      print(f"{word:016b}")
 
-  def store_file(self):
+  def store_file(self, output_format: str = "hack", byteorder: str = "big", output_path: str = None) -> str:
+    """
+    Store the compiled file. output_format is one of 'hack' (text), 'bin' (packed 16 bit words in the
+    given byteorder) or 'hex' (Intel HEX). Returns the path written.
+    """
     if not self.file_compiled:
       raise NameError("File not compiled. Compile it first.")
+    HackWriter.check_format(output_format)
 
+    output_path = output_path or self._get_output_path(HackWriter.EXTENSIONS[output_format])
+    HackWriter(output_path).write(self.file_compiled, output_format, byteorder)
+    return output_path
+
+  def write(self, stream: IO, output_format: str = "hack", byteorder: str = "big"):
+    """Write the compiled words to an open stream, binary for the 'bin' format and text otherwise."""
+    if not self.file_compiled:
+      raise NameError("File not compiled. Compile it first.")
+    HackWriter.write_stream(stream, self.file_compiled, output_format, byteorder)
+
+  def _get_output_path(self, extension: str = ".hack") -> str:
     input_path = self.path
+    if input_path is None:
+      raise ValueError("The program was not read from a file, an output path must be given")
     if input_path.endswith('.asm'):
-      output_path = input_path.replace('.asm', '.hack')
-    else:
-      output_path = input_path + '.hack'
-
-    with open(output_path, "w") as file:
-      number_of_lines = len(self.file_compiled)
-      for i, instruction in enumerate(self.file_compiled):
-        line_number = i + 1
-        file.write(instruction + '\n') if line_number < number_of_lines else file.write(instruction)
+      return input_path[:-len('.asm')] + extension
+    return input_path + extension
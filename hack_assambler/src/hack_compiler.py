@@ -1,5 +1,6 @@
-import os
-import tomllib
+from itertools import permutations
+
+from hack_assambler.src.tables import control_tables
 
 class HackCompiler:
     """
@@ -7,66 +8,65 @@ class HackCompiler:
     """
     A_BINARY_LENGTH = 15
     C_LENGTH = 8
-    CURRENT_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
-    TABLE_FILE_PATH = os.path.join(CURRENT_DIRECTORY, "config", "control_table.toml")
+    WORD_LENGTH = 16
+    C_PREFIX = 0b111 << 13
+
+    # "dest=comp;jump" spelling -> 16 bit word. Shared by every instance, built once per process.
+    _c_instruction_table = None
 
     def __init__(self):
-        self.tables = {}
-        self._load_tables_from_file()
+        self.tables = control_tables()
         self.comp_table = self.tables.get("comp")
         self.jump_table = self.tables.get("jump")
         self.dest_table = self.tables.get("dest")
+        if HackCompiler._c_instruction_table is None:
+            HackCompiler._c_instruction_table = self._build_c_instruction_table()
+        self.c_instruction_table = HackCompiler._c_instruction_table
 
-    def _load_tables_from_file(self):
-        with open(self.TABLE_FILE_PATH, 'rb') as f:
-            self.tables = tomllib.load(f)
+    def compile(self, instruction:str):
+        return f"{self.encode(instruction):0{self.WORD_LENGTH}b}"
 
 
-    def compile(self, instruction:str):
+    def encode(self, instruction:str) -> int:
+        """Return the instruction as a 16 bit integer word."""
         if instruction.startswith('@'):
-            return f"0{self._compile_a_instruction(instruction)}"
+            return self._compile_a_instruction(instruction)
         else:
-            return f"111{self._compile_c_instruction(instruction)}"
+            return self._compile_c_instruction(instruction)
 
 
     def _compile_a_instruction(self, instruction:str):
-        number = int(instruction.strip('@'))
-        binary_number = bin(number)[2:]
-        length = len(binary_number)
-        zeros = ''.join('0') * (self.A_BINARY_LENGTH - length)
-        return f'{zeros}{binary_number}'
+        number = int(instruction[1:])
+        if number >> self.A_BINARY_LENGTH:
+            raise SyntaxError(f"{instruction} does not fit in {self.A_BINARY_LENGTH} bits")
+        return number
 
 
     def _compile_c_instruction(self, instruction:str):
-        c_parsed = self._parse_c_instruction(instruction)
-        comp_part = self.comp_table.get(c_parsed.get('comp'))
-        dest_part = self.dest_table.get(c_parsed.get('dest'))
-        jump_part = self.jump_table.get(c_parsed.get('jump'))
-        return f'{comp_part}{dest_part}{jump_part}'
-
-
-    def _parse_c_instruction(self, instruction:str):
-        """Extract key/value pairs from a simple YAML-like line."""
-        # Extract dest part
-        instruction = instruction.split('=')
-        if len(instruction) == 2:
-            dest = instruction[0]
-            rest = instruction[1]
-        else:
-            dest = 'null'
-            rest = instruction[0]
-
-        # extract jump part
-        inst = rest.split(';')
-        if len(inst) == 2:
-            comp = inst[0]
-            jump = inst[1]
-        else:
-            comp = rest
-            jump = 'null'
-        return {'comp': comp, 'jump': jump, 'dest': dest}
-
-
-        
-
-
+        word = self.c_instruction_table.get(instruction)
+        if word is None:
+            raise SyntaxError(f"{instruction} is not a valid C-instruction")
+        return word
+
+
+    def _build_c_instruction_table(self):
+        """
+        Precompute the word of every legal C-instruction spelling. Every ordering of the dest
+        registers is accepted (MD, DM, AMD, MDA, ...), the 'null' dest and jump are written empty.
+        """
+        dest_spellings = {}
+        for dest, bits in self.dest_table.items():
+            if dest == 'null':
+                dest_spellings[''] = bits
+                continue
+            for spelling in permutations(dest):
+                dest_spellings[f"{''.join(spelling)}="] = bits
+
+        jump_spellings = {('' if jump == 'null' else f";{jump}"): bits for jump, bits in self.jump_table.items()}
+
+        table = {}
+        for dest, dest_bits in dest_spellings.items():
+            for comp, comp_bits in self.comp_table.items():
+                for jump, jump_bits in jump_spellings.items():
+                    table[f"{dest}{comp}{jump}"] = self.C_PREFIX | comp_bits << 6 | dest_bits << 3 | jump_bits
+        return table
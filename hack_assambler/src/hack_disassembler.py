@@ -0,0 +1,121 @@
+import sys
+from array import array
+from pathlib import Path
+from typing import IO, Iterable, Iterator, List, Optional, Set, Tuple
+
+from hack_assambler.src.tables import control_tables
+
+
+class HackDisassembler:
+  """
+  Turns Hack machine words back into assembly. C-instructions are decoded with a single lookup in a
+  table holding the text of every one of the 8192 possible C-instruction words (a bit, comp, dest and
+  jump), built once per process from the inverted control table.
+
+  With recover_labels, a first pass over the words finds the A-instructions that load the target of a
+  jump; the second pass writes them as '@LABEL_<address>' and puts '(LABEL_<address>)' before the
+  target. Only the jump targets are kept in memory, so files are disassembled while they are read.
+  """
+  LABEL_PREFIX = "LABEL_"
+  C_PREFIX = 0b111 << 13
+  READ_CHUNK = 1 << 16
+
+  # low 13 bits of a C-instruction -> text, None for the combinations without mnemonic
+  _c_instruction_text: Optional[List[Optional[str]]] = None
+
+  def __init__(self, recover_labels: bool = True):
+    self.recover_labels = recover_labels
+    if HackDisassembler._c_instruction_text is None:
+      HackDisassembler._c_instruction_text = self._build_c_instruction_text()
+    self.c_instruction_text = HackDisassembler._c_instruction_text
+
+  @staticmethod
+  def _build_c_instruction_text() -> List[Optional[str]]:
+    tables = control_tables()
+    # When several spellings share the same bits (DM and MD) the last one of the table is used
+    comps = {bits: comp for comp, bits in tables["comp"].items()}
+    dests = {bits: ("" if dest == "null" else f"{dest}=") for dest, bits in tables["dest"].items()}
+    jumps = {bits: ("" if jump == "null" else f";{jump}") for jump, bits in tables["jump"].items()}
+    text: List[Optional[str]] = [None] * (1 << 13)
+    for comp_bits, comp in comps.items():
+      for dest_bits, dest in dests.items():
+        for jump_bits, jump in jumps.items():
+          text[comp_bits << 6 | dest_bits << 3 | jump_bits] = f"{dest}{comp}{jump}"
+    return text
+
+  def instruction(self, word: int) -> str:
+    if not word & 0x8000:
+      return f"@{word}"
+    text = self.c_instruction_text[word & 0x1FFF] if word & self.C_PREFIX == self.C_PREFIX else None
+    if text is None:
+      raise ValueError(f"{word:016b} is not a valid Hack instruction")
+    return text
+
+  def find_jump_targets(self, words: Iterable[int]) -> Tuple[Set[int], Set[int]]:
+    """
+    Returns (target addresses, addresses of the A-instructions loading them). An A-instruction loads a
+    jump target when a jump follows it before A is written again.
+    """
+    targets: Set[int] = set()
+    loads: Set[int] = set()
+    last_load: Optional[int] = None
+    last_value = 0
+    size = 0
+    for address, word in enumerate(words):
+      size += 1
+      if not word & 0x8000:
+        last_load, last_value = address, word
+        continue
+      if word & 0b111 and last_load is not None:
+        targets.add(last_value)
+        loads.add(last_load)
+      if word & 0b100000:
+        # dest includes A
+        last_load = None
+    in_rom = {target for target in targets if target < size}
+    return in_rom, loads
+
+  def disassemble(self, words: Iterable[int], targets: Set[int] = frozenset(),
+                  loads: Set[int] = frozenset()) -> Iterator[str]:
+    for address, word in enumerate(words):
+      if address in targets:
+        yield f"({self.LABEL_PREFIX}{address})"
+      if address in loads and word in targets:
+        yield f"@{self.LABEL_PREFIX}{word}"
+      else:
+        yield self.instruction(word)
+
+  def disassemble_words(self, words: Iterable[int]) -> Iterator[str]:
+    words = words if isinstance(words, (list, tuple, array)) else list(words)
+    targets, loads = self.find_jump_targets(words) if self.recover_labels else (set(), set())
+    return self.disassemble(words, targets, loads)
+
+  def disassemble_file(self, input_path, output: IO[str], byteorder: str = "big") -> int:
+    """Disassemble a .hack or .bin file into the output stream. Returns the number of words."""
+    targets, loads = set(), set()
+    if self.recover_labels:
+      targets, loads = self.find_jump_targets(self.read_words(input_path, byteorder))
+    count = 0
+    for line in self.disassemble(self.read_words(input_path, byteorder), targets, loads):
+      if not line.startswith("("):
+        count += 1
+      output.write(line + "\n")
+    return count
+
+  @classmethod
+  def read_words(cls, input_path, byteorder: str = "big") -> Iterator[int]:
+    """Words of a .hack text file or, for any other extension, of a packed 16 bit words file, lazily."""
+    input_path = Path(input_path)
+    if input_path.suffix == ".hack":
+      with open(input_path, "r") as file:
+        for line in file:
+          if line.strip():
+            yield int(line, 2)
+      return
+    with open(input_path, "rb") as file:
+      while chunk := file.read(cls.READ_CHUNK):
+        words = array('H')
+        words.frombytes(chunk)
+        if byteorder != sys.byteorder:
+          words.byteswap()
+        yield from words
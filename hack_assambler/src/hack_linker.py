@@ -0,0 +1,113 @@
+from array import array
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+from hack_assambler.src.hack_assambler import HackAssambler
+from hack_assambler.src.hack_object import ObjectModule, source_hash
+from hack_assambler.src.tables import default_symbols
+
+
+def assemble_object_file(input_path, output_path=None, optimize: bool = False):
+  """
+  Assemble an .asm file into an object module stored next to it (or at output_path). If the stored
+  module was made from the same source it is reused as is. Returns (module, reused).
+  """
+  input_path = Path(input_path)
+  output_path = Path(output_path) if output_path else input_path.with_suffix(ObjectModule.EXTENSION)
+  digest = source_hash(input_path.read_bytes(), optimize)
+  if output_path.exists():
+    module = ObjectModule.read(output_path)
+    if module.source_hash == digest:
+      return module, True
+  assambler = HackAssambler(str(input_path), optimize)
+  assambler.parse()
+  module = assambler.compile_object()
+  module.source_hash = digest
+  module.write(output_path)
+  return module, False
+
+
+class HackLinker:
+  """
+  Links object modules into a program, placing them one after the other in the given order. Labels are
+  global, as when the sources are assembled together: a label defined twice is an error, references
+  to labels of any module are resolved, and the remaining symbols are variables allocated from
+  RAM[16] in order of first use. Linking the modules of a program gives the same words as assembling
+  the concatenation of their sources.
+  """
+  ROM_SIZE = 32768
+  VARIABLE_BASE = 16
+  MAX_ADDRESS = 0x7FFF
+
+  def __init__(self, modules: Sequence[ObjectModule]):
+    self.modules = list(modules)
+    self.labels: Dict[str, int] = {}
+    self.variables: Dict[str, int] = {}
+    self.module_addresses: List[int] = []
+
+  def link(self) -> array:
+    self._place_modules()
+    predefined = default_symbols()
+    next_variable = self.VARIABLE_BASE
+    words = array('H')
+    for module, base in zip(self.modules, self.module_addresses):
+      code = array('H', module.words)
+      for address in module.relocations:
+        if code[address] + base > self.MAX_ADDRESS:
+          raise SyntaxError(f"A label of {module.name} is at {code[address] + base}, it does not fit in 15 bits")
+        code[address] += base
+      # in address order, so variables are allocated in order of first use
+      pending = sorted((address, symbol) for symbol, addresses in module.references.items() for address in addresses)
+      for address, symbol in pending:
+        value = self.labels.get(symbol)
+        if value is None:
+          value = predefined.get(symbol)
+        if value is None:
+          value = self.variables.get(symbol)
+        if value is None:
+          value = self.variables[symbol] = next_variable
+          next_variable += 1
+        if value > self.MAX_ADDRESS:
+          raise SyntaxError(f"@{symbol} in {module.name} does not fit in 15 bits")
+        code[address] = value
+      words.extend(code)
+    return words
+
+  def _place_modules(self):
+    self.labels = {}
+    self.variables = {}
+    self.module_addresses = []
+    address = 0
+    for module in self.modules:
+      self.module_addresses.append(address)
+      for label, offset in module.labels.items():
+        if label in self.labels or label in default_symbols():
+          raise KeyError(f"Symbol {label} of {module.name} already exists")
+        self.labels[label] = address + offset
+      address += len(module.words)
+    if address > self.ROM_SIZE:
+      raise ValueError(f"Program has {address} words, the ROM only holds {self.ROM_SIZE}")
+
+  @classmethod
+  def link_files(cls, input_paths: Sequence, optimize: bool = False) -> "LinkResult":
+    """Link .asm (assembled to cached object files) and .hobj files, in the given order."""
+    modules, reused = [], 0
+    for path in map(Path, input_paths):
+      if path.suffix == ObjectModule.EXTENSION:
+        module, was_reused = ObjectModule.read(path), True
+      else:
+        module, was_reused = assemble_object_file(path, optimize=optimize)
+      modules.append(module)
+      reused += was_reused
+    linker = cls(modules)
+    return LinkResult(linker.link(), linker, reused)
+
+
+class LinkResult:
+  def __init__(self, words: array, linker: HackLinker, reused: int):
+    self.words = words
+    self.linker = linker
+    self.reused = reused
+
+  def __repr__(self):
+    return f"LinkResult(words={len(self.words)}, modules={len(self.linker.modules)}, reused={self.reused})"
@@ -0,0 +1,86 @@
+import hashlib
+from array import array
+from typing import Dict
+
+
+class ObjectModule:
+  """
+  A separately assembled piece of a program, see HackAssambler.compile_object(). Addresses are
+  relative to the start of the module:
+    - words: the code, A-instructions still to be resolved hold 0
+    - labels: labels defined by the module
+    - relocations: A-instructions loading a label of the module, the linker adds the module address
+    - references: symbol -> A-instructions loading it, for the symbols that are not labels of the module
+      nor predefined: labels of other modules or variables, resolved by the linker
+
+  It is stored as text (.hobj), the code as in a .hack file:
+
+    # Hack object of Prog.asm
+    # source <sha1 of the source>
+    label LOOP 2
+    relocate 5 9
+    reference i 1 4
+    code
+    0000000000001010
+    ...
+  """
+  HEADER = "# Hack object of "
+  SOURCE = "# source "
+  EXTENSION = ".hobj"
+
+  def __init__(self, name: str, words: array, labels: Dict[str, int], relocations: array,
+               references: Dict[str, array], source_hash: str = ""):
+    self.name = name
+    self.words = words
+    self.labels = labels
+    self.relocations = relocations
+    self.references = references
+    self.source_hash = source_hash
+
+  def __repr__(self):
+    return (f"ObjectModule({self.name!r}, words={len(self.words)}, labels={len(self.labels)}, "
+            f"references={len(self.references)})")
+
+  def write(self, output_path):
+    with open(output_path, "w") as file:
+      file.write(f"{self.HEADER}{self.name}\n{self.SOURCE}{self.source_hash}\n")
+      for label, address in self.labels.items():
+        file.write(f"label {label} {address}\n")
+      if self.relocations:
+        file.write(f"relocate {' '.join(map(str, self.relocations))}\n")
+      for symbol, addresses in self.references.items():
+        file.write(f"reference {symbol} {' '.join(map(str, addresses))}\n")
+      file.write("code\n")
+      file.writelines(f"{word:016b}\n" for word in self.words)
+
+  @classmethod
+  def read(cls, path) -> "ObjectModule":
+    name, source_hash = str(path), ""
+    labels: Dict[str, int] = {}
+    relocations = array('I')
+    references: Dict[str, array] = {}
+    words = array('H')
+    with open(path, "r") as file:
+      for line in file:
+        line = line.rstrip("\n")
+        if line.startswith(cls.HEADER):
+          name = line[len(cls.HEADER):]
+        elif line.startswith(cls.SOURCE):
+          source_hash = line[len(cls.SOURCE):]
+        elif line == "code":
+          words.extend(int(line, 2) for line in file if line.strip())
+        elif line.startswith("label "):
+          _, label, address = line.split(" ")
+          labels[label] = int(address)
+        elif line.startswith("relocate "):
+          relocations.extend(map(int, line.split(" ")[1:]))
+        elif line.startswith("reference "):
+          _, symbol, *addresses = line.split(" ")
+          references[symbol] = array('I', map(int, addresses))
+        elif line and not line.startswith("#"):
+          raise SyntaxError(f"{path}: unexpected line '{line}'")
+    return cls(name, words, labels, relocations, references, source_hash)
+
+
+def source_hash(source: bytes, optimize: bool = False) -> str:
+  return hashlib.sha1(source + (b"\0optimize" if optimize else b"")).hexdigest()
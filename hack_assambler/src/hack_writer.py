@@ -0,0 +1,76 @@
+import sys
+from array import array
+from typing import IO
+
+
+class HackWriter:
+  """
+  Writes assembled words in one of the supported output formats:
+    - hack: one 16 characters '0'/'1' line per word (the nand2tetris format)
+    - bin: packed 16 bit words, big or little endian
+    - hex: Intel HEX records, byte addresses are word address * 2
+  """
+  WORD_LENGTH = 16
+  HEX_RECORD_LENGTH = 16
+  EXTENSIONS = {
+    "hack": ".hack",
+    "bin": ".bin",
+    "hex": ".hex",
+  }
+
+  def __init__(self, output_path: str):
+    self.output_path = output_path
+
+  def write(self, words: array, output_format: str = "hack", byteorder: str = "big"):
+    self.check_format(output_format)
+    mode = "wb" if output_format == "bin" else "w"
+    with open(self.output_path, mode) as file:
+      self.write_stream(file, words, output_format, byteorder)
+
+  @classmethod
+  def write_stream(cls, stream: IO, words: array, output_format: str = "hack", byteorder: str = "big"):
+    """Write to an open stream: a binary one for the 'bin' format, a text one for the others."""
+    cls.check_format(output_format)
+    if output_format == "hack":
+      cls.write_text(stream, words)
+    elif output_format == "bin":
+      cls.write_binary(stream, words, byteorder)
+    else:
+      cls.write_intel_hex(stream, words, byteorder)
+
+  @classmethod
+  def check_format(cls, output_format: str):
+    if output_format not in cls.EXTENSIONS:
+      raise ValueError(f"Output format '{output_format}' is not supported. Use one of {list(cls.EXTENSIONS)}")
+
+  @staticmethod
+  def write_text(stream: IO[str], words: array):
+    stream.write("\n".join(f"{word:016b}" for word in words))
+
+  @classmethod
+  def write_binary(cls, stream: IO[bytes], words: array, byteorder: str = "big"):
+    stream.write(cls.to_bytes(words, byteorder))
+
+  @classmethod
+  def write_intel_hex(cls, stream: IO[str], words: array, byteorder: str = "big"):
+    data = cls.to_bytes(words, byteorder)
+    if len(data) > 0x10000:
+      raise ValueError("Intel HEX output is limited to 64K bytes (32K words)")
+    for address in range(0, len(data), cls.HEX_RECORD_LENGTH):
+      stream.write(cls._hex_record(address, 0x00, data[address:address + cls.HEX_RECORD_LENGTH]))
+    stream.write(cls._hex_record(0, 0x01, b""))
+
+  @staticmethod
+  def to_bytes(words: array, byteorder: str = "big") -> bytes:
+    if byteorder not in ("big", "little"):
+      raise ValueError(f"Byte order must be 'big' or 'little', not '{byteorder}'")
+    if byteorder != sys.byteorder:
+      words = array("H", words)
+      words.byteswap()
+    return words.tobytes()
+
+  @staticmethod
+  def _hex_record(address: int, record_type: int, data: bytes) -> str:
+    record = bytes([len(data), address >> 8, address & 0xFF, record_type]) + data
+    checksum = -sum(record) & 0xFF
+    return f":{record.hex().upper()}{checksum:02X}\n"
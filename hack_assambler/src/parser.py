@@ -1,22 +1,40 @@
 
+from typing import Iterable
+
+
 class Parser:
-    def __init__(self, file:str):
+    def __init__(self, file:str = None, lines:Iterable[str] = None):
+        """Parse the file at path file or, if given, the lines of any iterable (list, generator, ...)"""
+        if file is None and lines is None:
+            raise ValueError("Either a file or lines to parse must be given")
         self.file_str = file
+        self.lines = lines
 
     def parse(self):
-        clean_file = []
+        return list(self.stream())
+
+    def stream(self):
+        """Yield the clean instructions one by one, reading the file lazily."""
+        for _, line in self.stream_with_line_numbers():
+            yield line
+
+    def stream_with_line_numbers(self):
+        """Yield (line number in the file, starting at 1, clean instruction) pairs."""
+        if self.lines is not None:
+            yield from self._clean_lines(self.lines)
+            return
         with open(self.file_str, "r") as file:
-            lines = file.readlines()
-            for line in lines:
-                line = line.strip()
-                if line.startswith("//"):
-                    continue
-                elif line == "":
-                    continue
-                else:
-                    line_clean = self._clean_line(line)
-                    clean_file.append(line_clean)
-            return clean_file
+            yield from self._clean_lines(file)
+
+    def _clean_lines(self, lines:Iterable[str]):
+        for line_number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if line.startswith("//"):
+                continue
+            elif line == "":
+                continue
+            else:
+                yield line_number, self._clean_line(line)
 
 
     def _clean_line(self, line:str):
@@ -0,0 +1,95 @@
+from typing import Dict, List, Optional, Tuple
+
+
+class PeepholeOptimizer:
+  """
+  Removes redundant instructions from parsed Hack assembly, before the labels are resolved, so that
+  label addresses are computed on the optimized program. Every rule only looks at the instruction
+  being read and the last one kept, and never across a label: labels are the only way execution can
+  enter the middle of a sequence. Programs jumping to literal ROM addresses (@123 / 0;JMP) must not be
+  optimized.
+
+  Rules:
+    - dead_a: an A-instruction followed by another A-instruction is removed.
+    - known_a: '@X' is removed when A already holds X (no label or write to A since the last '@X').
+    - cancel: 'M=M+1' followed by 'M=M-1' (or 'D=D+1' / 'D=D-1', in any order) are both removed.
+    - dead_d: a C-instruction that only writes D is removed when the next one writes D without
+      reading it, e.g. 'D=M' followed by 'D=A'.
+    - no_op: C-instructions without effect, like 'M=M', 'D=D' or a comp without dest nor jump.
+  """
+  RULES = ("dead_a", "known_a", "cancel", "dead_d", "no_op")
+  _CANCELLING = {
+    ("M=M+1", "M=M-1"), ("M=M-1", "M=M+1"),
+    ("D=D+1", "D=D-1"), ("D=D-1", "D=D+1"),
+  }
+  _SELF_ASSIGNMENTS = {"A=A", "D=D", "M=M"}
+
+  def __init__(self):
+    self.removed: Dict[str, int] = dict.fromkeys(self.RULES, 0)
+    # index in the input list of every instruction kept by the last optimize() call
+    self.kept_indices: List[int] = []
+
+  @property
+  def total_removed(self) -> int:
+    return sum(self.removed.values())
+
+  def optimize(self, instructions: List[str]) -> List[str]:
+    """Apply the rules until none of them removes anything more."""
+    numbered = list(enumerate(instructions))
+    while True:
+      removed_before = self.total_removed
+      numbered = self._optimize_pass(numbered)
+      if self.total_removed == removed_before:
+        self.kept_indices = [index for index, _ in numbered]
+        return [instruction for _, instruction in numbered]
+
+  def _optimize_pass(self, numbered: List[Tuple[int, str]]) -> List[Tuple[int, str]]:
+    optimized: List[Tuple[int, str]] = []
+    known_a: Optional[str] = None
+    for index, instruction in numbered:
+      previous = optimized[-1][1] if optimized else None
+
+      if self._is_label(instruction):
+        known_a = None
+      elif instruction.startswith("@"):
+        if instruction == known_a:
+          self.removed["known_a"] += 1
+          continue
+        if previous is not None and previous.startswith("@"):
+          optimized.pop()
+          self.removed["dead_a"] += 1
+        known_a = instruction
+      else:
+        dest, comp, jump = self._split_c_instruction(instruction)
+        if not jump and (not dest or instruction in self._SELF_ASSIGNMENTS):
+          self.removed["no_op"] += 1
+          continue
+        if (previous, instruction) in self._CANCELLING:
+          optimized.pop()
+          self.removed["cancel"] += 2
+          continue
+        if previous is not None and self._only_writes_d(previous) and "D" in dest and "D" not in comp:
+          optimized.pop()
+          self.removed["dead_d"] += 1
+        if "A" in dest:
+          known_a = None
+
+      optimized.append((index, instruction))
+    return optimized
+
+  @staticmethod
+  def _is_label(instruction: str) -> bool:
+    return instruction.startswith("(") and instruction.endswith(")")
+
+  @staticmethod
+  def _split_c_instruction(instruction: str):
+    dest, _, rest = instruction.rpartition("=")
+    comp, _, jump = rest.partition(";")
+    return dest, comp, jump
+
+  @classmethod
+  def _only_writes_d(cls, instruction: str) -> bool:
+    if instruction.startswith("@") or cls._is_label(instruction):
+      return False
+    dest, _, jump = cls._split_c_instruction(instruction)
+    return dest == "D" and not jump
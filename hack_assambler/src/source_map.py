@@ -0,0 +1,91 @@
+from array import array
+from bisect import bisect_right
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def label_finder(labels: Dict[str, int]) -> Callable[[int], Optional[str]]:
+  """Function giving the closest label at or before an address, None before the first label."""
+  sorted_labels = sorted((address, label) for label, address in labels.items())
+  label_addresses = [address for address, _ in sorted_labels]
+
+  def find_label(address: int) -> Optional[str]:
+    position = bisect_right(label_addresses, address)
+    return sorted_labels[position - 1][1] if position else None
+
+  return find_label
+
+
+class SourceMap:
+  """
+  Links every ROM address of an assembled program to its .asm source line, its instruction and the
+  closest label at or before it, together with the labels and the RAM variables allocated by the
+  assembler. It is stored as a plain text listing:
+
+    # Hack listing of Prog.asm
+    # ROM line instruction
+    (LOOP)
+    0 3 @i
+    1 4 D=M
+    ...
+    # symbols
+    label LOOP 0
+    variable i 16
+  """
+  HEADER = "# Hack listing of "
+
+  def __init__(self, source_path: str, line_numbers: array, instructions: List[str], labels: Dict[str, int],
+               variables: Dict[str, int]):
+    self.source_path = source_path
+    self.line_numbers = line_numbers
+    self.instructions = instructions
+    self.labels = labels
+    self.variables = variables
+    self._sorted_labels: List[Tuple[int, str]] = sorted((address, label) for label, address in labels.items())
+    self._find_label = label_finder(labels)
+
+  def enclosing_label(self, address: int) -> Optional[str]:
+    """Last label defined at or before address, None if the address is before every label."""
+    return self._find_label(address)
+
+  def source_line(self, address: int) -> int:
+    return self.line_numbers[address]
+
+  def write(self, output_path: str):
+    labels_at: Dict[int, List[str]] = {}
+    for address, label in self._sorted_labels:
+      labels_at.setdefault(address, []).append(label)
+
+    with open(output_path, "w") as file:
+      file.write(f"{self.HEADER}{self.source_path}\n# ROM line instruction\n")
+      for address, (line_number, instruction) in enumerate(zip(self.line_numbers, self.instructions)):
+        for label in labels_at.get(address, ()):
+          file.write(f"({label})\n")
+        file.write(f"{address} {line_number} {instruction}\n")
+      file.write("# symbols\n")
+      for address, label in self._sorted_labels:
+        file.write(f"label {label} {address}\n")
+      for variable, address in self.variables.items():
+        file.write(f"variable {variable} {address}\n")
+
+  @classmethod
+  def read(cls, path: str) -> "SourceMap":
+    source_path = ""
+    line_numbers = array('I')
+    instructions: List[str] = []
+    labels: Dict[str, int] = {}
+    variables: Dict[str, int] = {}
+    with open(path, "r") as file:
+      for line in file:
+        line = line.rstrip("\n")
+        if line.startswith(cls.HEADER):
+          source_path = line[len(cls.HEADER):]
+        elif not line or line.startswith("#") or line.startswith("("):
+          continue
+        elif line.startswith("label ") or line.startswith("variable "):
+          kind, name, address = line.split(" ")
+          (labels if kind == "label" else variables)[name] = int(address)
+        else:
+          _, line_number, instruction = line.split(" ", 2)
+          line_numbers.append(int(line_number))
+          instructions.append(instruction)
+    return cls(source_path, line_numbers, instructions, labels, variables)
@@ -0,0 +1,167 @@
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from hack_assambler.src.hack_assambler import HackAssambler
+from hack_assambler.src.hack_disassembler import HackDisassembler
+
+JUMP_BITS = 0b111
+DEST_A = 0b100000
+
+
+class LabelStats:
+  """
+  Static costs of the code between a label and the next one:
+    - words: ROM words
+    - straight_line_cycles: cycles of the fall through path from the label, not taking conditional jumps
+      and stepping over calls, up to the first other unconditional jump
+    - loops: back edges (jumps to an address at or before themselves) starting in the code
+    - max_depth: deepest loop nesting of any of its addresses, counting loops of the whole program
+  """
+
+  def __init__(self, label: Optional[str], start: int, words: int, straight_line_cycles: int, loops: int,
+               max_depth: int):
+    self.label = label
+    self.start = start
+    self.words = words
+    self.straight_line_cycles = straight_line_cycles
+    self.loops = loops
+    self.max_depth = max_depth
+
+  def __repr__(self):
+    return (f"LabelStats({self.label!r}, start={self.start}, words={self.words}, "
+            f"straight_line_cycles={self.straight_line_cycles}, loops={self.loops}, max_depth={self.max_depth})")
+
+
+class StaticAnalysis:
+  """
+  Size and cost of a program by label, without running it. Jump targets are known statically when the
+  jump follows the '@target' that loads them; jumps through a computed A (the 'return' of VMTranslator)
+  are left out of the loops and end the straight line paths.
+
+  The labels are grouped into functions by group_labels if given, e.g. report_labels of VMTranslator
+  for its output, otherwise the functions are the labels that are called.
+  """
+  ROM_SIZE = 32768
+  # targets of more jumps than this are shared routines, e.g. return trampolines, not loop heads
+  MAX_LOOP_JUMPS = 4
+
+  def __init__(self, words: Iterable[int], labels: Dict[str, int],
+               group_labels: Optional[Callable[[Dict[str, int]], Dict[str, int]]] = None):
+    self.words = array('H', words)
+    self.labels = labels
+    self.group_labels = group_labels
+    self.return_addresses = set()
+    self.jump_targets = self._find_jump_targets()
+    self.calls = {source: target for source, target in self.jump_targets.items() if self._is_call(source, target)}
+    jumps_to = Counter(self.jump_targets.values())
+    self.back_edges = sorted((source, target) for source, target in self.jump_targets.items()
+                             if target is not None and target <= source and source not in self.calls
+                             and jumps_to[target] <= self.MAX_LOOP_JUMPS)
+    self.depth = self._loop_depths()
+
+  @classmethod
+  def from_asm(cls, path, optimize: bool = False, group_labels=None) -> "StaticAnalysis":
+    assambler = HackAssambler(str(path), optimize)
+    assambler.parse()
+    assambler.compile()
+    return cls(assambler.file_compiled, assambler.labels, group_labels)
+
+  @classmethod
+  def from_words_file(cls, path, byteorder: str = "big", group_labels=None) -> "StaticAnalysis":
+    """A .hack or .bin file, with the labels HackDisassembler recovers from the jump targets."""
+    words = array('H', HackDisassembler.read_words(path, byteorder))
+    targets, _ = HackDisassembler().find_jump_targets(words)
+    return cls(words, {f"{HackDisassembler.LABEL_PREFIX}{target}": target for target in targets}, group_labels)
+
+  @classmethod
+  def from_file(cls, path, byteorder: str = "big", optimize: bool = False, group_labels=None) -> "StaticAnalysis":
+    if Path(path).suffix == ".asm":
+      return cls.from_asm(path, optimize, group_labels)
+    return cls.from_words_file(path, byteorder, group_labels)
+
+  def _find_jump_targets(self) -> Dict[int, Optional[int]]:
+    """
+    Address of every jump -> its target, None if A is not a constant loaded just before. Constants that
+    are used as data instead, like the return address pushed by a call, go to return_addresses.
+    """
+    targets: Dict[int, Optional[int]] = {}
+    loaded: Optional[int] = None
+    for address, word in enumerate(self.words):
+      if not word & 0x8000:
+        loaded = word
+        continue
+      if word & JUMP_BITS:
+        targets[address] = loaded
+      elif loaded is not None and not word & 0x1000:
+        # the constant itself goes through the ALU, e.g. D=A
+        self.return_addresses.add(loaded)
+      if word & DEST_A:
+        loaded = None
+    return targets
+
+  def _is_call(self, address: int, target: Optional[int]) -> bool:
+    """An unconditional jump to a known target, with the return address pushed before right after it."""
+    return target is not None and self.words[address] & JUMP_BITS == JUMP_BITS \
+        and address + 1 in self.return_addresses
+
+  def _loop_depths(self) -> array:
+    """Number of loops, as back edge intervals [target, source], around every address."""
+    changes = array('i', bytes(4 * (len(self.words) + 1)))
+    for source, target in self.back_edges:
+      changes[target] += 1
+      changes[source + 1] -= 1
+    depth = array('i', bytes(4 * len(self.words)))
+    current = 0
+    for address in range(len(self.words)):
+      current += changes[address]
+      depth[address] = current
+    return depth
+
+  def _straight_line_cycles(self, start: int, end: int) -> int:
+    cycles = 0
+    for address in range(start, end):
+      word = self.words[address]
+      cycles += 1
+      if word & 0x8000 and word & JUMP_BITS == JUMP_BITS and address not in self.calls:
+        break
+    return cycles
+
+  def function_labels(self) -> Dict[str, int]:
+    """
+    The labels of the functions: the labels given by group_labels if any, otherwise the labels that are
+    called. Without labelled calls, every label.
+    """
+    if self.group_labels is not None:
+      return self.group_labels(self.labels)
+    called = set(self.calls.values())
+    functions = {label: address for label, address in self.labels.items() if address in called}
+    return functions or dict(self.labels)
+
+  def stats(self, by_function: bool = True) -> List[LabelStats]:
+    """Stats of every label (of every function with by_function), in ROM order."""
+    labels = self.function_labels() if by_function else self.labels
+    starts = sorted((address, label) for label, address in labels.items())
+    if not starts or starts[0][0] > 0:
+      starts.insert(0, (0, None))
+    stats = []
+    for index, (start, label) in enumerate(starts):
+      end = starts[index + 1][0] if index + 1 < len(starts) else len(self.words)
+      if end == start:
+        continue
+      loops = sum(1 for source, _ in self.back_edges if start <= source < end)
+      stats.append(LabelStats(label, start, end - start, self._straight_line_cycles(start, end),
+                              loops, max(self.depth[start:end])))
+    return stats
+
+  def report(self, top: Optional[int] = None, by_function: bool = True) -> str:
+    total = len(self.words)
+    lines = [f"{total} words, {total / self.ROM_SIZE:.1%} of the ROM, {len(self.back_edges)} loops"]
+    lines.append(f"  {'words':>8} {'ROM':>6} {'straight':>9} {'loops':>6} {'depth':>6}  label")
+    ranked = sorted(self.stats(by_function), key=lambda label_stats: label_stats.words, reverse=True)
+    for label_stats in ranked[:top]:
+      lines.append(f"  {label_stats.words:>8} {label_stats.words / self.ROM_SIZE:6.1%} "
+                   f"{label_stats.straight_line_cycles:>9} {label_stats.loops:>6} {label_stats.max_depth:>6}  "
+                   f"{label_stats.label or '<start>'}")
+    return "\n".join(lines)
@@ -1,19 +1,11 @@
-import os
-import tomllib
+from collections import ChainMap
 
-class SymbolTable:
-    CURRENT_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
-    TABLE_FILE_PATH = os.path.join(CURRENT_DIRECTORY, "config", "symbolic_defaults.toml")
+from hack_assambler.src.tables import default_symbols
 
+class SymbolTable:
     def __init__(self):
-        self._default_table = {}
-        self._load_table_from_file()
-        self.table = self._default_table.get("symbols")
-
-
-    def _load_table_from_file(self):
-        with open(self.TABLE_FILE_PATH, 'rb') as f:
-            self._default_table = tomllib.load(f)
+        # Copy on write: new symbols go to the first (per program) dict, the shared defaults are never modified
+        self.table = ChainMap({}, default_symbols())
 
 
     def get_symbol_value(self, symbol):
@@ -21,7 +13,7 @@ class SymbolTable:
 
 
     def add_symbol(self, symbol, value):
-        if symbol not in self.table.keys():
+        if symbol not in self.table:
             self.table[symbol] = value
         else:
             raise KeyError(f"Symbol {symbol} already exists")
@@ -0,0 +1,79 @@
+"""
+Control and symbol tables shared by every HackCompiler and SymbolTable of the process.
+
+The TOML files under config/ are the source of truth. They are parsed at most once per process into
+read only, integer valued mappings. Running this module generates config/prebuilt_tables.py, a plain
+Python module with the same tables, that is imported instead of parsing the TOML files:
+
+  python -m hack_assambler.src.tables
+"""
+import hashlib
+import os
+import pprint
+import tomllib
+from functools import lru_cache
+from types import MappingProxyType
+
+CURRENT_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+CONTROL_TABLE_FILE_PATH = os.path.join(CURRENT_DIRECTORY, "config", "control_table.toml")
+SYMBOLS_FILE_PATH = os.path.join(CURRENT_DIRECTORY, "config", "symbolic_defaults.toml")
+PREBUILT_FILE_PATH = os.path.join(CURRENT_DIRECTORY, "config", "prebuilt_tables.py")
+
+
+def control_tables():
+  """{'comp': {...}, 'dest': {...}, 'jump': {...}} with the bits of every mnemonic as integers."""
+  return _load()[0]
+
+
+def default_symbols():
+  """Predefined symbols (R0-R15, SP, SCREEN, ...) and their integer values."""
+  return _load()[1]
+
+
+@lru_cache(maxsize=None)
+def _load():
+  tables, symbols = _load_prebuilt() or _load_toml()
+  control = MappingProxyType({name: MappingProxyType(dict(table)) for name, table in tables.items()})
+  return control, MappingProxyType(dict(symbols))
+
+
+def _load_prebuilt():
+  try:
+    from hack_assambler.src.config import prebuilt_tables
+  except ImportError:
+    return None
+  if prebuilt_tables.SOURCE_HASH != _source_hash():
+    # The TOML files changed after the module was generated
+    return None
+  return prebuilt_tables.CONTROL_TABLES, prebuilt_tables.DEFAULT_SYMBOLS
+
+
+def _load_toml():
+  with open(CONTROL_TABLE_FILE_PATH, 'rb') as f:
+    tables = tomllib.load(f)
+  with open(SYMBOLS_FILE_PATH, 'rb') as f:
+    symbols = tomllib.load(f).get("symbols")
+  control = {name: {key: int(bits, 2) for key, bits in table.items()} for name, table in tables.items()}
+  return control, {symbol: int(value) for symbol, value in symbols.items()}
+
+
+def _source_hash() -> str:
+  digest = hashlib.sha256()
+  for path in (CONTROL_TABLE_FILE_PATH, SYMBOLS_FILE_PATH):
+    with open(path, 'rb') as f:
+      digest.update(f.read())
+  return digest.hexdigest()
+
+
+def generate_prebuilt_module(output_path: str = PREBUILT_FILE_PATH) -> str:
+  control, symbols = _load_toml()
+  with open(output_path, "w") as file:
+    file.write("# Generated by `python -m hack_assambler.src.tables` from the TOML files. Do not edit.\n")
+    file.write(f"SOURCE_HASH = {_source_hash()!r}\n\n")
+    file.write(f"CONTROL_TABLES = {pprint.pformat(control, sort_dicts=False)}\n\n")
+    file.write(f"DEFAULT_SYMBOLS = {pprint.pformat(symbols, sort_dicts=False)}\n")
+  return output_path
+
+
+if __name__ == "__main__":
+  print(f"Tables written to {generate_prebuilt_module()}")
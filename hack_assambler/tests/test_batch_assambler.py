@@ -0,0 +1,44 @@
+import shutil
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from hack_assambler.src.batch_assambler import BatchAssambler
+
+
+class TestBatchAssambler(unittest.TestCase):
+
+  def setUp(self):
+    self.tmp_dir = TemporaryDirectory()
+    self.tmp_path = Path(self.tmp_dir.name) / "test_folders"
+    test_folders = Path(__file__).parents[2] / "vm_translator" / "tests" / "test_folders"
+    shutil.copytree(test_folders, self.tmp_path)
+    (self.tmp_path / "Broken.asm").write_text("@1\nD=X")
+
+  def tearDown(self):
+    self.tmp_dir.cleanup()
+
+  def test_results_are_sorted_and_errors_reported(self):
+    batch = BatchAssambler(self.tmp_path, jobs=2)
+    results = batch.run()
+    self.assertEqual([result.input_path for result in results], sorted(self.tmp_path.rglob("*.asm")))
+    self.assertEqual([result.input_path.name for result in batch.errors], ["Broken.asm"])
+    self.assertIn("D=X", batch.errors[0].error)
+    self.assertIn("files/sec", batch.summary())
+    self.assertIn("words/sec", batch.summary())
+
+  def test_parallel_output_matches_sequential_output(self):
+    sequential = BatchAssambler(self.tmp_path, jobs=1)
+    sequential.run()
+    expected = {path: Path(path).read_text() for path in (r.output_path for r in sequential.results) if path}
+
+    parallel = BatchAssambler(self.tmp_path, jobs=3)
+    parallel.run()
+    actual = {path: Path(path).read_text() for path in (r.output_path for r in parallel.results) if path}
+
+    self.assertEqual(actual, expected)
+    self.assertEqual([r.words for r in parallel.results], [r.words for r in sequential.results])
+
+
+if __name__ == "__main__":
+  unittest.main()
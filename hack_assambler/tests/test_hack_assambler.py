@@ -0,0 +1,119 @@
+import io
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from hack_assambler.src.hack_assambler import HackAssambler
+from hack_assambler.src.hack_writer import HackWriter
+from hack_emulator.src.hack_cpu import HackCPU
+from vm_translator.src.vm_parser import Parser as VMParser
+from vm_translator.src.vm_translator_class import VMTranslator
+
+
+class TestHackAssamblerStreaming(unittest.TestCase):
+  """The streaming assembler must produce exactly the same .hack file as the two pass assembler."""
+
+  def setUp(self):
+    self.test_folders = Path(__file__).parents[2] / "vm_translator" / "tests" / "test_folders"
+    self.tmp_dir = TemporaryDirectory()
+    self.tmp_path = Path(self.tmp_dir.name)
+
+  def tearDown(self):
+    self.tmp_dir.cleanup()
+
+  def _write_asm(self, name: str, lines: list[str]) -> str:
+    path = self.tmp_path / name
+    path.write_text("\n".join(lines))
+    return str(path)
+
+  def _two_pass(self, asm_path: str) -> str:
+    assambler = HackAssambler(asm_path)
+    assambler.parse()
+    assambler.compile()
+    assambler.store_file()
+    return Path(assambler._get_output_path()).read_text()
+
+  def _streaming(self, asm_path: str) -> str:
+    output_path = self.tmp_path / "streaming.hack"
+    HackAssambler(asm_path).assemble_streaming(str(output_path))
+    return output_path.read_text()
+
+  def test_streaming_matches_two_pass_on_test_folders(self):
+    for asm_file in sorted(self.test_folders.glob("*/*.asm")):
+      with self.subTest(asm=asm_file.name):
+        asm_path = self._write_asm(asm_file.name, asm_file.read_text().splitlines())
+        self.assertEqual(self._streaming(asm_path), self._two_pass(asm_path))
+
+  def test_forward_labels_and_variables_are_backpatched(self):
+    asm_path = self._write_asm("Forward.asm", [
+      "(START)", "@i", "M=1", "@END", "0;JMP", "@j", "M=0", "(END)", "@END", "0;JMP", "@START", "0;JMP", "@i",
+    ])
+    words = self._streaming(asm_path).split("\n")
+    self.assertEqual(words[0], f"{16:016b}")   # i is the first variable
+    self.assertEqual(words[2], f"{6:016b}")    # forward reference to END
+    self.assertEqual(words[4], f"{17:016b}")   # j is the second variable
+    self.assertEqual(words[8], f"{0:016b}")    # START is a label at address 0, not a variable
+    self.assertEqual(words[10], f"{16:016b}")  # i keeps its address
+
+  def test_streaming_returns_number_of_words(self):
+    asm_path = self._write_asm("Add.asm", ["// add", "@2", "D=A", "@3", "D=D+A", "@0", "M=D"])
+    output_path = self.tmp_path / "Add.hack"
+    self.assertEqual(HackAssambler(asm_path).assemble_streaming(str(output_path)), 6)
+    self.assertFalse(output_path.read_text().endswith("\n"))
+
+
+class TestHackAssamblerInMemory(unittest.TestCase):
+
+  def setUp(self):
+    self.test_folders = Path(__file__).parents[2] / "vm_translator" / "tests" / "test_folders"
+    self.asm_path = self.test_folders / "FibonacciSeries" / "FibonacciSeries.asm"
+
+  def _from_file(self) -> HackAssambler:
+    assambler = HackAssambler(str(self.asm_path))
+    assambler.parse()
+    assambler.compile()
+    return assambler
+
+  def test_generator_gives_the_same_words_as_the_file(self):
+    lines = (line for line in self.asm_path.read_text().splitlines())
+    self.assertEqual(HackAssambler.assemble_lines(lines), self._from_file().file_compiled)
+
+  def test_write_to_streams(self):
+    assambler = HackAssambler(lines=self.asm_path.read_text().splitlines())
+    assambler.parse()
+    assambler.compile()
+    text = io.StringIO()
+    assambler.write(text)
+    binary = io.BytesIO()
+    assambler.write(binary, "bin", "little")
+    self.assertEqual(text.getvalue().split("\n"), [f"{word:016b}" for word in self._from_file().file_compiled])
+    self.assertEqual(binary.getvalue(), HackWriter.to_bytes(assambler.file_compiled, "little"))
+
+  def test_streaming_to_a_stream(self):
+    stream = io.BytesIO()
+    stream.write(b"header")
+    words = HackAssambler(lines=iter(self.asm_path.read_text().splitlines())).assemble_streaming(stream=stream)
+    self.assertEqual(words, len(self._from_file().file_compiled))
+    text = stream.getvalue()[len(b"header"):].decode()
+    self.assertEqual(text.split("\n"), [f"{word:016b}" for word in self._from_file().file_compiled])
+
+  def test_in_memory_program_needs_an_output_path(self):
+    assambler = HackAssambler(lines=["@1", "D=A"])
+    assambler.parse()
+    assambler.compile()
+    with self.assertRaises(ValueError):
+      assambler.store_file()
+
+  def test_chain_vm_translator_and_assambler_in_memory(self):
+    vm_path = self.test_folders / "BasicLoop" / "BasicLoop.vm"
+    translator = VMTranslator(file_name="BasicLoop")
+    words = HackAssambler.assemble_lines(translator.translate(VMParser(vm_path).parse()))
+    cpu = HackCPU(words)
+    for address, value in ((0, 256), (1, 300), (2, 400), (400, 3)):
+      cpu.write_signed(address, value)
+    cpu.run(600)
+    self.assertEqual((cpu.read_signed(0), cpu.read_signed(256)), (257, 6))
+
+
+if __name__ == "__main__":
+  unittest.main()
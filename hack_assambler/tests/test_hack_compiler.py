@@ -0,0 +1,44 @@
+import unittest
+
+from hack_assambler.src.hack_compiler import HackCompiler
+
+
+class TestHackCompiler(unittest.TestCase):
+
+  def setUp(self):
+    self.compiler = HackCompiler()
+
+  def test_a_instruction(self):
+    self.assertEqual(self.compiler.compile("@0"), "0000000000000000")
+    self.assertEqual(self.compiler.compile("@21"), "0000000000010101")
+    self.assertEqual(self.compiler.compile("@32767"), "0111111111111111")
+
+  def test_a_instruction_out_of_range_raises(self):
+    with self.assertRaises(SyntaxError):
+      self.compiler.compile("@32768")
+
+  def test_c_instruction(self):
+    self.assertEqual(self.compiler.compile("D=A"), "1110110000010000")
+    self.assertEqual(self.compiler.compile("M=D+M"), "1111000010001000")
+    self.assertEqual(self.compiler.compile("0;JMP"), "1110101010000111")
+    self.assertEqual(self.compiler.compile("D;JGT"), "1110001100000001")
+    self.assertEqual(self.compiler.compile("AM=M-1"), "1111110010101000")
+
+  def test_dest_aliases_share_the_same_word(self):
+    for spellings in (["MD", "DM"], ["AM", "MA"], ["AD", "DA"], ["ADM", "AMD", "MDA", "DAM", "MAD", "DMA"]):
+      words = {self.compiler.encode(f"{dest}=D+1;JNE") for dest in spellings}
+      self.assertEqual(len(words), 1, spellings)
+
+  def test_encode_returns_integer_word(self):
+    self.assertEqual(self.compiler.encode("D=A"), 0b1110110000010000)
+
+  def test_table_is_built_once_per_process(self):
+    self.assertIs(HackCompiler().c_instruction_table, self.compiler.c_instruction_table)
+
+  def test_invalid_c_instruction_raises(self):
+    with self.assertRaises(SyntaxError):
+      self.compiler.compile("D=X+1")
+
+
+if __name__ == "__main__":
+  unittest.main()
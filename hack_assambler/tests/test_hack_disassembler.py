@@ -0,0 +1,52 @@
+import io
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from hack_assambler.src.hack_assambler import HackAssambler
+from hack_assambler.src.hack_compiler import HackCompiler
+from hack_assambler.src.hack_disassembler import HackDisassembler
+from hack_assambler.src.hack_writer import HackWriter
+
+
+class TestHackDisassembler(unittest.TestCase):
+
+  def setUp(self):
+    self.disassembler = HackDisassembler()
+    self.test_folders = Path(__file__).parents[2] / "vm_translator" / "tests" / "test_folders"
+
+  def test_every_c_instruction_round_trips(self):
+    compiler = HackCompiler()
+    for word in set(compiler.c_instruction_table.values()):
+      self.assertEqual(compiler.encode(self.disassembler.instruction(word)), word)
+
+  def test_a_instruction_and_invalid_words(self):
+    self.assertEqual(self.disassembler.instruction(21), "@21")
+    self.assertEqual(self.disassembler.instruction(0b1110110000010000), "D=A")
+    with self.assertRaises(ValueError):
+      self.disassembler.instruction(0b1000110000010000)
+    with self.assertRaises(ValueError):
+      self.disassembler.instruction(0b1111101010010000)
+
+  def test_labels_are_recovered_from_jumps(self):
+    words = HackAssambler.assemble_lines(["@5", "D=A", "(LOOP)", "D=D-1", "@LOOP", "D;JGT", "@END", "(END)", "0;JMP"])
+    self.assertEqual(list(self.disassembler.disassemble_words(words)), [
+      "@5", "D=A", "(LABEL_2)", "D=D-1", "@LABEL_2", "D;JGT", "@LABEL_6", "(LABEL_6)", "0;JMP",
+    ])
+    self.assertEqual(list(HackDisassembler(recover_labels=False).disassemble_words(words))[3], "@2")
+
+  def test_test_folders_round_trip_through_files(self):
+    with TemporaryDirectory() as tmp_dir:
+      for asm_file in sorted(self.test_folders.glob("*/*.asm")):
+        with self.subTest(asm=asm_file.name):
+          words = HackAssambler.assemble_lines(asm_file.read_text().splitlines())
+          for output_format in ("hack", "bin"):
+            path = Path(tmp_dir) / f"{asm_file.stem}.{output_format}"
+            HackWriter(str(path)).write(words, output_format, "little")
+            output = io.StringIO()
+            self.assertEqual(self.disassembler.disassemble_file(path, output, "little"), len(words))
+            self.assertEqual(HackAssambler.assemble_lines(output.getvalue().splitlines()), words)
+
+
+if __name__ == "__main__":
+  unittest.main()
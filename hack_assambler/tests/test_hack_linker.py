@@ -0,0 +1,97 @@
+import os
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from hack_assambler.src.hack_assambler import HackAssambler
+from hack_assambler.src.hack_linker import HackLinker, assemble_object_file
+from hack_assambler.src.hack_object import ObjectModule
+
+
+def compile_object(lines, name):
+  assambler = HackAssambler(lines=lines)
+  assambler.parse()
+  return assambler.compile_object(name)
+
+
+class TestHackLinker(unittest.TestCase):
+
+  def setUp(self):
+    self.test_folders = Path(__file__).parents[2] / "vm_translator" / "tests" / "test_folders"
+    self.tmp_dir = TemporaryDirectory()
+    self.tmp_path = Path(self.tmp_dir.name)
+
+  def tearDown(self):
+    self.tmp_dir.cleanup()
+
+  def split_at(self, lines, labels):
+    """The lines cut before each of the labels."""
+    modules, current = [], []
+    for line in lines:
+      if line.strip() in labels and current:
+        modules.append(current)
+        current = []
+      current.append(line)
+    modules.append(current)
+    return modules
+
+  def test_linking_modules_gives_the_whole_program(self):
+    for name, labels in [("FibonacciElement", {"(Main.fibonacci)", "(Sys.init)"}),
+                         ("StaticsTest", {"(Class1.set)", "(Class2.set)", "(Sys.init)"})]:
+      with self.subTest(name=name):
+        lines = (self.test_folders / name / f"{name}.asm").read_text().splitlines()
+        parts = self.split_at(lines, labels)
+        self.assertEqual(len(parts), len(labels) + 1)
+        linked = HackLinker([compile_object(part, f"part{i}") for i, part in enumerate(parts)]).link()
+        self.assertEqual(linked, HackAssambler.assemble_lines(lines))
+
+  def test_cross_module_labels_and_variables(self):
+    main = compile_object(["@counter", "M=1", "@FUNCTION", "0;JMP", "(BACK)", "@BACK", "0;JMP"], "main")
+    function = compile_object(["(FUNCTION)", "@total", "M=0", "@counter", "D=M", "@BACK", "0;JMP"], "function")
+    self.assertEqual(main.relocations.tolist(), [4])
+    self.assertEqual(sorted(main.references), ["FUNCTION", "counter"])
+    linker = HackLinker([main, function])
+    words = linker.link()
+    self.assertEqual(linker.labels, {"BACK": 4, "FUNCTION": 6})
+    self.assertEqual(linker.variables, {"counter": 16, "total": 17})
+    self.assertEqual([words[0], words[2], words[4], words[6], words[8], words[10]], [16, 6, 4, 17, 16, 4])
+
+  def test_duplicate_label(self):
+    with self.assertRaises(KeyError):
+      HackLinker([compile_object(["(A)", "@A"], "one"), compile_object(["(A)", "@A"], "two")]).link()
+
+  def test_object_file_round_trip(self):
+    module = compile_object(["@i", "M=0", "(LOOP)", "@LOOP", "0;JMP", "@SCREEN"], "prog")
+    path = self.tmp_path / "prog.hobj"
+    module.write(path)
+    read = ObjectModule.read(path)
+    self.assertEqual((read.name, read.words, read.labels, read.relocations, read.references),
+                     (module.name, module.words, module.labels, module.relocations, module.references))
+
+  def test_unchanged_sources_are_not_reassembled(self):
+    asm_path = self.tmp_path / "Prog.asm"
+    asm_path.write_text("@i\nM=0\n(END)\n@END\n0;JMP\n")
+    _, reused = assemble_object_file(asm_path)
+    self.assertFalse(reused)
+    module, reused = assemble_object_file(asm_path)
+    self.assertTrue(reused)
+    self.assertEqual(module.references, {"i": module.references["i"]})
+    asm_path.write_text("@j\nM=0\n(END)\n@END\n0;JMP\n")
+    module, reused = assemble_object_file(asm_path)
+    self.assertFalse(reused)
+    self.assertIn("j", module.references)
+
+  def test_link_files(self):
+    (self.tmp_path / "A.asm").write_text("@B\n0;JMP\n")
+    (self.tmp_path / "B.asm").write_text("(B)\n@B\n0;JMP\n")
+    paths = [self.tmp_path / "A.asm", self.tmp_path / "B.asm"]
+    first = HackLinker.link_files(paths)
+    second = HackLinker.link_files(paths)
+    self.assertEqual((first.reused, second.reused), (0, 2))
+    self.assertEqual(first.words.tolist(), [2, 0b1110101010000111, 2, 0b1110101010000111])
+    self.assertEqual(second.words, first.words)
+    self.assertTrue(os.path.exists(self.tmp_path / "A.hobj"))
+
+
+if __name__ == "__main__":
+  unittest.main()
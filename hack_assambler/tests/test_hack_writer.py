@@ -0,0 +1,69 @@
+import unittest
+from array import array
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from hack_assambler.src.hack_assambler import HackAssambler
+from hack_assambler.src.hack_writer import HackWriter
+
+
+class TestHackWriter(unittest.TestCase):
+
+  def setUp(self):
+    self.tmp_dir = TemporaryDirectory()
+    self.tmp_path = Path(self.tmp_dir.name)
+    self.words = array('H', [0x0002, 0xEC10, 0x0003, 0xE090, 0x0000, 0xE308])
+
+  def tearDown(self):
+    self.tmp_dir.cleanup()
+
+  def test_text_format(self):
+    path = self.tmp_path / "Add.hack"
+    HackWriter(str(path)).write(self.words, "hack")
+    lines = path.read_text().split("\n")
+    self.assertEqual(lines[0], "0000000000000010")
+    self.assertEqual(lines[1], "1110110000010000")
+    self.assertEqual(len(lines), 6)
+
+  def test_binary_big_and_little_endian(self):
+    big = self.tmp_path / "big.bin"
+    little = self.tmp_path / "little.bin"
+    HackWriter(str(big)).write(self.words, "bin", "big")
+    HackWriter(str(little)).write(self.words, "bin", "little")
+    self.assertEqual(big.read_bytes()[:4], bytes([0x00, 0x02, 0xEC, 0x10]))
+    self.assertEqual(little.read_bytes()[:4], bytes([0x02, 0x00, 0x10, 0xEC]))
+    self.assertEqual(len(big.read_bytes()), 2 * len(self.words))
+
+  def test_to_bytes_does_not_modify_words(self):
+    HackWriter.to_bytes(self.words, "little")
+    HackWriter.to_bytes(self.words, "big")
+    self.assertEqual(self.words[1], 0xEC10)
+
+  def test_intel_hex(self):
+    path = self.tmp_path / "Add.hex"
+    HackWriter(str(path)).write(self.words, "hex")
+    records = path.read_text().splitlines()
+    self.assertEqual(records[0], ":0C0000000002EC100003E0900000E308" + records[0][-2:])
+    self.assertEqual(records[-1], ":00000001FF")
+    for record in records:
+      self.assertEqual(sum(bytes.fromhex(record[1:])) & 0xFF, 0)
+
+  def test_unknown_format_raises(self):
+    with self.assertRaises(ValueError):
+      HackWriter(str(self.tmp_path / "x")).write(self.words, "elf")
+
+  def test_assambler_stores_every_format(self):
+    asm_path = self.tmp_path / "Add.asm"
+    asm_path.write_text("@2\nD=A\n@3\nD=D+A\n@0\nM=D")
+    assambler = HackAssambler(str(asm_path))
+    assambler.parse()
+    assambler.compile()
+    self.assertEqual(assambler.file_compiled, self.words)
+    self.assertEqual(assambler.store_file(), str(self.tmp_path / "Add.hack"))
+    self.assertEqual(assambler.store_file("bin"), str(self.tmp_path / "Add.bin"))
+    self.assertEqual(assambler.store_file("hex"), str(self.tmp_path / "Add.hex"))
+    self.assertEqual((self.tmp_path / "Add.bin").read_bytes(), HackWriter.to_bytes(self.words, "big"))
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+from hack_assambler.src.peephole_optimizer import PeepholeOptimizer
+
+
+class TestPeepholeOptimizer(unittest.TestCase):
+
+  def setUp(self):
+    self.optimizer = PeepholeOptimizer()
+
+  def test_push_followed_by_pop_of_sp_cancels(self):
+    optimized = self.optimizer.optimize(["@SP", "M=M+1", "@SP", "M=M-1", "@LCL", "D=M"])
+    self.assertEqual(optimized, ["@LCL", "D=M"])
+    self.assertEqual(self.optimizer.removed["cancel"], 2)
+    self.assertEqual(self.optimizer.removed["known_a"], 1)
+    self.assertEqual(self.optimizer.removed["dead_a"], 1)
+    self.assertEqual(self.optimizer.total_removed, 4)
+
+  def test_repeated_a_instruction(self):
+    self.assertEqual(self.optimizer.optimize(["@X", "@X", "D=M"]), ["@X", "D=M"])
+
+  def test_dead_a_instruction(self):
+    self.assertEqual(self.optimizer.optimize(["@X", "@Y", "D=M"]), ["@Y", "D=M"])
+
+  def test_known_a_is_forgotten_when_a_changes(self):
+    instructions = ["@SP", "A=M", "M=D", "@SP", "M=M+1"]
+    self.assertEqual(self.optimizer.optimize(instructions), instructions)
+
+  def test_known_a_is_kept_over_jumps_and_memory_writes(self):
+    optimized = self.optimizer.optimize(["@R13", "M=D", "D;JEQ", "@R13", "D=M"])
+    self.assertEqual(optimized, ["@R13", "M=D", "D;JEQ", "D=M"])
+
+  def test_overwritten_d(self):
+    self.assertEqual(self.optimizer.optimize(["@X", "D=M", "D=A"]), ["@X", "D=A"])
+    self.assertEqual(self.optimizer.optimize(["@X", "D=M", "D=D+A"]), ["@X", "D=M", "D=D+A"])
+    self.assertEqual(self.optimizer.optimize(["@X", "D=M", "D;JEQ", "D=A"]), ["@X", "D=M", "D;JEQ", "D=A"])
+
+  def test_no_ops(self):
+    self.assertEqual(self.optimizer.optimize(["@X", "M=M", "D", "D=D", "0;JMP"]), ["@X", "0;JMP"])
+
+  def test_rules_never_cross_labels(self):
+    instructions = ["@SP", "M=M+1", "(LOOP)", "@SP", "M=M-1", "@LOOP", "(END)", "@END", "0;JMP"]
+    self.assertEqual(self.optimizer.optimize(instructions), instructions)
+    self.assertEqual(self.optimizer.total_removed, 0)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from hack_assambler.src.hack_assambler import HackAssambler
+from hack_assambler.src.source_map import SourceMap
+
+
+class TestSourceMap(unittest.TestCase):
+
+  def setUp(self):
+    self.tmp_dir = TemporaryDirectory()
+    self.asm_path = Path(self.tmp_dir.name) / "Prog.asm"
+    self.asm_path.write_text("\n".join([
+      "// counts down",   # 1
+      "@10",              # 2
+      "D=A",              # 3
+      "@i",               # 4
+      "M=D",              # 5
+      "",                 # 6
+      "(LOOP)",           # 7
+      "@i",               # 8
+      "MD=M-1",           # 9
+      "@LOOP",            # 10
+      "D;JGT",            # 11
+      "(END)",            # 12
+      "@END",             # 13
+      "0;JMP",            # 14
+    ]))
+
+  def tearDown(self):
+    self.tmp_dir.cleanup()
+
+  def _compile(self, optimize: bool = False) -> HackAssambler:
+    assambler = HackAssambler(str(self.asm_path), optimize=optimize)
+    assambler.parse()
+    assambler.compile()
+    return assambler
+
+  def test_addresses_map_to_source_lines_and_labels(self):
+    source_map = self._compile().get_source_map()
+    self.assertEqual(list(source_map.line_numbers), [2, 3, 4, 5, 8, 9, 10, 11, 13, 14])
+    self.assertEqual(source_map.instructions[4], "@i")
+    self.assertEqual(source_map.labels, {"LOOP": 4, "END": 8})
+    self.assertEqual(source_map.variables, {"i": 16})
+    self.assertIsNone(source_map.enclosing_label(3))
+    self.assertEqual(source_map.enclosing_label(4), "LOOP")
+    self.assertEqual(source_map.enclosing_label(7), "LOOP")
+    self.assertEqual(source_map.enclosing_label(9), "END")
+
+  def test_store_and_read(self):
+    assambler = self._compile()
+    output_path = assambler.store_source_map()
+    self.assertEqual(output_path, str(self.asm_path.with_suffix(".lst")))
+    source_map = SourceMap.read(output_path)
+    self.assertEqual(source_map.source_path, str(self.asm_path))
+    self.assertEqual(list(source_map.line_numbers), list(assambler.rom_line_numbers))
+    self.assertEqual(source_map.instructions, assambler.file_parsed_cleaned)
+    self.assertEqual(source_map.labels, assambler.labels)
+    self.assertEqual(source_map.variables, assambler.variables)
+
+  def test_line_numbers_follow_the_optimizer(self):
+    self.asm_path.write_text("@SP\nM=M+1\n@SP\nM=M-1\n@5\nD=A\n")
+    source_map = self._compile(optimize=True).get_source_map()
+    self.assertEqual(list(source_map.line_numbers), [5, 6])
+
+  def test_not_compiled_raises(self):
+    with self.assertRaises(NameError):
+      HackAssambler(str(self.asm_path)).get_source_map()
+
+
+if __name__ == "__main__":
+  unittest.main()
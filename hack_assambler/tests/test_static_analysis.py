@@ -0,0 +1,79 @@
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from hack_assambler.src.hack_assambler import HackAssambler
+from hack_assambler.src.static_analysis import StaticAnalysis
+from vm_translator.src.labels import report_labels
+
+# a nested loop, a call to a routine that returns through R15, and the final loop
+PROGRAM = [
+  "@2", "D=A", "@i", "M=D",            # 0-3
+  "(OUTER)",
+  "@3", "D=A", "@j", "M=D",            # 4-7
+  "(INNER)",
+  "@j", "MD=M-1",                      # 8-9
+  "@INNER", "D;JGT",                   # 10-11
+  "@i", "MD=M-1",                      # 12-13
+  "@OUTER", "D;JGT",                   # 14-15
+  "@BACK", "D=A", "@R15", "M=D",       # 16-19
+  "@ROUTINE", "0;JMP",                 # 20-21
+  "(BACK)",
+  "(END)",
+  "@END", "0;JMP",                     # 22-23
+  "(ROUTINE)",
+  "@R15", "A=M", "0;JMP",              # 24-26
+]
+
+
+class TestStaticAnalysis(unittest.TestCase):
+
+  def setUp(self):
+    assambler = HackAssambler(lines=PROGRAM)
+    assambler.parse()
+    assambler.compile()
+    self.words = assambler.file_compiled
+    self.analysis = StaticAnalysis(self.words, assambler.labels)
+
+  def test_back_edges_and_nesting(self):
+    self.assertEqual(self.analysis.back_edges, [(11, 8), (15, 4), (23, 22)])
+    self.assertEqual(list(self.analysis.depth[:16]), [0] * 4 + [1] * 4 + [2] * 4 + [1] * 4)
+
+  def test_calls_are_stepped_over(self):
+    self.assertEqual(self.analysis.calls, {21: 24})
+    self.assertEqual(self.analysis.function_labels(), {"ROUTINE": 24})
+    stats = {label_stats.label: label_stats for label_stats in self.analysis.stats()}
+    self.assertEqual(set(stats), {None, "ROUTINE"})
+    # straight through both loops and the call, up to the final loop
+    self.assertEqual(stats[None].straight_line_cycles, 24)
+    self.assertEqual((stats[None].words, stats[None].loops, stats[None].max_depth), (24, 3, 2))
+    self.assertEqual((stats["ROUTINE"].words, stats["ROUTINE"].straight_line_cycles), (3, 3))
+
+  def test_stats_by_label(self):
+    stats = {label_stats.label: label_stats for label_stats in self.analysis.stats(by_function=False)}
+    # INNER runs up to the next label, BACK
+    self.assertEqual((stats["INNER"].words, stats["INNER"].loops, stats["INNER"].max_depth), (14, 2, 2))
+    self.assertEqual((stats["OUTER"].words, stats["OUTER"].loops, stats["OUTER"].max_depth), (4, 0, 1))
+
+  def test_hack_file_gives_the_same_functions(self):
+    with TemporaryDirectory() as directory:
+      path = Path(directory) / "Program.hack"
+      path.write_text("\n".join(f"{word:016b}" for word in self.words))
+      analysis = StaticAnalysis.from_file(path)
+    self.assertEqual(analysis.back_edges, self.analysis.back_edges)
+    self.assertEqual(analysis.function_labels(), {"LABEL_24": 24})
+
+  def test_vm_functions(self):
+    asm_path = Path(__file__).parents[2] / "vm_translator" / "tests" / "test_folders" / "FibonacciElement" / "FibonacciElement.asm"
+    analysis = StaticAnalysis.from_file(asm_path, group_labels=report_labels)
+    stats = analysis.stats()
+    self.assertEqual([label_stats.label for label_stats in stats], [None, "Main.fibonacci", "Sys.init"])
+    self.assertEqual(sum(label_stats.words for label_stats in stats), len(analysis.words))
+    # the recursive calls are not loops, the 'while' of Sys.init is
+    self.assertEqual(len(analysis.back_edges), 1)
+    self.assertGreaterEqual(analysis.back_edges[0][1], stats[2].start)
+    self.assertIn("Main.fibonacci", analysis.report(top=1))
+
+
+if __name__ == "__main__":
+  unittest.main()
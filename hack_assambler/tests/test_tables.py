@@ -0,0 +1,71 @@
+import importlib
+import os
+import sys
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from hack_assambler.src import tables
+from hack_assambler.src.symbol_table import SymbolTable
+
+
+class TestTables(unittest.TestCase):
+
+  def test_tables_are_integer_valued_and_read_only(self):
+    self.assertEqual(tables.control_tables()["comp"]["D+1"], 0b0011111)
+    self.assertEqual(tables.control_tables()["dest"]["MD"], 0b011)
+    self.assertEqual(tables.default_symbols()["SCREEN"], 16384)
+    with self.assertRaises(TypeError):
+      tables.default_symbols()["SCREEN"] = 0
+    with self.assertRaises(TypeError):
+      tables.control_tables()["jump"]["JMP"] = 0
+
+  def test_tables_are_loaded_once(self):
+    self.assertIs(tables.control_tables(), tables.control_tables())
+    self.assertIs(tables.default_symbols(), tables.default_symbols())
+
+  def test_prebuilt_module_matches_toml(self):
+    with TemporaryDirectory() as tmp_dir:
+      output_path = os.path.join(tmp_dir, "prebuilt_tables.py")
+      tables.generate_prebuilt_module(output_path)
+      sys.path.insert(0, tmp_dir)
+      try:
+        prebuilt = importlib.import_module("prebuilt_tables")
+      finally:
+        sys.path.remove(tmp_dir)
+        sys.modules.pop("prebuilt_tables", None)
+    self.assertEqual((prebuilt.CONTROL_TABLES, prebuilt.DEFAULT_SYMBOLS), tables._load_toml())
+    self.assertEqual(prebuilt.SOURCE_HASH, tables._source_hash())
+
+  def test_stale_prebuilt_module_is_ignored(self):
+    stale = mock.Mock(SOURCE_HASH="outdated", CONTROL_TABLES={}, DEFAULT_SYMBOLS={})
+    with mock.patch.dict(sys.modules, {"hack_assambler.src.config.prebuilt_tables": stale}):
+      self.assertIsNone(tables._load_prebuilt())
+
+
+class TestSymbolTable(unittest.TestCase):
+
+  def test_defaults(self):
+    table = SymbolTable()
+    self.assertEqual(table.get_symbol_value("R0"), 0)
+    self.assertEqual(table.get_symbol_value("KBD"), 24576)
+    self.assertIsNone(table.get_symbol_value("LOOP"))
+
+  def test_symbols_do_not_leak_between_tables(self):
+    first = SymbolTable()
+    first.add_symbol("LOOP", 10)
+    self.assertEqual(first.get_symbol_value("LOOP"), 10)
+    self.assertIsNone(SymbolTable().get_symbol_value("LOOP"))
+    self.assertNotIn("LOOP", tables.default_symbols())
+
+  def test_add_existing_symbol_raises(self):
+    table = SymbolTable()
+    with self.assertRaises(KeyError):
+      table.add_symbol("SP", 5)
+    table.add_symbol("LOOP", 1)
+    with self.assertRaises(KeyError):
+      table.add_symbol("LOOP", 2)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Hack Emulator - Runs Hack machine code or CPU emulator test scripts (.tst) headlessly
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from hack_assambler.src.source_map import SourceMap
+from hack_emulator.src.framebuffer import FrameRecorder
+from hack_emulator.src.hack_cpu import HackCPU
+from hack_emulator.src.keyboard_trace import KeyboardTrace
+from hack_emulator.src.snapshot import Snapshot
+from hack_emulator.src.tst_runner import run_scripts
+from vm_translator.src.labels import report_labels
+
+
+def parse_range(value: str) -> range:
+  start, _, end = value.partition("-")
+  return range(int(start), int(end or start) + 1)
+
+
+def main():
+  """Main entry point for the Hack emulator"""
+  parser = argparse.ArgumentParser(
+    description="Run a Hack program (.hack text or packed .bin words) or CPU emulator test scripts"
+  )
+
+  parser.add_argument(
+    "input",
+    type=str,
+    help="Input .hack or .bin file, .tst script, or directory searched recursively for .tst scripts",
+  )
+
+  parser.add_argument(
+    "-j",
+    "--jobs",
+    type=int,
+    help="Number of worker processes used to run test scripts (default: one per CPU)",
+    default=None,
+  )
+
+  parser.add_argument(
+    "--write-output",
+    action="store_true",
+    help="Write the output-file of every test script",
+  )
+
+  parser.add_argument(
+    "-c",
+    "--cycles",
+    type=int,
+    help="Maximum number of instructions to execute (default: until the program halts)",
+    default=None,
+  )
+
+  parser.add_argument(
+    "--byteorder",
+    type=str,
+    choices=["big", "little"],
+    help="Byte order of .bin files (default: big)",
+    default="big",
+  )
+
+  parser.add_argument(
+    "--compiled",
+    action="store_true",
+    help="Translate the program into Python functions block by block instead of interpreting it",
+  )
+
+  parser.add_argument(
+    "--profile",
+    action="store_true",
+    help="Count executions per address and jump and print the hot spots (runs in the interpreter)",
+  )
+
+  parser.add_argument(
+    "--memory",
+    action="store_true",
+    help="Count RAM reads and writes by region (pointers, temp, static, stack, heap, screen...) "
+         "and print them per function (runs in the interpreter)",
+  )
+
+  parser.add_argument(
+    "--listing",
+    type=str,
+    help="Listing (.lst) written by the assembler, used to report hot spots by label "
+         "(default: the input file with a .lst extension, if it exists)",
+    default=None,
+  )
+
+  parser.add_argument(
+    "--top",
+    type=int,
+    help="Number of entries of each profile table (default: 10)",
+    default=10,
+  )
+
+  parser.add_argument(
+    "--restore",
+    type=str,
+    help="Snapshot to restore before running, written by --save-snapshot with the same program",
+    default=None,
+  )
+
+  parser.add_argument(
+    "--save-snapshot",
+    type=str,
+    help="Write a snapshot of the machine (PC, A, D, RAM) after the run",
+    default=None,
+  )
+
+  parser.add_argument(
+    "--replay-keys",
+    type=str,
+    help="Keyboard trace to replay: every key is written to RAM[24576] at its recorded cycle",
+    default=None,
+  )
+
+  parser.add_argument(
+    "--frames",
+    type=str,
+    help="Directory where a frame of the screen is exported every --frame-cycles cycles, "
+         "only when the screen changed",
+    default=None,
+  )
+
+  parser.add_argument(
+    "--frame-format",
+    type=str,
+    choices=FrameRecorder.FORMATS,
+    help="Format of the frames: a PBM image per frame or the changed rows of every frame, "
+         "one byte per pixel, in a single frames.raw file (default: pbm)",
+    default="pbm",
+  )
+
+  parser.add_argument(
+    "--frame-cycles",
+    type=int,
+    help="Cycles between two frames (default: 50000)",
+    default=50000,
+  )
+
+  parser.add_argument(
+    "--dump",
+    type=parse_range,
+    help="RAM range to print after the run, e.g. 0-15",
+    default=range(0, 16),
+  )
+
+  args = parser.parse_args()
+
+  input_path = Path(args.input)
+  if not input_path.exists():
+    print(f"Error: Input path '{args.input}' does not exist", file=sys.stderr)
+    sys.exit(1)
+
+  if input_path.is_dir() or input_path.suffix == ".tst":
+    run_test_scripts(input_path, args)
+    return
+
+  cpu = HackCPU.from_file(input_path, args.byteorder, compiled=args.compiled)
+  if args.profile:
+    cpu.enable_profiling()
+  if args.memory:
+    cpu.enable_memory_counters()
+  try:
+    if args.restore:
+      cpu.restore(Snapshot.load(args.restore))
+  except (OSError, ValueError) as e:
+    print(f"Error: Cannot restore '{args.restore}': {e}", file=sys.stderr)
+    sys.exit(1)
+  keyboard_trace = KeyboardTrace.load(args.replay_keys) if args.replay_keys else None
+  start = time.perf_counter()
+  if args.frames:
+    recorder = FrameRecorder(cpu, args.frames, args.frame_format)
+    cycles = recorder.record(args.cycles, args.frame_cycles, keyboard_trace)
+    print(f"{recorder.frames_written} frames written, {recorder.frames_skipped} unchanged frames skipped")
+  elif keyboard_trace is not None:
+    until_cycle = None if args.cycles is None else cpu.cycles + args.cycles
+    cycles = keyboard_trace.replay(cpu, until_cycle)
+  else:
+    cycles = cpu.run(args.cycles)
+  elapsed = time.perf_counter() - start
+
+  for address in args.dump:
+    print(f"RAM[{address}] = {cpu.read_signed(address)}")
+  status = "halted" if cpu.halted else f"stopped at PC={cpu.pc}"
+  if args.profile or args.memory:
+    print_profile(cpu, Path(args.listing) if args.listing else input_path.with_suffix(".lst"), args.top)
+  print(f"{cycles} cycles in {elapsed:.3f}s ({cycles / (elapsed or float('inf')) / 1e6:.2f} MIPS), {status}")
+  if args.save_snapshot:
+    cpu.snapshot().save(args.save_snapshot)
+
+
+def print_profile(cpu: HackCPU, listing_path: Path, top: int):
+  labels, instructions = None, None
+  if listing_path.exists():
+    source_map = SourceMap.read(str(listing_path))
+    # the functions for VMTranslator output, otherwise the labels written in the source
+    labels, instructions = report_labels(source_map.labels), source_map.instructions
+  if cpu.profiler is not None:
+    print(cpu.profiler.report(labels, instructions, top))
+  if cpu.memory_counters is not None:
+    print(cpu.memory_counters.report(labels, top))
+
+
+def run_test_scripts(input_path: Path, args):
+  if input_path.is_dir():
+    # *VME.tst scripts are meant for the VM emulator
+    scripts = sorted(path for path in input_path.rglob("*.tst") if not path.stem.endswith("VME"))
+  else:
+    scripts = [input_path]
+
+  start = time.perf_counter()
+  results = run_scripts(scripts, args.jobs, args.compiled, args.write_output)
+  elapsed = time.perf_counter() - start
+
+  for result in results:
+    status = "PASS" if result.passed else f"FAIL {result.error}"
+    print(f"{result.script_path}: {status} ({result.cycles} cycles, {result.elapsed:.3f}s)")
+  failed = sum(1 for result in results if not result.passed)
+  print(f"{len(results) - failed}/{len(results)} scripts passed in {elapsed:.3f}s")
+  if failed:
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,170 @@
+from typing import Iterable, Optional
+
+try:
+  import numpy as np
+except ImportError:
+  np = None
+
+from hack_emulator.src.hack_cpu import HackCPU
+
+
+class BatchHackCPU:
+  """
+  N Hack computers running the same ROM in lockstep, e.g. to fuzz a program with many inputs at once.
+  A, D and PC are arrays of N values and the RAM is an N x 32K matrix; every step executes one
+  instruction on every running instance with vectorized operations, so the Python overhead is paid
+  once per step instead of once per machine.
+
+  Instances may diverge: each one fetches the instruction at its own PC, and the ALU is evaluated from
+  the control bits of the instruction of each instance. While all instances share the same PC (the
+  usual case with data independent control flow) the step only decodes that one instruction. Instances
+  that halt (see HackCPU.run) or leave the program are masked out of the following steps.
+
+  Needs numpy.
+  """
+  ROM_SIZE = HackCPU.ROM_SIZE
+  RAM_SIZE = HackCPU.RAM_SIZE
+  SCREEN = HackCPU.SCREEN
+  KBD = HackCPU.KBD
+
+  def __init__(self, rom: Iterable[int], instances: int):
+    if np is None:
+      raise ImportError("BatchHackCPU needs numpy, install it with 'pip install numpy'")
+    if instances < 1:
+      raise ValueError(f"At least one instance is needed, got {instances}")
+    # HackCPU validates every word and finds the halt loops
+    cpu = HackCPU(rom)
+    self.instances = instances
+    self.rom = cpu.rom
+    self._decode(np.array(cpu.rom, dtype=np.uint16), cpu.halt_addresses)
+    self.ram = np.zeros((instances, self.RAM_SIZE), dtype=np.uint16)
+    self.a = np.zeros(instances, dtype=np.uint16)
+    self.d = np.zeros(instances, dtype=np.uint16)
+    self.pc = np.zeros(instances, dtype=np.int64)
+    self.cycles = np.zeros(instances, dtype=np.int64)
+    self.halted = np.zeros(instances, dtype=bool)
+    self._rows = np.arange(instances)
+
+  @classmethod
+  def from_file(cls, path, instances: int, byteorder: str = "big") -> "BatchHackCPU":
+    return cls(HackCPU.read_rom(path, byteorder), instances)
+
+  def _decode(self, words, halt_addresses: set):
+    """One array per instruction field, indexed by ROM address. Masks are 0 or 0xFFFF."""
+    def mask(bit):
+      return np.where((words >> bit) & 1 == 1, np.uint16(0xFFFF), np.uint16(0))
+
+    self.words = words
+    self.is_c = (words & 0x8000) != 0
+    self.use_m = self.is_c & ((words & 0x1000) != 0)
+    # the zero bits keep the input when they are not set
+    self.keep_x = ~mask(11)
+    self.not_x = mask(10)
+    self.keep_y = ~mask(9)
+    self.not_y = mask(8)
+    self.add = ((words >> 7) & 1) == 1
+    self.not_out = mask(6)
+    self.dest_a = self.is_c & ((words & 0x20) != 0)
+    self.dest_d = self.is_c & ((words & 0x10) != 0)
+    self.dest_m = self.is_c & ((words & 0x08) != 0)
+    self.jump_lt = self.is_c & ((words & 0x4) != 0)
+    self.jump_eq = self.is_c & ((words & 0x2) != 0)
+    self.jump_gt = self.is_c & ((words & 0x1) != 0)
+    self.is_halt = np.zeros(len(words), dtype=bool)
+    self.is_halt[sorted(halt_addresses)] = True
+
+  def reset(self):
+    self.a[:] = 0
+    self.d[:] = 0
+    self.pc[:] = 0
+    self.cycles[:] = 0
+    self.halted[:] = False
+
+  @property
+  def running(self):
+    """Mask of the instances that still execute instructions."""
+    return ~self.halted & (self.pc < len(self.rom))
+
+  def step(self) -> int:
+    """Execute one instruction on every running instance. Returns how many instances ran."""
+    running = self.running
+    count = int(np.count_nonzero(running))
+    if not count:
+      return 0
+    rows = self._rows if count == self.instances else np.flatnonzero(running)
+    pc = self.pc[rows]
+    if pc.min() == pc.max():
+      self._step_lockstep(rows, int(pc[0]))
+    else:
+      self._step_divergent(rows, pc)
+    self.cycles[rows] += 1
+    return count
+
+  def run(self, max_cycles: Optional[int] = None) -> int:
+    """Step until every instance stopped or after max_cycles steps. Returns the number of steps."""
+    steps = 0
+    while (max_cycles is None or steps < max_cycles) and self.step():
+      steps += 1
+    return steps
+
+  def _step_lockstep(self, rows, pc: int):
+    if not self.is_c[pc]:
+      self.a[rows] = self.rom[pc]
+      self.pc[rows] = pc + 1
+      return
+    a = self.a[rows]
+    if self.use_m[pc]:
+      self._check_addresses(a, pc)
+      y = self.ram[rows, a]
+    else:
+      y = a
+    x = (self.d[rows] & self.keep_x[pc]) ^ self.not_x[pc]
+    y = (y & self.keep_y[pc]) ^ self.not_y[pc]
+    out = ((x + y) if self.add[pc] else (x & y)) ^ self.not_out[pc]
+    if self.dest_m[pc]:
+      self._check_addresses(a, pc)
+      self.ram[rows, a] = out
+    if self.dest_d[pc]:
+      self.d[rows] = out
+    if self.dest_a[pc]:
+      self.a[rows] = out
+    taken = self._jump_taken(out, pc)
+    self.pc[rows] = np.where(taken, a, pc + 1)
+    if self.is_halt[pc]:
+      self.halted[rows] |= taken
+
+  def _step_divergent(self, rows, pc):
+    is_c = self.is_c[pc]
+    a = self.a[rows]
+    use_m = self.use_m[pc]
+    if use_m.any():
+      self._check_addresses(a[use_m], pc[use_m])
+    # rows that do not read M read any valid cell, their y is replaced by A
+    y = np.where(use_m, self.ram[rows, np.where(use_m, a, 0)], a)
+    x = (self.d[rows] & self.keep_x[pc]) ^ self.not_x[pc]
+    y = (y & self.keep_y[pc]) ^ self.not_y[pc]
+    out = np.where(self.add[pc], x + y, x & y) ^ self.not_out[pc]
+    dest_m = self.dest_m[pc]
+    if dest_m.any():
+      self._check_addresses(a[dest_m], pc[dest_m])
+      self.ram[rows[dest_m], a[dest_m]] = out[dest_m]
+    self.d[rows] = np.where(self.dest_d[pc], out, self.d[rows])
+    self.a[rows] = np.where(self.dest_a[pc], out, np.where(is_c, a, self.words[pc]))
+    taken = self._jump_taken(out, pc)
+    self.pc[rows] = np.where(taken, a, pc + 1)
+    self.halted[rows] |= taken & self.is_halt[pc]
+
+  def _jump_taken(self, out, pc):
+    negative = out >= 0x8000
+    zero = out == 0
+    return (self.jump_lt[pc] & negative) | (self.jump_eq[pc] & zero) | (self.jump_gt[pc] & ~negative & ~zero)
+
+  def _check_addresses(self, addresses, pc):
+    invalid = np.flatnonzero(addresses >= self.RAM_SIZE)
+    if invalid.size:
+      pc = pc if np.isscalar(pc) else pc[invalid[0]]
+      raise RuntimeError(f"Invalid memory access at ROM[{pc}]: RAM[{addresses[invalid[0]]}] does not exist")
+
+  def read_signed(self, address: int):
+    """RAM[address] of every instance as signed values."""
+    return self.ram[:, address].view(np.int16)
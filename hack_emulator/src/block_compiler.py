@@ -0,0 +1,130 @@
+from array import array
+from typing import Callable, List, Tuple
+
+from hack_emulator.src.decoder import ALU_FUNCTIONS, JUMP_ALWAYS, SIGN_BIT
+
+# Python expression of the documented ALU functions, x is always D and y is A or M
+_ALU_EXPRESSIONS = {
+  0b101010: "0",
+  0b111111: "1",
+  0b111010: "65535",
+  0b001100: "d",
+  0b110000: "{y}",
+  0b001101: "d ^ 65535",
+  0b110001: "{y} ^ 65535",
+  0b001111: "-d & 65535",
+  0b110011: "-{y} & 65535",
+  0b011111: "(d + 1) & 65535",
+  0b110111: "({y} + 1) & 65535",
+  0b001110: "(d - 1) & 65535",
+  0b110010: "({y} - 1) & 65535",
+  0b000010: "(d + {y}) & 65535",
+  0b010011: "(d - {y}) & 65535",
+  0b000111: "({y} - d) & 65535",
+  0b000000: "d & {y}",
+  0b010101: "d | {y}",
+}
+
+# Python condition of each jump, evaluated on the ALU output t
+_JUMP_CONDITIONS = {
+  0b001: "0 < t < 32768",
+  0b010: "t == 0",
+  0b011: "t < 32768",
+  0b100: "t >= 32768",
+  0b101: "t != 0",
+  0b110: "t == 0 or t >= 32768",
+}
+
+
+class CompiledBlock:
+  """
+  A run of instructions translated into a single Python function. length is the number of
+  instructions when execution runs through the whole block, conditional jumps may leave it earlier.
+  """
+
+  def __init__(self, start: int, length: int, function: Callable, ends_in_halt: bool, source: str):
+    self.start = start
+    self.length = length
+    self.function = function
+    self.ends_in_halt = ends_in_halt
+    self.source = source
+
+
+class BlockCompiler:
+  """
+  Translates basic blocks of a Hack ROM into Python functions, once per block. A block starts at the
+  address execution enters it (a jump target) and runs until an unconditional jump or the end of the
+  ROM. Conditional jumps inside the block return early when taken, not taken ones fall through to the
+  next instruction without going back to the dispatch loop. The generated function keeps A and D in
+  locals and returns the next pc, A, D and the number of instructions executed:
+
+    def block(ram, a, d):
+      ...
+      if t == 0:
+        return target, a, d, 4
+      ...
+      return next_pc, a, d, 12
+  """
+
+  def __init__(self, rom: array, halt_addresses: set):
+    self.rom = rom
+    self.halt_addresses = halt_addresses
+
+  def compile(self, start: int) -> CompiledBlock:
+    lines: List[str] = []
+    address = start
+    end_expression = None
+    while address < len(self.rom):
+      word = self.rom[address]
+      address += 1
+      if not word & SIGN_BIT:
+        lines.append(f"a = {word}")
+        continue
+      instruction_lines, end_expression = self._c_instruction_source(word, address - start)
+      lines.extend(instruction_lines)
+      if end_expression is not None:
+        break
+
+    if end_expression is None:
+      end_expression = str(address)
+    lines.append(f"return {end_expression}, a, d, {address - start}")
+    source = f"def block_{start}(ram, a, d):\n" + "".join(f"  {line}\n" for line in lines)
+    namespace = {"ALU_FUNCTIONS": ALU_FUNCTIONS}
+    exec(compile(source, f"<hack block {start}>", "exec"), namespace)
+    ends_in_halt = (address - 1) in self.halt_addresses
+    return CompiledBlock(start, address - start, namespace[f"block_{start}"], ends_in_halt, source)
+
+  @staticmethod
+  def _c_instruction_source(word: int, cycles: int) -> Tuple[List[str], object]:
+    """
+    Source lines of a C-instruction, cycles being the number of instructions executed in the block up
+    to this one included. For unconditional jumps, also returns the expression of the next pc.
+    """
+    y = "ram[a]" if word & 0x1000 else "a"
+    control_bits = (word >> 6) & 0b111111
+    dest = (word >> 3) & 0b111
+    jump = word & 0b111
+
+    expression = _ALU_EXPRESSIONS.get(control_bits)
+    expression = expression.format(y=y) if expression else f"ALU_FUNCTIONS[{control_bits}](d, {y})"
+
+    # M is written before A changes, the value is only kept in t when it is used more than once
+    registers = [register for bit, register in ((0b001, "ram[a]"), (0b010, "d"), (0b100, "a")) if dest & bit]
+    lines = []
+    if jump and dest & 0b100:
+      # the jump goes to the A register before this instruction updates it
+      lines.append("target = a")
+    if len(registers) == 1 and not jump:
+      lines.append(f"{registers[0]} = {expression}")
+    elif registers or jump != JUMP_ALWAYS:
+      lines.append(f"t = {expression}")
+      lines.extend(f"{register} = t" for register in registers)
+
+    if not jump:
+      return lines, None
+    target = "target" if dest & 0b100 else "a"
+    if jump == JUMP_ALWAYS:
+      return lines, target
+    lines.append(f"if {_JUMP_CONDITIONS[jump]}:")
+    lines.append(f"  return {target}, a, d, {cycles}")
+    return lines, None
@@ -0,0 +1,83 @@
+"""
+Decoding of Hack machine words into tuples that the emulator can execute without looking at bits.
+
+A decoded instruction is a tuple (alu, operand, dest, jump):
+  - A-instruction: (None, value, 0, None)
+  - C-instruction: (alu function, True if the y input is M else False, dest bits, jump condition or None)
+The alu function takes (x, y) = (D, A or M) as unsigned 16 bit integers and returns the unsigned 16 bit
+output. A jump condition is a tuple of 3 booleans indexed by the sign of the output: 0 zero, 1 positive,
+2 negative (see sign_index).
+"""
+from typing import Callable, Optional, Tuple
+
+MASK = 0xFFFF
+SIGN_BIT = 0x8000
+
+DEST_M = 0b001
+DEST_D = 0b010
+DEST_A = 0b100
+
+JUMP_ALWAYS = 0b111
+
+# The 18 functions documented in the Hack specification, keyed by their zx nx zy ny f no bits.
+_DOCUMENTED_FUNCTIONS = {
+  0b101010: lambda x, y: 0,
+  0b111111: lambda x, y: 1,
+  0b111010: lambda x, y: MASK,
+  0b001100: lambda x, y: x,
+  0b110000: lambda x, y: y,
+  0b001101: lambda x, y: x ^ MASK,
+  0b110001: lambda x, y: y ^ MASK,
+  0b001111: lambda x, y: -x & MASK,
+  0b110011: lambda x, y: -y & MASK,
+  0b011111: lambda x, y: (x + 1) & MASK,
+  0b110111: lambda x, y: (y + 1) & MASK,
+  0b001110: lambda x, y: (x - 1) & MASK,
+  0b110010: lambda x, y: (y - 1) & MASK,
+  0b000010: lambda x, y: (x + y) & MASK,
+  0b010011: lambda x, y: (x - y) & MASK,
+  0b000111: lambda x, y: (y - x) & MASK,
+  0b000000: lambda x, y: x & y,
+  0b010101: lambda x, y: x | y,
+}
+
+
+def alu_from_control_bits(control_bits: int) -> Callable[[int, int], int]:
+  """Generic ALU as described by the hardware: zero/negate x, zero/negate y, add or and, negate out."""
+  zx, nx, zy, ny, f, no = ((control_bits >> shift) & 1 for shift in range(5, -1, -1))
+
+  def alu(x: int, y: int) -> int:
+    if zx:
+      x = 0
+    if nx:
+      x ^= MASK
+    if zy:
+      y = 0
+    if ny:
+      y ^= MASK
+    out = (x + y) & MASK if f else x & y
+    return out ^ MASK if no else out
+
+  return alu
+
+
+# Every one of the 64 combinations of control bits, the documented ones with a specialised function
+ALU_FUNCTIONS = tuple(_DOCUMENTED_FUNCTIONS.get(bits) or alu_from_control_bits(bits) for bits in range(64))
+
+# jump bits (j1 j2 j3 = lt eq gt) -> should jump, indexed by sign_index
+JUMP_CONDITIONS = tuple(
+  None if not jump else (bool(jump & 0b010), bool(jump & 0b001), bool(jump & 0b100)) for jump in range(8)
+)
+
+
+def sign_index(value: int) -> int:
+  return 0 if value == 0 else (2 if value & SIGN_BIT else 1)
+
+
+def decode(word: int) -> Tuple[Optional[Callable[[int, int], int]], object, int, Optional[Tuple[bool, bool, bool]]]:
+  if not word & SIGN_BIT:
+    return None, word, 0, None
+  if word & 0xE000 != 0xE000:
+    raise ValueError(f"{word:016b} is not a valid Hack instruction")
+  use_m = bool(word & 0x1000)
+  return ALU_FUNCTIONS[(word >> 6) & 0b111111], use_m, (word >> 3) & 0b111, JUMP_CONDITIONS[word & 0b111]
@@ -0,0 +1,149 @@
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import List, Optional
+
+try:
+  import numpy as np
+except ImportError:
+  np = None
+
+SCREEN_ROWS = 256
+ROW_WORDS = 32
+SCREEN_WIDTH = ROW_WORDS * 16
+SCREEN_WORDS = SCREEN_ROWS * ROW_WORDS
+
+# Hack pixels are numbered from the least significant bit of a word, PBM from the most significant bit
+_REVERSED_BITS = bytes(int(f"{byte:08b}"[::-1], 2) for byte in range(256))
+# one byte per pixel, 0 or 1, for the 8 pixels of a screen byte
+_BYTE_PIXELS = [bytes((byte >> bit) & 1 for bit in range(8)) for byte in range(256)]
+
+
+def screen_bytes(screen: array) -> bytes:
+  """The screen words as little endian bytes: pixels 0-7 of a word in the first byte, 8-15 in the second."""
+  if sys.byteorder != "little":
+    screen = array('H', screen)
+    screen.byteswap()
+  return screen.tobytes()
+
+
+def to_pbm(screen: array) -> bytes:
+  """Binary PBM (P4) image of a screen, black pixels are 1 in both."""
+  return f"P4\n{SCREEN_WIDTH} {SCREEN_ROWS}\n".encode() + screen_bytes(screen).translate(_REVERSED_BITS)
+
+
+def unpack_rows(screen: array, first_row: int, row_count: int) -> bytes:
+  """Rows of the screen as one byte per pixel, 0 or 1. Whole rows are unpacked at once with numpy."""
+  data = screen_bytes(screen[first_row * ROW_WORDS:(first_row + row_count) * ROW_WORDS])
+  if np is not None:
+    rows = np.frombuffer(data, dtype=np.uint8).reshape(row_count, 2 * ROW_WORDS)
+    return np.unpackbits(rows, axis=1, bitorder="little").tobytes()
+  return b"".join(map(_BYTE_PIXELS.__getitem__, data))
+
+
+class Framebuffer:
+  """
+  Screen of a HackCPU (RAM[16384:24576]) compared row by row with the last frame taken, so only the
+  rows that changed since then have to be converted or stored.
+  """
+
+  def __init__(self, cpu):
+    self.cpu = cpu
+    self.previous = array('H', bytes(2 * SCREEN_WORDS))
+
+  def screen(self) -> array:
+    return self.cpu.ram[self.cpu.SCREEN:self.cpu.SCREEN + SCREEN_WORDS]
+
+  def dirty_rows(self, screen: array = None) -> List[int]:
+    """Rows that differ from the last frame taken."""
+    screen = self.screen() if screen is None else screen
+    if screen == self.previous:
+      return []
+    if np is not None:
+      current = np.frombuffer(screen, dtype=np.uint16).reshape(SCREEN_ROWS, ROW_WORDS)
+      previous = np.frombuffer(self.previous, dtype=np.uint16).reshape(SCREEN_ROWS, ROW_WORDS)
+      return np.flatnonzero((current != previous).any(axis=1)).tolist()
+    return [row for row in range(SCREEN_ROWS)
+            if screen[row * ROW_WORDS:(row + 1) * ROW_WORDS] != self.previous[row * ROW_WORDS:(row + 1) * ROW_WORDS]]
+
+  def take(self) -> Optional[array]:
+    """The screen if it changed since the last frame taken, which it becomes, else None."""
+    screen = self.screen()
+    if screen == self.previous:
+      return None
+    self.previous = screen
+    return screen
+
+
+class FrameRecorder:
+  """
+  Runs a HackCPU and exports a frame every frame_cycles cycles, but only when the screen changed.
+    - pbm: one P4 image per frame, frame_{index}_{cycle}.pbm
+    - raw: a single frames.raw file, one record per frame: a little endian (cycle: u64, first row: u16,
+      row count: u16) header and the span of dirty rows, one byte per pixel
+  """
+  FORMATS = ("pbm", "raw")
+  RAW_FILE_NAME = "frames.raw"
+  _RAW_HEADER = struct.Struct("<QHH")
+
+  def __init__(self, cpu, output_dir, output_format: str = "pbm"):
+    if output_format not in self.FORMATS:
+      raise ValueError(f"Unknown frame format '{output_format}', expected one of {', '.join(self.FORMATS)}")
+    self.cpu = cpu
+    self.output_dir = Path(output_dir)
+    self.output_format = output_format
+    self.framebuffer = Framebuffer(cpu)
+    self.frames_written = 0
+    self.frames_skipped = 0
+
+  def capture(self) -> bool:
+    """Export the current frame if the screen changed. Returns True if a frame was written."""
+    dirty_rows = self.framebuffer.dirty_rows() if self.output_format == "raw" else None
+    screen = self.framebuffer.take()
+    if screen is None:
+      self.frames_skipped += 1
+      return False
+    self.output_dir.mkdir(parents=True, exist_ok=True)
+    if self.output_format == "pbm":
+      path = self.output_dir / f"frame_{self.frames_written:06d}_{self.cpu.cycles}.pbm"
+      path.write_bytes(to_pbm(screen))
+    else:
+      first_row, row_count = dirty_rows[0], dirty_rows[-1] - dirty_rows[0] + 1
+      with open(self.output_dir / self.RAW_FILE_NAME, "ab") as file:
+        file.write(self._RAW_HEADER.pack(self.cpu.cycles, first_row, row_count))
+        file.write(unpack_rows(screen, first_row, row_count))
+    self.frames_written += 1
+    return True
+
+  def record(self, max_cycles: Optional[int] = None, frame_cycles: int = 50000, keyboard_trace=None) -> int:
+    """
+    Run up to max_cycles cycles (until the program stops if None), capturing a frame every frame_cycles.
+    The keys of keyboard_trace, a KeyboardTrace, are replayed on the way. Returns the cycles run.
+    """
+    if frame_cycles < 1:
+      raise ValueError(f"frame_cycles must be positive, got {frame_cycles}")
+    executed = 0
+    while max_cycles is None or executed < max_cycles:
+      chunk = frame_cycles if max_cycles is None else min(frame_cycles, max_cycles - executed)
+      if keyboard_trace is not None:
+        ran = keyboard_trace.replay(self.cpu, self.cpu.cycles + chunk)
+      else:
+        ran = self.cpu.run(chunk)
+      executed += ran
+      self.capture()
+      if ran < chunk:
+        break
+    return executed
+
+  @classmethod
+  def read_raw(cls, path):
+    """Frames of a frames.raw file as (cycle, first row, row count, pixels) tuples."""
+    data = Path(path).read_bytes()
+    offset = 0
+    while offset < len(data):
+      cycle, first_row, row_count = cls._RAW_HEADER.unpack_from(data, offset)
+      offset += cls._RAW_HEADER.size
+      size = row_count * SCREEN_WIDTH
+      yield cycle, first_row, row_count, data[offset:offset + size]
+      offset += size
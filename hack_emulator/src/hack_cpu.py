@@ -0,0 +1,255 @@
+import sys
+from array import array
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional
+
+from hack_emulator.src.block_compiler import BlockCompiler
+from hack_emulator.src.decoder import decode
+from hack_emulator.src.keyboard_trace import KeyboardTrace
+from hack_emulator.src.memory_counters import MemoryCounters, REGIONS
+from hack_emulator.src.profiler import Profiler
+from hack_emulator.src.snapshot import Snapshot
+
+
+class HackCPU:
+  """
+  Headless Hack computer. Every ROM word is decoded once when the program is loaded, the main loop
+  only unpacks the decoded tuples and keeps A, D and PC in local variables.
+
+  With compiled=True the program runs block by block instead: every basic block is translated once
+  into a Python function (see BlockCompiler) and the main loop dispatches from block to block. Both
+  modes give the same results so they can be cross checked.
+  """
+  ROM_SIZE = 32768
+  RAM_SIZE = 32768
+  SCREEN = 16384
+  KBD = 24576
+
+  def __init__(self, rom: Iterable[int] = (), compiled: bool = False):
+    self.compiled = compiled
+    self.rom = array('H')
+    self.decoded: List[tuple] = []
+    self.halt_addresses = set()
+    self.blocks = {}
+    self.block_compiler = None
+    self.profiler: Optional[Profiler] = None
+    self.memory_counters: Optional[MemoryCounters] = None
+    self.keyboard_trace: Optional[KeyboardTrace] = None
+    self.ram = array('H', bytes(2 * self.RAM_SIZE))
+    self.a = 0
+    self.d = 0
+    self.pc = 0
+    self.cycles = 0
+    self.halted = False
+    self.load_words(rom)
+
+  @classmethod
+  def from_file(cls, path, byteorder: str = "big", compiled: bool = False) -> "HackCPU":
+    return cls(cls.read_rom(path, byteorder), compiled)
+
+  @staticmethod
+  def read_rom(path, byteorder: str = "big") -> array:
+    """Read a .hack text file or, for any other extension, a file of packed 16 bit words."""
+    path = Path(path)
+    if path.suffix == ".hack":
+      with open(path, "r") as file:
+        return array('H', (int(line, 2) for line in file if line.strip()))
+    words = array('H')
+    words.frombytes(path.read_bytes())
+    if byteorder != sys.byteorder:
+      words.byteswap()
+    return words
+
+  def load_words(self, words: Iterable[int]):
+    rom = array('H', words)
+    if len(rom) > self.ROM_SIZE:
+      raise ValueError(f"Program has {len(rom)} words, the ROM only holds {self.ROM_SIZE}")
+    self.rom = rom
+    self.decoded = [decode(word) for word in rom]
+    self.halt_addresses = self._find_halt_addresses()
+    self.blocks = {}
+    self.block_compiler = BlockCompiler(self.rom, self.halt_addresses)
+    if self.profiler is not None:
+      self.enable_profiling()
+    if self.memory_counters is not None:
+      self.enable_memory_counters()
+    self.reset()
+
+  def _find_halt_addresses(self) -> set:
+    """Addresses of the '@X / (X) 0;JMP' idiom that Hack programs use to end, where X is the @X itself."""
+    halts = set()
+    for address in range(1, len(self.decoded)):
+      alu, _, dest, jump = self.decoded[address]
+      previous = self.decoded[address - 1]
+      if alu is not None and not dest and jump == (True, True, True) \
+          and previous[0] is None and previous[1] == address - 1:
+        halts.add(address)
+    return halts
+
+  def enable_profiling(self) -> Profiler:
+    """
+    Count the executions of every address and jump from now on. Profiled runs always use the
+    interpreter, with a trace hook called after every instruction (see _tracer).
+    """
+    self.profiler = Profiler(len(self.decoded))
+    return self.profiler
+
+  def disable_profiling(self):
+    self.profiler = None
+
+  def enable_memory_counters(self) -> MemoryCounters:
+    """Count RAM reads and writes by region and by ROM address from now on. Profiled like enable_profiling."""
+    self.memory_counters = MemoryCounters(len(self.decoded), self.RAM_SIZE)
+    return self.memory_counters
+
+  def disable_memory_counters(self):
+    self.memory_counters = None
+
+  def reset(self):
+    self.a = 0
+    self.d = 0
+    self.pc = 0
+    self.cycles = 0
+    self.halted = False
+
+  def step(self) -> bool:
+    return self.run(1) == 1
+
+  def run(self, max_cycles: Optional[int] = None, stop_on_halt: bool = True) -> int:
+    """
+    Execute up to max_cycles instructions (forever if None). Stops when PC leaves the program or, if
+    stop_on_halt, when the program reaches its final infinite loop: the jump of the loop is executed,
+    so PC is left at the '@X' that starts it. Returns the number of cycles run.
+    """
+    # halted only tells about this run: PC may have been moved out of the loop since the last one
+    self.halted = False
+    if self.profiler is not None or self.memory_counters is not None:
+      return self._interpret(max_cycles, stop_on_halt, self._tracer())
+    if self.compiled:
+      return self._run_compiled(max_cycles, stop_on_halt)
+    return self._interpret(max_cycles, stop_on_halt)
+
+  def _run_compiled(self, max_cycles: Optional[int], stop_on_halt: bool) -> int:
+    blocks = self.blocks
+    rom_size = len(self.decoded)
+    ram = self.ram
+    a, d, pc = self.a, self.d, self.pc
+    remaining = sys.maxsize if max_cycles is None else max_cycles
+    executed = 0
+    halted = False
+    try:
+      while pc < rom_size:
+        block = blocks.get(pc)
+        if block is None:
+          block = blocks[pc] = self.block_compiler.compile(pc)
+        if executed + block.length > remaining:
+          break
+        pc, a, d, cycles = block.function(ram, a, d)
+        executed += cycles
+        if block.ends_in_halt and stop_on_halt and cycles == block.length:
+          halted = self.halted = True
+          break
+    except IndexError:
+      raise RuntimeError(f"Invalid memory access in block ROM[{pc}]: RAM[{a}] does not exist") from None
+    finally:
+      self.a, self.d, self.pc = a, d, pc
+      self.cycles += executed
+    if not halted and executed < remaining and pc < rom_size:
+      # the next block does not fit in the cycles left, finish them one instruction at a time
+      executed += self._interpret(remaining - executed, stop_on_halt)
+    return executed
+
+  def _interpret(self, max_cycles: Optional[int], stop_on_halt: bool,
+                 trace: Optional[Callable[[int, int, bool], None]] = None) -> int:
+    rom = self.decoded
+    rom_size = len(rom)
+    ram = self.ram
+    halts = self.halt_addresses if stop_on_halt else ()
+    a, d, pc = self.a, self.d, self.pc
+    remaining = sys.maxsize if max_cycles is None else max_cycles
+    executed = 0
+    try:
+      while executed < remaining and pc < rom_size:
+        alu, operand, dest, jump = rom[pc]
+        executed += 1
+        if alu is None:
+          if trace is not None:
+            trace(pc, a, False)
+          a = operand
+          pc += 1
+          continue
+        address = a
+        out = alu(d, ram[address] if operand else address)
+        if dest:
+          if dest & 1:
+            ram[address] = out
+          if dest & 2:
+            d = out
+          if dest & 4:
+            a = out
+        if jump is not None and jump[0 if out == 0 else (2 if out & 0x8000 else 1)]:
+          if trace is not None:
+            trace(pc, address, True)
+          halting = pc in halts
+          pc = address
+          if halting:
+            self.halted = True
+            break
+        else:
+          if trace is not None:
+            trace(pc, address, False)
+          pc += 1
+    except IndexError:
+      raise RuntimeError(f"Invalid memory access at ROM[{pc}]: RAM[{a}] does not exist") from None
+    finally:
+      self.a, self.d, self.pc = a, d, pc
+      self.cycles += executed
+    return executed
+
+  def _tracer(self) -> Callable[[int, int, bool], None]:
+    """
+    Per-instruction hook of _interpret for the profiler and the memory counters, called with the
+    address of every executed instruction, the A register it used and whether its jump was taken.
+    """
+    rom = self.decoded
+    profiler = self.profiler
+    if profiler is not None:
+      counts, edges = profiler.address_counts, profiler.edges
+    memory = self.memory_counters
+    if memory is not None:
+      regions, reads, writes, region_count = memory.regions, memory.reads, memory.writes, len(REGIONS)
+
+    def trace(pc: int, address: int, jumped: bool):
+      if profiler is not None:
+        counts[pc] += 1
+        if jumped:
+          edge = (pc, address)
+          edges[edge] = edges.get(edge, 0) + 1
+      if memory is not None:
+        alu, operand, dest, _ = rom[pc]
+        if alu is not None:
+          if operand:
+            reads[pc * region_count + regions[address]] += 1
+          if dest & 1:
+            writes[pc * region_count + regions[address]] += 1
+
+    return trace
+
+  def set_keyboard(self, key: int):
+    """Press (or release, with 0) a key. Recorded in keyboard_trace, if there is one."""
+    self.ram[self.KBD] = key
+    if self.keyboard_trace is not None:
+      self.keyboard_trace.record(self.cycles, key)
+
+  def snapshot(self) -> Snapshot:
+    return Snapshot.capture(self)
+
+  def restore(self, snapshot: Snapshot):
+    snapshot.apply(self)
+
+  def read_signed(self, address: int) -> int:
+    value = self.ram[address]
+    return value - 0x10000 if value & 0x8000 else value
+
+  def write_signed(self, address: int, value: int):
+    self.ram[address] = value & 0xFFFF
@@ -0,0 +1,80 @@
+import struct
+from bisect import bisect_left
+from typing import List, Optional, Tuple
+
+
+class KeyboardTrace:
+  """
+  Cycle stamped record of the values written to the keyboard register (RAM[24576]). Attach it to a
+  HackCPU to record every HackCPU.set_keyboard() call, then replay() it on a fresh or restored machine
+  to get the exact same run.
+
+  File format: a magic, the number of events, then one little endian (cycle: u64, key: u16) per event.
+  """
+  MAGIC = b"HACKKBD1"
+  _COUNT = struct.Struct("<Q")
+  _EVENT = struct.Struct("<QH")
+
+  def __init__(self, events: Optional[List[Tuple[int, int]]] = None):
+    self.events: List[Tuple[int, int]] = events or []
+
+  def record(self, cycle: int, key: int):
+    if self.events and cycle < self.events[-1][0]:
+      raise ValueError(f"Keyboard event at cycle {cycle} is older than the last one recorded")
+    if self.events and self.events[-1] == (cycle, key):
+      return
+    self.events.append((cycle, key))
+
+  def replay(self, cpu, until_cycle: Optional[int] = None, stop_on_halt: bool = True) -> int:
+    """
+    Run cpu from its current cycle count, writing every key of the trace at its cycle, until
+    until_cycle or, if None, until the last event is written. Events older than the cpu cycle count
+    are skipped, so replay can start from a snapshot, or be called again for every frame of a run.
+    Returns the number of cycles run.
+    """
+    start = cpu.cycles
+    events = self.events
+    trace_keyboard, cpu.keyboard_trace = cpu.keyboard_trace, None
+    try:
+      # the events are sorted by cycle, the older ones are not even visited
+      for index in range(bisect_left(events, (start, 0)), len(events)):
+        cycle, key = events[index]
+        if until_cycle is not None and cycle > until_cycle:
+          break
+        self._run_until(cpu, cycle, stop_on_halt)
+        if cpu.cycles < cycle:
+          # the program halted or ran out of the ROM
+          return cpu.cycles - start
+        cpu.ram[cpu.KBD] = key
+      if until_cycle is not None:
+        self._run_until(cpu, until_cycle, stop_on_halt)
+    finally:
+      cpu.keyboard_trace = trace_keyboard
+    return cpu.cycles - start
+
+  @staticmethod
+  def _run_until(cpu, cycle: int, stop_on_halt: bool):
+    if cpu.cycles < cycle:
+      cpu.run(cycle - cpu.cycles, stop_on_halt)
+
+  def to_bytes(self) -> bytes:
+    return self.MAGIC + self._COUNT.pack(len(self.events)) + b"".join(
+      self._EVENT.pack(cycle, key) for cycle, key in self.events)
+
+  @classmethod
+  def from_bytes(cls, data: bytes) -> "KeyboardTrace":
+    if not data.startswith(cls.MAGIC):
+      raise ValueError("Not a Hack keyboard trace")
+    (count,) = cls._COUNT.unpack_from(data, len(cls.MAGIC))
+    offset = len(cls.MAGIC) + cls._COUNT.size
+    events = [cls._EVENT.unpack_from(data, offset + i * cls._EVENT.size) for i in range(count)]
+    return cls(events)
+
+  def save(self, path):
+    with open(path, "wb") as file:
+      file.write(self.to_bytes())
+
+  @classmethod
+  def load(cls, path) -> "KeyboardTrace":
+    with open(path, "rb") as file:
+      return cls.from_bytes(file.read())
@@ -0,0 +1,93 @@
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from hack_assambler.src.source_map import label_finder
+
+# RAM regions by first address, as laid out by VMTranslator and the Jack OS
+REGIONS: Tuple[Tuple[str, int], ...] = (
+  ("SP", 0),
+  ("LCL", 1),
+  ("ARG", 2),
+  ("THIS", 3),
+  ("THAT", 4),
+  ("temp", 5),
+  ("R13-R15", 13),
+  ("static", 16),
+  ("stack", 256),
+  ("heap", 2048),
+  ("screen", 16384),
+  ("KBD", 24576),
+  ("unmapped", 24577),
+)
+REGION_NAMES = tuple(name for name, _ in REGIONS)
+
+
+def region_table(ram_size: int = 32768) -> bytes:
+  """Region index of every RAM address."""
+  table = bytearray(ram_size)
+  for index, (_, start) in enumerate(REGIONS):
+    end = REGIONS[index + 1][1] if index + 1 < len(REGIONS) else ram_size
+    table[start:end] = bytes([index]) * (end - start)
+  return bytes(table)
+
+
+class MemoryCounters:
+  """
+  RAM reads and writes of a HackCPU run by region (see REGIONS) and by the ROM address that made them,
+  so they can be reported per function. Filled by HackCPU when memory counters are enabled, see
+  HackCPU.enable_memory_counters().
+  """
+
+  def __init__(self, rom_size: int, ram_size: int = 32768):
+    self.regions = region_table(ram_size)
+    # counter of (rom address, region) at rom address * len(REGIONS) + region
+    self.reads = array('Q', bytes(8 * rom_size * len(REGIONS)))
+    self.writes = array('Q', bytes(8 * rom_size * len(REGIONS)))
+
+  @property
+  def total_reads(self) -> int:
+    return sum(self.reads)
+
+  @property
+  def total_writes(self) -> int:
+    return sum(self.writes)
+
+  def by_region(self) -> Dict[str, Tuple[int, int]]:
+    """(reads, writes) of every region."""
+    regions = len(REGIONS)
+    return {name: (sum(self.reads[index::regions]), sum(self.writes[index::regions]))
+            for index, name in enumerate(REGION_NAMES)}
+
+  def by_label(self, labels: Dict[str, int]) -> Dict[Optional[str], Dict[str, Tuple[int, int]]]:
+    """
+    (reads, writes) by region for the closest label at or before each ROM address, labels with the
+    most accesses first. Code before the first label is counted under None.
+    """
+    find_label = label_finder(labels)
+    regions = len(REGIONS)
+    counts: Dict[Optional[str], List[int]] = {}
+    for index, (reads, writes) in enumerate(zip(self.reads, self.writes)):
+      if reads or writes:
+        label_counts = counts.setdefault(find_label(index // regions), [0] * (2 * regions))
+        label_counts[2 * (index % regions)] += reads
+        label_counts[2 * (index % regions) + 1] += writes
+    ranked = sorted(counts.items(), key=lambda item: sum(item[1]), reverse=True)
+    return {label: {name: (values[2 * i], values[2 * i + 1]) for i, name in enumerate(REGION_NAMES)
+                    if values[2 * i] or values[2 * i + 1]}
+            for label, values in ranked}
+
+  def report(self, labels: Dict[str, int] = None, top: int = 10) -> str:
+    """Accesses by region and, with labels, by the given labels (see by_label)."""
+    total = (self.total_reads + self.total_writes) or 1
+    lines = [f"Memory accesses ({self.total_reads} reads, {self.total_writes} writes)"]
+    for name, (reads, writes) in self.by_region().items():
+      if reads or writes:
+        lines.append(f"  {name:<10} {reads:>12} reads {writes:>12} writes {(reads + writes) / total:6.1%}")
+    if labels:
+      lines.append("Memory accesses by label")
+      for label, regions in list(self.by_label(labels).items())[:top]:
+        label_total = sum(reads + writes for reads, writes in regions.values())
+        shares = sorted(((reads + writes) / label_total, name) for name, (reads, writes) in regions.items())
+        share_text = ", ".join(f"{name} {share:.0%}" for share, name in reversed(shares))
+        lines.append(f"  {label_total:>12} {label or '<start>'}: {share_text}")
+    return "\n".join(lines)
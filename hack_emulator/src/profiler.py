@@ -0,0 +1,57 @@
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from hack_assambler.src.source_map import label_finder
+
+
+class Profiler:
+  """
+  Execution counts of a HackCPU run: how many times each ROM address was executed and how many times
+  each jump was taken, by (source address, target address) edge. Filled by HackCPU when profiling is
+  enabled, see HackCPU.enable_profiling().
+  """
+
+  def __init__(self, rom_size: int):
+    self.address_counts = array('Q', bytes(8 * rom_size))
+    self.edges: Dict[Tuple[int, int], int] = {}
+
+  @property
+  def total(self) -> int:
+    return sum(self.address_counts)
+
+  def hot_addresses(self, top: int = 10) -> List[Tuple[int, int]]:
+    ranked = sorted(range(len(self.address_counts)), key=self.address_counts.__getitem__, reverse=True)
+    return [(address, self.address_counts[address]) for address in ranked[:top] if self.address_counts[address]]
+
+  def hot_edges(self, top: int = 10) -> List[Tuple[Tuple[int, int], int]]:
+    return sorted(self.edges.items(), key=lambda item: item[1], reverse=True)[:top]
+
+  def counts_by_label(self, labels: Dict[str, int]) -> Dict[Optional[str], int]:
+    """
+    Executions aggregated by the closest label at or before each address, most executed first. Code
+    before the first label is counted under None.
+    """
+    find_label = label_finder(labels)
+    counts: Dict[Optional[str], int] = {}
+    for address, count in enumerate(self.address_counts):
+      if count:
+        label = find_label(address)
+        counts[label] = counts.get(label, 0) + count
+    return dict(sorted(counts.items(), key=lambda item: item[1], reverse=True))
+
+  def report(self, labels: Dict[str, int] = None, instructions: List[str] = None, top: int = 10) -> str:
+    """Hot spots, by the given labels (see counts_by_label), by address and by jump."""
+    total = self.total or 1
+    lines = []
+    if labels:
+      lines.append(f"Hot labels ({self.total} cycles)")
+      for label, count in list(self.counts_by_label(labels).items())[:top]:
+        lines.append(f"  {count:>12} {count / total:6.1%}  {label or '<start>'}")
+    lines.append("Hot addresses")
+    for address, count in self.hot_addresses(top):
+      instruction = f"  {instructions[address]}" if instructions else ""
+      lines.append(f"  {count:>12} {count / total:6.1%}  ROM[{address}]{instruction}")
+    lines.append("Hot jumps")
+    for (source, target), count in self.hot_edges(top):
+      lines.append(f"  {count:>12}  ROM[{source}] -> ROM[{target}]")
+    return "\n".join(lines)
@@ -0,0 +1,76 @@
+import hashlib
+import struct
+import sys
+import zlib
+from array import array
+
+
+class Snapshot:
+  """
+  Full machine state of a HackCPU: PC, A, D, cycle count, halted flag and the 32K RAM. The ROM is not
+  stored, only its digest, so a snapshot can only be restored on the program that produced it.
+
+  Binary format: a fixed little endian header followed by the zlib compressed RAM, also little endian.
+  """
+  MAGIC = b"HACKSNAP"
+  VERSION = 1
+  _HEADER = struct.Struct("<8sHHHHQ?20s")
+
+  def __init__(self, pc: int, a: int, d: int, cycles: int, halted: bool, ram: array, rom_digest: bytes):
+    self.pc = pc
+    self.a = a
+    self.d = d
+    self.cycles = cycles
+    self.halted = halted
+    self.ram = ram
+    self.rom_digest = rom_digest
+
+  @staticmethod
+  def rom_digest_of(rom: array) -> bytes:
+    return hashlib.sha1(rom.tobytes()).digest()
+
+  @classmethod
+  def capture(cls, cpu) -> "Snapshot":
+    return cls(cpu.pc, cpu.a, cpu.d, cpu.cycles, cpu.halted, array('H', cpu.ram), cls.rom_digest_of(cpu.rom))
+
+  def apply(self, cpu):
+    if self.rom_digest != self.rom_digest_of(cpu.rom):
+      raise ValueError("The snapshot was taken with a different program")
+    if len(self.ram) != len(cpu.ram):
+      raise ValueError(f"The snapshot RAM has {len(self.ram)} words, expected {len(cpu.ram)}")
+    cpu.ram[:] = self.ram
+    cpu.pc, cpu.a, cpu.d = self.pc, self.a, self.d
+    cpu.cycles = self.cycles
+    cpu.halted = self.halted
+
+  def to_bytes(self) -> bytes:
+    ram = array('H', self.ram)
+    if sys.byteorder != "little":
+      ram.byteswap()
+    header = self._HEADER.pack(self.MAGIC, self.VERSION, self.pc, self.a, self.d, self.cycles, self.halted,
+                               self.rom_digest)
+    return header + zlib.compress(ram.tobytes())
+
+  @classmethod
+  def from_bytes(cls, data: bytes) -> "Snapshot":
+    if len(data) < cls._HEADER.size:
+      raise ValueError("Not a Hack snapshot: data too short")
+    magic, version, pc, a, d, cycles, halted, rom_digest = cls._HEADER.unpack_from(data)
+    if magic != cls.MAGIC:
+      raise ValueError("Not a Hack snapshot")
+    if version != cls.VERSION:
+      raise ValueError(f"Snapshot version {version} is not supported")
+    ram = array('H')
+    ram.frombytes(zlib.decompress(data[cls._HEADER.size:]))
+    if sys.byteorder != "little":
+      ram.byteswap()
+    return cls(pc, a, d, cycles, halted, ram, rom_digest)
+
+  def save(self, path):
+    with open(path, "wb") as file:
+      file.write(self.to_bytes())
+
+  @classmethod
+  def load(cls, path) -> "Snapshot":
+    with open(path, "rb") as file:
+      return cls.from_bytes(file.read())
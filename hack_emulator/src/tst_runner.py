@@ -0,0 +1,268 @@
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+from hack_assambler.src.hack_assambler import HackAssambler
+from hack_emulator.src.hack_cpu import HackCPU
+
+_COMMENTS = re.compile(r"//[^\n]*|/\*.*?\*/", re.DOTALL)
+_OUTPUT_SPEC = re.compile(r"^(?P<name>[^%]+)(%(?P<format>[BDXS])(?P<left>\d+)\.(?P<width>\d+)\.(?P<right>\d+))?$")
+_RAM = re.compile(r"^RAM\[(?P<address>\d+)]$")
+
+
+class OutputColumn:
+  def __init__(self, name: str, value_format: str = "D", left: int = 1, width: int = 6, right: int = 1):
+    self.name = name
+    self.value_format = value_format
+    self.left = left
+    self.width = width
+    self.right = right
+
+  @classmethod
+  def parse(cls, spec: str) -> "OutputColumn":
+    match = _OUTPUT_SPEC.match(spec)
+    if not match:
+      raise SyntaxError(f"Invalid output-list entry '{spec}'")
+    if match.group("format") is None:
+      return cls(match.group("name"))
+    return cls(match.group("name"), match.group("format"), int(match.group("left")),
+               int(match.group("width")), int(match.group("right")))
+
+  def header(self) -> str:
+    total = self.left + self.width + self.right
+    name = self.name[:total]
+    padding = total - len(name)
+    return " " * (padding // 2) + name + " " * (padding - padding // 2)
+
+  def cell(self, value: int) -> str:
+    value &= 0xFFFF
+    if self.value_format == "B":
+      text = f"{value:016b}"[-self.width:]
+    elif self.value_format == "X":
+      text = f"{value:04X}"[-self.width:]
+    else:
+      text = str(value - 0x10000 if value & 0x8000 else value)
+    return " " * self.left + text.rjust(self.width) + " " * self.right
+
+
+class TstScript:
+  """
+  A nand2tetris test script for the CPU emulator, parsed into a tree of commands. Each command is a
+  list of words; 'repeat N { ... }' becomes ['repeat', 'N', [commands]].
+  """
+
+  def __init__(self, path: Path):
+    self.path = Path(path)
+    self.commands = self.parse(self.path.read_text())
+
+  @staticmethod
+  def parse(source: str) -> list:
+    source = _COMMENTS.sub(" ", source)
+    root: list = []
+    stack = [root]
+    word = []
+    for char in source:
+      if char in ",;{}":
+        command = "".join(word).split()
+        word = []
+        if char == "{":
+          if len(command) != 2 or command[0] != "repeat":
+            raise SyntaxError(f"Only 'repeat N {{' blocks are supported, got '{' '.join(command)}'")
+          block: list = []
+          stack[-1].append(["repeat", command[1], block])
+          stack.append(block)
+          continue
+        if command:
+          stack[-1].append(command)
+        if char == "}":
+          if len(stack) == 1:
+            raise SyntaxError("Unexpected '}'")
+          stack.pop()
+      else:
+        word.append(char)
+    if len(stack) != 1:
+      raise SyntaxError("Missing '}'")
+    if "".join(word).strip():
+      raise SyntaxError(f"Command '{''.join(word).strip()}' is not terminated")
+    return root
+
+
+class TstResult:
+  def __init__(self, script_path: Path, passed: bool = False, cycles: int = 0, elapsed: float = 0.0,
+               error: Optional[str] = None):
+    self.script_path = script_path
+    self.passed = passed
+    self.cycles = cycles
+    self.elapsed = elapsed
+    self.error = error
+
+  def __repr__(self):
+    return f"TstResult(script_path={self.script_path!r}, passed={self.passed!r}, error={self.error!r})"
+
+
+class TstRunner:
+  """
+  Runs a CPU emulator test script against HackCPU and compares the output with its .cmp file.
+  Supported commands: load, output-file, compare-to, output-list, output, set, repeat, tick, tock,
+  ticktock and echo. Programs are loaded from load_dir if given, else from the script folder, .asm
+  programs are assembled with the peephole optimizer if optimize.
+  """
+
+  def __init__(self, script_path: Path, load_dir: Optional[Path] = None, compiled: bool = False,
+               optimize: bool = False):
+    self.script = TstScript(script_path)
+    self.script_dir = self.script.path.parent
+    self.load_dir = Path(load_dir) if load_dir else self.script_dir
+    self.compiled = compiled
+    self.optimize = optimize
+    self.cpu = HackCPU(compiled=compiled)
+    self.columns: List[OutputColumn] = []
+    self.output: List[str] = []
+    self.compare_path: Optional[Path] = None
+    self.output_path: Optional[Path] = None
+
+  def run(self) -> List[str]:
+    self._execute(self.script.commands)
+    return self.output
+
+  def compare(self) -> Optional[str]:
+    """Return a description of the first difference with the compare file, None if they match."""
+    if self.compare_path is None:
+      return None
+    expected = [line for line in self.compare_path.read_text().splitlines() if line.strip()]
+    for line_number, expected_line in enumerate(expected, start=1):
+      if line_number > len(self.output):
+        return f"Line {line_number}: expected '{expected_line}', got nothing"
+      if not self._lines_match(self.output[line_number - 1], expected_line):
+        return f"Line {line_number}: expected '{expected_line}', got '{self.output[line_number - 1]}'"
+    return None
+
+  def write_output(self):
+    if self.output_path is not None:
+      self.output_path.write_text("\n".join(self.output) + "\n")
+
+  @staticmethod
+  def _lines_match(actual: str, expected: str) -> bool:
+    actual_cells = [cell.strip() for cell in actual.split("|")]
+    expected_cells = [cell.strip() for cell in expected.split("|")]
+    if len(actual_cells) != len(expected_cells):
+      return False
+    return all(e == a or set(e) == {"*"} for a, e in zip(actual_cells, expected_cells))
+
+  def _execute(self, commands: list):
+    for command in commands:
+      name, args = command[0], command[1:]
+      if name == "repeat":
+        self._repeat(int(args[0]), args[1])
+      elif name == "ticktock" or name == "tock":
+        self._tick(1)
+      elif name == "tick" or name == "echo":
+        continue
+      elif name == "set":
+        self._set(args)
+      elif name == "output":
+        self.output.append("|" + "|".join(column.cell(self._value(column.name)) for column in self.columns) + "|")
+      elif name == "output-list":
+        self.columns = [OutputColumn.parse(spec) for spec in args]
+        self.output.append("|" + "|".join(column.header() for column in self.columns) + "|")
+      elif name == "load":
+        self._load(args[0])
+      elif name == "output-file":
+        self.output_path = self.script_dir / args[0]
+      elif name == "compare-to":
+        self.compare_path = self.script_dir / args[0]
+      else:
+        raise SyntaxError(f"Command '{' '.join(command)}' is not supported")
+
+  def _repeat(self, times: int, commands: list):
+    if all(command[0] in ("ticktock", "tick", "tock") for command in commands):
+      # Only clock cycles: run them all at once
+      self._tick(times * sum(1 for command in commands if command[0] != "tick"))
+      return
+    for _ in range(times):
+      self._execute(commands)
+
+  def _tick(self, cycles: int):
+    cpu = self.cpu
+    remaining = cycles - cpu.run(cycles)
+    while remaining:
+      if cpu.halted:
+        # The program is in its '@X / 0;JMP' loop, every second cycle brings it back to the same state
+        cpu.run(remaining % 2, stop_on_halt=False)
+        cpu.cycles += remaining - remaining % 2
+        return
+      if cpu.pc >= HackCPU.ROM_SIZE:
+        raise RuntimeError(f"PC={cpu.pc} is outside of the ROM")
+      # PC left the program: the rest of the ROM is zeros, that is '@0', until PC wraps around to 0
+      empty_words = min(remaining, HackCPU.ROM_SIZE - cpu.pc)
+      cpu.a = 0
+      cpu.pc = (cpu.pc + empty_words) % HackCPU.ROM_SIZE
+      cpu.cycles += empty_words
+      remaining -= empty_words
+      if remaining:
+        remaining -= cpu.run(remaining)
+
+  def _load(self, file_name: str):
+    path = self.load_dir / file_name
+    if path.suffix == ".asm":
+      assambler = HackAssambler(str(path), optimize=self.optimize)
+      assambler.parse()
+      assambler.compile()
+      self.cpu.load_words(assambler.file_compiled)
+    elif path.suffix in (".hack", ".bin"):
+      self.cpu.load_words(HackCPU.read_rom(path))
+    else:
+      raise ValueError(f"Cannot load '{file_name}': only .asm, .hack and .bin programs are supported")
+
+  def _set(self, args: List[str]):
+    if len(args) != 2:
+      raise SyntaxError(f"Invalid set command 'set {' '.join(args)}'")
+    target, value = args[0], int(args[1])
+    match = _RAM.match(target)
+    if match:
+      self.cpu.write_signed(int(match.group("address")), value)
+    elif target in ("PC", "A", "D"):
+      setattr(self.cpu, target.lower(), value & 0xFFFF)
+    else:
+      raise SyntaxError(f"Cannot set '{target}'")
+
+  def _value(self, name: str) -> int:
+    match = _RAM.match(name)
+    if match:
+      return self.cpu.ram[int(match.group("address"))]
+    if name in ("PC", "A", "D"):
+      return getattr(self.cpu, name.lower())
+    if name == "time":
+      return self.cpu.cycles
+    raise SyntaxError(f"Unknown output variable '{name}'")
+
+
+def run_script(script_path: Path, load_dir: Optional[Path] = None, compiled: bool = False,
+               write_output: bool = False, optimize: bool = False) -> TstResult:
+  """Run and compare a single script. Module level so it can be sent to the worker processes."""
+  start = time.perf_counter()
+  try:
+    runner = TstRunner(script_path, load_dir, compiled, optimize)
+    runner.run()
+    if write_output:
+      runner.write_output()
+    error = runner.compare()
+    return TstResult(script_path, error is None, runner.cpu.cycles, time.perf_counter() - start, error)
+  except Exception as e:
+    return TstResult(script_path, elapsed=time.perf_counter() - start, error=f"{type(e).__name__}: {e}")
+
+
+def run_scripts(script_paths: List[Path], jobs: Optional[int] = None, compiled: bool = False,
+                write_output: bool = False) -> List[TstResult]:
+  """Run many scripts in a pool of processes. Results are returned in the order of script_paths."""
+  script_paths = list(script_paths)
+  load_dirs = [None] * len(script_paths)
+  compiled_flags = [compiled] * len(script_paths)
+  write_flags = [write_output] * len(script_paths)
+  if jobs == 1 or len(script_paths) <= 1:
+    return list(map(run_script, script_paths, load_dirs, compiled_flags, write_flags))
+  with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+    return list(executor.map(run_script, script_paths, load_dirs, compiled_flags, write_flags))
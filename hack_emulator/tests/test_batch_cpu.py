@@ -0,0 +1,82 @@
+import random
+import unittest
+from array import array
+from pathlib import Path
+
+from hack_assambler.src.hack_assambler import HackAssambler
+from hack_emulator.src.batch_cpu import BatchHackCPU, np
+from hack_emulator.src.hack_cpu import HackCPU
+
+# RAM[2] = RAM[0] * RAM[1] by repeated addition: the number of cycles depends on the input
+MULT = [
+  "@2", "M=0",
+  "@1", "D=M", "@3", "M=D",
+  "(LOOP)",
+  "@3", "D=M", "@END", "D;JLE",
+  "@0", "D=M", "@2", "M=D+M",
+  "@3", "M=M-1",
+  "@LOOP", "0;JMP",
+  "(END)",
+  "@END", "0;JMP",
+]
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestBatchHackCPU(unittest.TestCase):
+
+  def setUp(self):
+    self.max_hack = Path(__file__).parents[2] / "hack_assambler" / "tests" / "test_files" / "Max.hack"
+    self.random = random.Random(15)
+
+  def assert_same_as_hack_cpu(self, rom, inputs):
+    batch = BatchHackCPU(rom, len(inputs))
+    for instance, values in enumerate(inputs):
+      batch.ram[instance, :len(values)] = values
+    batch.run()
+
+    for instance, values in enumerate(inputs):
+      cpu = HackCPU(rom)
+      cpu.ram[:len(values)] = array('H', values)
+      cpu.run()
+      self.assertEqual(batch.ram[instance, :16].tolist(), cpu.ram[:16].tolist(), f"inputs {values}")
+      self.assertEqual((int(batch.pc[instance]), int(batch.a[instance]), int(batch.d[instance])),
+                       (cpu.pc, cpu.a, cpu.d))
+      self.assertEqual(int(batch.cycles[instance]), cpu.cycles)
+      self.assertTrue(batch.halted[instance])
+    return batch
+
+  def test_fuzz_max(self):
+    rom = HackCPU.read_rom(self.max_hack)
+    # Max compares with R0 - R1, which only holds while the difference does not overflow
+    signed = [[self.random.randrange(-16384, 16384), self.random.randrange(-16384, 16384)] for _ in range(64)]
+    inputs = [[value & 0xFFFF for value in pair] for pair in signed]
+    batch = self.assert_same_as_hack_cpu(rom, inputs)
+    self.assertEqual(batch.read_signed(2).tolist(), [max(pair) for pair in signed])
+
+  def test_divergent_control_flow(self):
+    rom = HackAssambler.assemble_lines(MULT)
+    inputs = [[self.random.randrange(-50, 50) & 0xFFFF, self.random.randrange(20)] for _ in range(32)]
+    batch = self.assert_same_as_hack_cpu(rom, inputs)
+    self.assertGreater(len(set(batch.cycles.tolist())), 1)
+
+  def test_run_stops_after_max_cycles(self):
+    batch = BatchHackCPU(HackAssambler.assemble_lines(MULT), 4)
+    batch.ram[:, 0] = 3
+    batch.ram[:, 1] = 100
+    self.assertEqual(batch.run(10), 10)
+    self.assertEqual(batch.cycles.tolist(), [10] * 4)
+    self.assertFalse(batch.halted.any())
+
+  def test_invalid_memory_access_raises(self):
+    rom = HackAssambler.assemble_lines(["@32767", "D=A", "A=D+1", "M=1"])
+    batch = BatchHackCPU(rom, 3)
+    with self.assertRaises(RuntimeError):
+      batch.run()
+
+  def test_at_least_one_instance(self):
+    with self.assertRaises(ValueError):
+      BatchHackCPU([0], 0)
+
+
+if __name__ == "__main__":
+  unittest.main()
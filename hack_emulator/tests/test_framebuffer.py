@@ -0,0 +1,98 @@
+import unittest
+from array import array
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from hack_assambler.src.hack_assambler import HackAssambler
+from hack_emulator.src import framebuffer
+from hack_emulator.src.framebuffer import FrameRecorder, Framebuffer, SCREEN_WIDTH, SCREEN_WORDS, to_pbm, unpack_rows
+from hack_emulator.src.hack_cpu import HackCPU
+
+# pixel (0, 0), then after a pause pixel (10, 31), then it loops forever without drawing
+DRAW = [
+  "@SCREEN", "M=1",
+  "@100", "D=A", "(WAIT)", "D=D-1", "@WAIT", "D;JGT",
+  "@32767", "D=!A",           # D = 0x8000
+  "@16705", "M=D",            # SCREEN + 10 * 32 + 1
+  "(END)", "@END", "D;JLT",
+]
+
+
+class TestFramebuffer(unittest.TestCase):
+
+  def setUp(self):
+    self.screen = array('H', bytes(2 * SCREEN_WORDS))
+    self.screen[0] = 1
+    self.screen[10 * 32 + 1] = 0x8000
+
+  def test_pbm_pixel_order(self):
+    pbm = to_pbm(self.screen)
+    header = b"P4\n512 256\n"
+    self.assertTrue(pbm.startswith(header))
+    pixels = pbm[len(header):]
+    self.assertEqual(len(pixels), SCREEN_WORDS * 2)
+    self.assertEqual(pixels[0], 0b10000000)
+    # pixel 31 of row 10 is the last bit of the 4th byte of the row
+    self.assertEqual(pixels[10 * 64 + 3], 0b00000001)
+    self.assertEqual(sum(map(bool, pixels)), 2)
+
+  def test_unpack_rows(self):
+    rows = unpack_rows(self.screen, 9, 2)
+    self.assertEqual(len(rows), 2 * SCREEN_WIDTH)
+    self.assertEqual([i for i, pixel in enumerate(rows) if pixel], [SCREEN_WIDTH + 31])
+    with mock.patch.object(framebuffer, "np", None):
+      self.assertEqual(unpack_rows(self.screen, 9, 2), rows)
+
+  def test_dirty_rows(self):
+    cpu = HackCPU()
+    buffer = Framebuffer(cpu)
+    self.assertEqual(buffer.dirty_rows(), [])
+    cpu.ram[cpu.SCREEN:cpu.SCREEN + SCREEN_WORDS] = self.screen
+    self.assertEqual(buffer.dirty_rows(), [0, 10])
+    with mock.patch.object(framebuffer, "np", None):
+      self.assertEqual(buffer.dirty_rows(), [0, 10])
+    self.assertIsNotNone(buffer.take())
+    self.assertEqual(buffer.dirty_rows(), [])
+    self.assertIsNone(buffer.take())
+
+
+class TestFrameRecorder(unittest.TestCase):
+
+  def setUp(self):
+    self.rom = HackAssambler.assemble_lines(DRAW)
+
+  def test_only_changed_frames_are_written(self):
+    with TemporaryDirectory() as directory:
+      recorder = FrameRecorder(HackCPU(self.rom), directory)
+      recorder.record(max_cycles=2000, frame_cycles=100)
+      files = sorted(path.name for path in Path(directory).iterdir())
+    self.assertEqual(recorder.frames_written, 2)
+    self.assertEqual(recorder.frames_skipped, 18)
+    self.assertEqual(files, ["frame_000000_100.pbm", "frame_000001_400.pbm"])
+
+  def test_record_stops_with_the_program(self):
+    cpu = HackCPU(HackAssambler.assemble_lines(["@SCREEN", "M=-1", "(END)", "@END", "0;JMP"]))
+    with TemporaryDirectory() as directory:
+      recorder = FrameRecorder(cpu, directory)
+      cycles = recorder.record(frame_cycles=50)
+    self.assertEqual(cycles, 4)
+    self.assertTrue(cpu.halted)
+    self.assertEqual(recorder.frames_written, 1)
+
+  def test_raw_frames_store_the_dirty_rows(self):
+    with TemporaryDirectory() as directory:
+      recorder = FrameRecorder(HackCPU(self.rom), directory, "raw")
+      recorder.record(max_cycles=1000, frame_cycles=100)
+      frames = list(FrameRecorder.read_raw(Path(directory) / FrameRecorder.RAW_FILE_NAME))
+    self.assertEqual([(cycle, first_row, row_count) for cycle, first_row, row_count, _ in frames],
+                     [(100, 0, 1), (400, 10, 1)])
+    self.assertEqual(frames[1][3].index(1), 31)
+
+  def test_unknown_format(self):
+    with self.assertRaises(ValueError):
+      FrameRecorder(HackCPU(self.rom), ".", "png")
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,167 @@
+import unittest
+from array import array
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from hack_assambler.src.hack_assambler import HackAssambler
+from hack_assambler.src.hack_compiler import HackCompiler
+from hack_assambler.src.hack_writer import HackWriter
+from hack_emulator.src.decoder import ALU_FUNCTIONS, alu_from_control_bits
+from hack_emulator.src.hack_cpu import HackCPU
+
+
+def assemble(path) -> array:
+  assambler = HackAssambler(str(path))
+  assambler.parse()
+  assambler.compile()
+  return assambler.file_compiled
+
+
+def assemble_lines(lines) -> array:
+  compiler = HackCompiler()
+  return array('H', (compiler.encode(line) for line in lines))
+
+
+class TestDecoder(unittest.TestCase):
+
+  def test_documented_functions_match_generic_alu(self):
+    values = [0, 1, 2, 0x7FFF, 0x8000, 0xFFFF, 12345]
+    for bits, alu in enumerate(ALU_FUNCTIONS):
+      generic = alu_from_control_bits(bits)
+      for x in values:
+        for y in values:
+          self.assertEqual(alu(x, y), generic(x, y), f"{bits:06b} {x} {y}")
+
+
+class TestHackCPU(unittest.TestCase):
+
+  def setUp(self):
+    self.test_folders = Path(__file__).parents[2] / "vm_translator" / "tests" / "test_folders"
+
+  def test_add(self):
+    cpu = HackCPU(assemble_lines(["@2", "D=A", "@3", "D=D+A", "@0", "M=D"]))
+    self.assertEqual(cpu.run(), 6)
+    self.assertEqual(cpu.ram[0], 5)
+    self.assertEqual(cpu.pc, 6)
+
+  def test_jump_uses_a_before_update(self):
+    # A=A+1;JMP jumps to the old A: 3, not 4
+    cpu = HackCPU(assemble_lines(["@3", "A=A+1;JMP", "@100", "D=A", "@200"]))
+    cpu.run(3)
+    self.assertEqual(cpu.pc, 4)
+    self.assertEqual(cpu.d, 4)
+
+  def test_memory_write_uses_a_before_update(self):
+    cpu = HackCPU(assemble_lines(["@7", "AM=A+1"]))
+    cpu.run()
+    self.assertEqual(cpu.ram[7], 8)
+    self.assertEqual(cpu.a, 8)
+
+  def test_negative_values_and_conditional_jumps(self):
+    cpu = HackCPU(assemble_lines(["@5", "D=-A", "@6", "D;JLT", "@0", "M=1", "@1", "M=-1"]))
+    cpu.run()
+    self.assertEqual(cpu.ram[0], 0)
+    self.assertEqual(cpu.read_signed(1), -1)
+
+  def test_stops_on_halt_loop(self):
+    cpu = HackCPU(assemble_lines(["@1", "D=A", "@2", "0;JMP"]))
+    self.assertEqual(cpu.run(1000), 4)
+    self.assertTrue(cpu.halted)
+    self.assertEqual(cpu.run(10, stop_on_halt=False), 10)
+
+  def test_invalid_memory_access(self):
+    cpu = HackCPU(assemble_lines(["@32767", "A=A+1", "D=M"]))
+    with self.assertRaises(RuntimeError):
+      cpu.run()
+
+  def test_reads_text_and_binary_roms(self):
+    words = assemble_lines(["@2", "D=A", "@3", "D=D+A", "@0", "M=D"])
+    with TemporaryDirectory() as tmp_dir:
+      for name, output_format, byteorder in (("a.hack", "hack", "big"), ("a.bin", "bin", "big"), ("b.bin", "bin", "little")):
+        path = Path(tmp_dir) / name
+        HackWriter(str(path)).write(words, output_format, byteorder)
+        self.assertEqual(HackCPU.read_rom(path, byteorder), words)
+
+  def test_basic_loop(self):
+    cpu = HackCPU(assemble(self.test_folders / "BasicLoop" / "BasicLoop.asm"))
+    for address, value in ((0, 256), (1, 300), (2, 400), (400, 3)):
+      cpu.write_signed(address, value)
+    cpu.run(600)
+    self.assertEqual((cpu.read_signed(0), cpu.read_signed(256)), (257, 6))
+
+  def test_fibonacci_element(self):
+    cpu = HackCPU(assemble(self.test_folders / "FibonacciElement" / "FibonacciElement.asm"))
+    cpu.run(6000)
+    self.assertEqual((cpu.read_signed(0), cpu.read_signed(261)), (262, 3))
+
+  def test_statics(self):
+    cpu = HackCPU(assemble(self.test_folders / "StaticsTest" / "StaticsTest.asm"))
+    cpu.run(2500)
+    self.assertEqual((cpu.read_signed(0), cpu.read_signed(261), cpu.read_signed(262)), (263, -2, 8))
+
+
+class TestCompiledMode(unittest.TestCase):
+  """The compiled mode must leave the machine in exactly the same state as the interpreter."""
+
+  def setUp(self):
+    self.test_folders = Path(__file__).parents[2] / "vm_translator" / "tests" / "test_folders"
+
+  def _assert_same_state(self, words, cycles, setup=()):
+    interpreted = HackCPU(words)
+    compiled = HackCPU(words, compiled=True)
+    for cpu in (interpreted, compiled):
+      for address, value in setup:
+        cpu.write_signed(address, value)
+    self.assertEqual(compiled.run(cycles), interpreted.run(cycles))
+    self.assertEqual((compiled.pc, compiled.a, compiled.d, compiled.halted),
+                     (interpreted.pc, interpreted.a, interpreted.d, interpreted.halted))
+    self.assertEqual(compiled.ram, interpreted.ram)
+
+  def test_all_test_folders_programs(self):
+    for asm_file in sorted(self.test_folders.glob("*/*.asm")):
+      words = assemble(asm_file)
+      for cycles in (1, 7, 123, 1000, 5000):
+        with self.subTest(asm=asm_file.name, cycles=cycles):
+          self._assert_same_state(words, cycles, setup=((0, 256), (1, 300), (2, 400), (3, 3000), (4, 4000)))
+
+  def test_halt(self):
+    words = assemble_lines(["@1", "D=A", "@4", "D;JGT", "@4", "0;JMP"])
+    self._assert_same_state(words, None)
+    cpu = HackCPU(words, compiled=True)
+    cpu.run()
+    self.assertTrue(cpu.halted)
+
+  def test_jump_uses_a_before_update(self):
+    self._assert_same_state(assemble_lines(["@3", "A=A+1;JMP", "@100", "D=A", "@200", "AM=D+1;JNE"]), 4)
+
+  def test_every_comp_and_dest(self):
+    lines = ["@7", "D=A", "@100", "M=-1"]
+    for index, comp in enumerate(HackCompiler().comp_table):
+      for dest in ("M", "D", "MD"):
+        lines.extend([f"@{100 + index}", f"{dest}={comp}"])
+    self._assert_same_state(assemble_lines(lines), None)
+
+  def test_every_jump(self):
+    lines = []
+    for jump in ("JGT", "JEQ", "JGE", "JLT", "JNE", "JLE", "JMP"):
+      for value in ("0", "1", "-1"):
+        start = len(lines)
+        lines.extend([f"@{start + 5}", f"D={value};{jump}", "@0", "M=M+1", "@1", "M=M+1"])
+    self._assert_same_state(assemble_lines(lines), None)
+
+  def test_blocks_are_compiled_once(self):
+    cpu = HackCPU(assemble(self.test_folders / "BasicLoop" / "BasicLoop.asm"), compiled=True)
+    cpu.write_signed(0, 256)
+    cpu.write_signed(1, 300)
+    cpu.write_signed(2, 400)
+    cpu.write_signed(400, 3)
+    cpu.run(600)
+    blocks = dict(cpu.blocks)
+    self.assertEqual((cpu.read_signed(0), cpu.read_signed(256)), (257, 6))
+    cpu.run(600)
+    self.assertEqual({start: block.function for start, block in cpu.blocks.items() if start in blocks},
+                     {start: block.function for start, block in blocks.items()})
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,121 @@
+import unittest
+from pathlib import Path
+
+from hack_assambler.src.hack_assambler import HackAssambler
+from hack_emulator.src.hack_cpu import HackCPU
+from vm_translator.src.labels import report_labels
+from vm_translator.main import get_files_from_dir, translate_stream
+
+
+class TestProfiler(unittest.TestCase):
+
+  def setUp(self):
+    self.assambler = HackAssambler(lines=[
+      "@3", "D=A", "@n", "M=D",   # 0-3
+      "(LOOP)",
+      "@n", "MD=M-1",             # 4-5
+      "@LOOP", "D;JGT",           # 6-7
+      "(END)",
+      "@END", "0;JMP",            # 8-9
+    ])
+    self.assambler.parse()
+    self.assambler.compile()
+
+  def test_counts_addresses_and_edges(self):
+    cpu = HackCPU(self.assambler.file_compiled)
+    profiler = cpu.enable_profiling()
+    cycles = cpu.run()
+    self.assertEqual(profiler.total, cycles)
+    self.assertEqual(list(profiler.address_counts), [1, 1, 1, 1, 3, 3, 3, 3, 1, 1])
+    self.assertEqual(profiler.edges, {(7, 4): 2, (9, 8): 1})
+    self.assertEqual(profiler.hot_edges(1), [((7, 4), 2)])
+
+  def test_profiled_run_gives_the_same_state(self):
+    profiled = HackCPU(self.assambler.file_compiled)
+    profiled.enable_profiling()
+    plain = HackCPU(self.assambler.file_compiled, compiled=True)
+    self.assertEqual(profiled.run(), plain.run())
+    self.assertEqual((profiled.pc, profiled.a, profiled.d, profiled.ram), (plain.pc, plain.a, plain.d, plain.ram))
+
+  def test_counts_by_label_and_report(self):
+    cpu = HackCPU(self.assambler.file_compiled)
+    profiler = cpu.enable_profiling()
+    cpu.run()
+    self.assertEqual(profiler.counts_by_label(self.assambler.labels), {"LOOP": 12, None: 4, "END": 2})
+    report = profiler.report(self.assambler.labels, self.assambler.file_parsed_cleaned, top=3)
+    self.assertIn("LOOP", report)
+    self.assertIn("ROM[7] -> ROM[4]", report)
+    self.assertIn("MD=M-1", report)
+
+  def test_disabled_profiling(self):
+    cpu = HackCPU(self.assambler.file_compiled)
+    cpu.enable_profiling()
+    cpu.disable_profiling()
+    cpu.run()
+    self.assertIsNone(cpu.profiler)
+
+  def test_vm_functions_are_reported_by_function(self):
+    asm_path = Path(__file__).parents[2] / "vm_translator" / "tests" / "test_folders" / "FibonacciElement" / "FibonacciElement.asm"
+    assambler = HackAssambler(str(asm_path))
+    assambler.parse()
+    assambler.compile()
+    self.assertEqual(set(report_labels(assambler.labels)), {"Sys.init", "Main.fibonacci"})
+    cpu = HackCPU(assambler.file_compiled)
+    profiler = cpu.enable_profiling()
+    cpu.run(6000)
+    counts = profiler.counts_by_label(report_labels(assambler.labels))
+    self.assertEqual(next(iter(counts)), "Main.fibonacci")
+    self.assertEqual(sum(counts.values()), profiler.total)
+
+  def test_shared_vm_routines_are_reported_on_their_own(self):
+    vm_dir = Path(__file__).parents[2] / "vm_translator" / "tests" / "test_folders" / "FibonacciElement"
+    lines = list(translate_stream(get_files_from_dir(vm_dir), compact_calls=True, compact_compares=True))
+    assambler = HackAssambler(lines=lines)
+    assambler.parse()
+    assambler.compile()
+    self.assertEqual(set(report_labels(assambler.labels)),
+                     {"Sys.init", "Main.fibonacci", "VM$CALL", "VM$RETURN", "VM$EQ", "VM$LT", "VM$GT"})
+
+
+class TestMemoryCounters(unittest.TestCase):
+
+  def test_counts_reads_and_writes_by_region(self):
+    cpu = HackCPU(HackAssambler.assemble_lines([
+      "@256", "D=A", "@SP", "M=D",   # write SP
+      "@SP", "A=M", "M=D",           # read SP, write the stack
+      "@5", "D=M",                   # read temp
+      "@16", "M=D+1",                # write static
+      "@SCREEN", "M=-1",             # write screen
+      "@KBD", "D=M",                 # read KBD
+    ]))
+    counters = cpu.enable_memory_counters()
+    cpu.run()
+    regions = counters.by_region()
+    self.assertEqual(regions["SP"], (1, 1))
+    self.assertEqual(regions["stack"], (0, 1))
+    self.assertEqual(regions["temp"], (1, 0))
+    self.assertEqual(regions["static"], (0, 1))
+    self.assertEqual(regions["screen"], (0, 1))
+    self.assertEqual(regions["KBD"], (1, 0))
+    self.assertEqual((counters.total_reads, counters.total_writes), (3, 4))
+    self.assertIsNone(cpu.profiler)
+
+  def test_vm_functions_are_reported_by_function(self):
+    asm_path = Path(__file__).parents[2] / "vm_translator" / "tests" / "test_folders" / "FibonacciElement" / "FibonacciElement.asm"
+    assambler = HackAssambler(str(asm_path))
+    assambler.parse()
+    assambler.compile()
+    cpu = HackCPU(assambler.file_compiled)
+    counters = cpu.enable_memory_counters()
+    profiler = cpu.enable_profiling()
+    cpu.run(6000)
+    by_label = counters.by_label(report_labels(assambler.labels))
+    self.assertEqual(next(iter(by_label)), "Main.fibonacci")
+    self.assertIn("stack", by_label["Main.fibonacci"])
+    self.assertEqual(sum(reads for reads, _ in counters.by_region().values()), counters.total_reads)
+    self.assertEqual(profiler.total, cpu.cycles)
+    self.assertIn("Main.fibonacci: ", counters.report(report_labels(assambler.labels)))
+
+
+if __name__ == "__main__":
+  unittest.main()
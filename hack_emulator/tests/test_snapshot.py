@@ -0,0 +1,129 @@
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from hack_assambler.src.hack_assambler import HackAssambler
+from hack_emulator.src.hack_cpu import HackCPU
+from hack_emulator.src.keyboard_trace import KeyboardTrace
+from hack_emulator.src.snapshot import Snapshot
+
+# adds the keyboard register to RAM[0] forever
+KEYBOARD_SUM = [
+  "(LOOP)",
+  "@KBD",
+  "D=M",
+  "@0",
+  "M=D+M",
+  "@LOOP",
+  "0;JMP",
+]
+
+
+class TestSnapshot(unittest.TestCase):
+
+  def setUp(self):
+    self.rom = HackAssambler.assemble_lines(KEYBOARD_SUM)
+
+  def test_restore_resumes_the_same_run(self):
+    cpu = HackCPU(self.rom)
+    cpu.ram[cpu.KBD] = 3
+    cpu.run(25)
+    snapshot = cpu.snapshot()
+    cpu.run(50)
+    expected = (cpu.pc, cpu.a, cpu.d, cpu.cycles, cpu.ram[0])
+
+    cpu.restore(Snapshot.from_bytes(snapshot.to_bytes()))
+    self.assertEqual(cpu.cycles, 25)
+    cpu.run(50)
+    self.assertEqual((cpu.pc, cpu.a, cpu.d, cpu.cycles, cpu.ram[0]), expected)
+
+  def test_snapshot_is_compact(self):
+    cpu = HackCPU(self.rom)
+    cpu.run(100)
+    self.assertLess(len(cpu.snapshot().to_bytes()), 1024)
+
+  def test_save_and_load(self):
+    cpu = HackCPU(self.rom)
+    cpu.ram[1000] = 0xBEEF
+    with TemporaryDirectory() as directory:
+      path = Path(directory) / "state.snap"
+      cpu.snapshot().save(path)
+      other = HackCPU(self.rom, compiled=True)
+      other.restore(Snapshot.load(path))
+    self.assertEqual(other.ram, cpu.ram)
+
+  def test_restore_on_another_program_raises(self):
+    snapshot = HackCPU(self.rom).snapshot()
+    with self.assertRaises(ValueError):
+      HackCPU(self.rom[:-1]).restore(snapshot)
+
+  def test_invalid_data_raises(self):
+    with self.assertRaises(ValueError):
+      Snapshot.from_bytes(b"not a snapshot at all, really not one")
+
+
+class TestKeyboardTrace(unittest.TestCase):
+
+  def setUp(self):
+    self.rom = HackAssambler.assemble_lines(KEYBOARD_SUM)
+
+  def record(self, compiled: bool = False) -> HackCPU:
+    cpu = HackCPU(self.rom, compiled)
+    cpu.keyboard_trace = KeyboardTrace()
+    cpu.run(10)
+    cpu.set_keyboard(5)
+    cpu.run(21)
+    cpu.set_keyboard(0)
+    cpu.run(7)
+    cpu.set_keyboard(130)
+    cpu.run(13)
+    return cpu
+
+  def test_records_cycle_stamped_keys(self):
+    cpu = self.record()
+    self.assertEqual(cpu.keyboard_trace.events, [(10, 5), (31, 0), (38, 130)])
+
+  def test_replay_reproduces_the_run(self):
+    recorded = self.record()
+    trace = KeyboardTrace.from_bytes(recorded.keyboard_trace.to_bytes())
+    for compiled in (False, True):
+      with self.subTest(compiled=compiled):
+        cpu = HackCPU(self.rom, compiled)
+        self.assertEqual(trace.replay(cpu, recorded.cycles), recorded.cycles)
+        self.assertEqual(cpu.ram, recorded.ram)
+        self.assertEqual((cpu.pc, cpu.a, cpu.d), (recorded.pc, recorded.a, recorded.d))
+
+  def test_replay_from_a_snapshot(self):
+    recorded = self.record()
+    cpu = HackCPU(self.rom)
+    recorded.keyboard_trace.replay(cpu, 35)
+    snapshot = cpu.snapshot()
+
+    cpu = HackCPU(self.rom)
+    cpu.restore(snapshot)
+    recorded.keyboard_trace.replay(cpu, recorded.cycles)
+    self.assertEqual(cpu.ram, recorded.ram)
+
+  def test_replay_frame_by_frame(self):
+    """Replayed in chunks, as FrameRecorder does: an event at the start of a chunk is still written"""
+    recorded = self.record()
+    cpu = HackCPU(self.rom)
+    while cpu.cycles < recorded.cycles:
+      recorded.keyboard_trace.replay(cpu, min(cpu.cycles + 5, recorded.cycles))
+    self.assertEqual(cpu.ram, recorded.ram)
+
+  def test_events_must_be_in_order(self):
+    trace = KeyboardTrace([(10, 1)])
+    with self.assertRaises(ValueError):
+      trace.record(5, 2)
+
+  def test_save_and_load(self):
+    trace = self.record().keyboard_trace
+    with TemporaryDirectory() as directory:
+      path = Path(directory) / "keys.trace"
+      trace.save(path)
+      self.assertEqual(KeyboardTrace.load(path).events, trace.events)
+
+
+if __name__ == "__main__":
+  unittest.main()
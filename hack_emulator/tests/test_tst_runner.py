@@ -0,0 +1,121 @@
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from hack_emulator.src.tst_runner import OutputColumn, TstRunner, TstScript, run_scripts
+
+
+class TestTstScript(unittest.TestCase):
+
+  def test_parse_commands_and_repeat_blocks(self):
+    source = """
+      // comment
+      load Prog.asm, /* block
+      comment */ output-file Prog.out,
+      set RAM[0] 256,
+      repeat 10 {
+        ticktock;
+        repeat 2 { tick, tock; }
+      }
+      output-list RAM[0]%D1.6.1
+                  RAM[1]%B1.16.1;
+      output;
+    """
+    self.assertEqual(TstScript.parse(source), [
+      ["load", "Prog.asm"],
+      ["output-file", "Prog.out"],
+      ["set", "RAM[0]", "256"],
+      ["repeat", "10", [["ticktock"], ["repeat", "2", [["tick"], ["tock"]]]]],
+      ["output-list", "RAM[0]%D1.6.1", "RAM[1]%B1.16.1"],
+      ["output"],
+    ])
+
+  def test_parse_errors(self):
+    for source in ("repeat 3 { ticktock;", "ticktock; }", "while RAM[0] = 0 { ticktock; }", "ticktock"):
+      with self.subTest(source=source):
+        with self.assertRaises(SyntaxError):
+          TstScript.parse(source)
+
+
+class TestOutputColumn(unittest.TestCase):
+
+  def test_header_is_centered(self):
+    self.assertEqual(OutputColumn.parse("RAM[0]%D1.6.1").header(), " RAM[0] ")
+    self.assertEqual(OutputColumn.parse("RAM[256]%D1.6.1").header(), "RAM[256]")
+    self.assertEqual(OutputColumn.parse("RAM[16384]%D1.6.1").header(), "RAM[1638")
+
+  def test_cells(self):
+    self.assertEqual(OutputColumn.parse("RAM[0]%D1.6.1").cell(0xFFFE), "     -2 ")
+    self.assertEqual(OutputColumn.parse("A%X1.4.1").cell(0xBEEF), " BEEF ")
+    self.assertEqual(OutputColumn.parse("D%B1.16.1").cell(5), " 0000000000000101 ")
+
+
+class TestTstRunner(unittest.TestCase):
+
+  def setUp(self):
+    self.tmp_dir = TemporaryDirectory()
+    self.tmp_path = Path(self.tmp_dir.name)
+    (self.tmp_path / "Mult.asm").write_text("\n".join([
+      "@R2", "M=0", "(LOOP)", "@R1", "D=M", "@END", "D;JEQ", "@R0", "D=M", "@R2", "M=D+M", "@R1", "M=M-1",
+      "@LOOP", "0;JMP", "(END)", "@END", "0;JMP",
+    ]))
+
+  def tearDown(self):
+    self.tmp_dir.cleanup()
+
+  def _write_script(self, name: str, expected: str, ticks: int = 100) -> Path:
+    (self.tmp_path / f"{name}.cmp").write_text(expected)
+    script = self.tmp_path / f"{name}.tst"
+    script.write_text(
+      f"load Mult.asm, compare-to {name}.cmp, output-list RAM[0]%D2.6.2 RAM[1]%D2.6.2 RAM[2]%D2.6.2;\n"
+      f"set RAM[0] 6, set RAM[1] 7, repeat {ticks} {{ ticktock; }} output;\n"
+      "set PC 0, set RAM[0] -3, set RAM[1] 2, repeat 100 { ticktock; } output;\n"
+    )
+    return script
+
+  def test_passing_script(self):
+    script = self._write_script("Mult", "|  RAM[0]  |  RAM[1]  |  RAM[2]  |\n|       6  |       0  |      42  |\n"
+                                        "|      -3  |       0  |      -6  |\n")
+    runner = TstRunner(script)
+    runner.run()
+    self.assertIsNone(runner.compare())
+
+  def test_wildcards_and_mismatch(self):
+    script = self._write_script("Mult", "|  RAM[0]  |  RAM[1]  |  RAM[2]  |\n|  ******  |       0  |      42  |\n"
+                                        "|      -3  |       0  |      -5  |\n")
+    runner = TstRunner(script)
+    runner.run()
+    self.assertIn("Line 3", runner.compare())
+
+  def test_halted_program_keeps_the_time(self):
+    script = self._write_script("Mult", "")
+    runner = TstRunner(script)
+    runner.run()
+    self.assertEqual(runner.cpu.cycles, 200)
+
+  def test_set_pc_after_a_halt(self):
+    (self.tmp_path / "Halt.asm").write_text("\n".join(["(LOOP)", "@LOOP", "0;JMP", "D=1", "D=D+1"]))
+    (self.tmp_path / "Halt.cmp").write_text("|  PC   | time  |\n|     0 |     4 |\n|    13 |    14 |\n")
+    script = self.tmp_path / "Halt.tst"
+    script.write_text(
+      "load Halt.asm, compare-to Halt.cmp, output-list PC%D1.5.1 time%D1.5.1;\n"
+      "repeat 4 { ticktock; } output;\n"
+      "set PC 3, repeat 10 { ticktock; } output;\n"
+    )
+    runner = TstRunner(script)
+    runner.run()
+    self.assertIsNone(runner.compare())
+
+  def test_run_scripts_in_parallel(self):
+    good = self._write_script("Good", "|  RAM[0]  |  RAM[1]  |  RAM[2]  |\n|       6  |       0  |      42  |\n")
+    bad = self._write_script("Bad", "|  RAM[0]  |  RAM[1]  |  RAM[2]  |\n|       6  |       0  |      41  |\n")
+    missing = self.tmp_path / "Missing.tst"
+    missing.write_text("load Missing.asm;")
+    results = run_scripts([good, bad, missing], jobs=2, compiled=True)
+    self.assertEqual([result.script_path for result in results], [good, bad, missing])
+    self.assertEqual([result.passed for result in results], [True, False, False])
+    self.assertIn("FileNotFoundError", results[2].error)
+
+
+if __name__ == "__main__":
+  unittest.main()
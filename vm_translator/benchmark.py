@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the VM optimizer: ROM words, labels and cycles of programs translated with and without
+VMOptimizer (constant folding and superinstructions). The compact modes, if given, are used on both sides.
+
+  - path cycles: cycles to run every command once, counting the words of each command up to its first
+    unconditional jump (the not taken path of its branches). Known without running the program.
+  - run cycles: cycles until the program halts, for the programs with a bootstrap (several files).
+"""
+
+import argparse
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from hack_assambler.src.hack_assambler import HackAssambler
+from hack_emulator.src.hack_cpu import HackCPU
+from vm_translator.main import count_rom_words, get_files, get_translator
+from vm_translator.src.vm_parser import Parser
+from vm_translator.src.vm_translator_class import VMTranslator
+
+DEFAULT_PROGRAMS = [
+  Path(__file__).parents[1] / "2048",
+  *(Path(__file__).parent / "tests" / "test_folders" / name for name in ("FibonacciElement", "NestedCall", "StaticsTest")),
+]
+MAX_RUN_CYCLES = 10_000_000
+
+
+def path_cycles(lines: Iterable[str]) -> int:
+  """Cycles to run every command once: the words of each commented block up to its first unconditional jump."""
+  cycles = 0
+  counting = True
+  for line in lines:
+    if line.startswith("//"):
+      counting = True
+    elif counting and not line.startswith("("):
+      cycles += 1
+      counting = not line.endswith(";JMP")
+  return cycles
+
+
+class ProgramStats:
+  def __init__(self, words: int, labels: int, path_cycles: int, run_cycles: Optional[int], fused: Counter,
+               folded: Counter):
+    self.words = words
+    self.labels = labels
+    self.path_cycles = path_cycles
+    self.run_cycles = run_cycles
+    self.fused = fused
+    # commands removed by ConstantFolder, per rule
+    self.folded = folded
+
+  def __repr__(self):
+    return (f"ProgramStats(words={self.words}, labels={self.labels}, path_cycles={self.path_cycles}, "
+            f"run_cycles={self.run_cycles})")
+
+
+def measure(input_path: Path, **options) -> ProgramStats:
+  """Translate the program with the options and measure it, running it if it has a bootstrap."""
+  files = get_files(input_path)
+  namespaced = len(files) > 1
+  lines = list(VMTranslator(**options).get_program_header(bootstrap=namespaced))
+  fused, folded = Counter(), Counter()
+  for file in files:
+    translator = get_translator(file, namespaced, **options)
+    lines.extend(translator.translate_stream(Parser(file).stream()))
+    if translator.optimizer:
+      fused.update(translator.optimizer.fused)
+      folded.update(translator.optimizer.folder.removed)
+  words, labels = count_rom_words(lines)
+  run_cycles = None
+  if namespaced and any(file.stem == "Sys" for file in files):
+    cpu = HackCPU(HackAssambler.assemble_lines(lines))
+    run_cycles = cpu.run(MAX_RUN_CYCLES)
+  return ProgramStats(words, labels, path_cycles(lines), run_cycles, fused, folded)
+
+
+def _change(before: Optional[int], after: Optional[int]) -> str:
+  if before is None or after is None:
+    return "-"
+  return f"{before} -> {after} ({(after - before) / before if before else 0:+.1%})"
+
+
+def benchmark(programs: List[Path], **options) -> str:
+  lines = [f"{'program':<18} {'words':<26} {'labels':<22} {'path cycles':<26} run cycles"]
+  fused, folded = Counter(), Counter()
+  for program in programs:
+    plain = measure(program, **options)
+    optimized = measure(program, optimize=True, **options)
+    fused.update(optimized.fused)
+    folded.update(optimized.folded)
+    lines.append(f"{program.name:<18} {_change(plain.words, optimized.words):<26} "
+                 f"{_change(plain.labels, optimized.labels):<22} {_change(plain.path_cycles, optimized.path_cycles):<26} "
+                 f"{_change(plain.run_cycles, optimized.run_cycles)}")
+  lines.append("superinstructions: " + ", ".join(f"{rule} {count}" for rule, count in fused.most_common()))
+  lines.append("commands removed by constant folding: " +
+               ", ".join(f"{rule} {count}" for rule, count in folded.most_common()))
+  return "\n".join(lines)
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Measure the VM optimizer on VM programs")
+  parser.add_argument("programs", nargs="*", type=Path, help="VM files or directories (default: 2048 and test programs)")
+  parser.add_argument("--compact-calls", action="store_true", help="Translate both sides with compact calls")
+  parser.add_argument("--compact-compares", action="store_true", help="Translate both sides with compact compares")
+  args = parser.parse_args()
+
+  programs = args.programs or DEFAULT_PROGRAMS
+  missing = [program for program in programs if not program.exists()]
+  if missing:
+    print(f"Error: '{missing[0]}' does not exist", file=sys.stderr)
+    sys.exit(1)
+  print(benchmark(programs, compact_calls=args.compact_calls, compact_compares=args.compact_compares))
+
+
+if __name__ == "__main__":
+  main()
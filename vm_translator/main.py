@@ -6,7 +6,10 @@ VM Translator - Translates VM code to Hack assembly language
 import argparse
 import os
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 from vm_translator.src.code_writer import CodeWriter
 from vm_translator.src.vm_parser import Parser
@@ -55,6 +58,38 @@ def main():
     default=None,
   )
 
+  parser.add_argument(
+    "-j",
+    "--jobs",
+    type=int,
+    help="Number of worker processes translating the files of a directory, 0 for one per CPU "
+         "(default: 1, the files are streamed one after the other)",
+    default=1,
+  )
+
+  parser.add_argument(
+    "--compact-calls",
+    action="store_true",
+    help="Jump to a call and a return routine shared by the whole program instead of inlining them, "
+         "and report the ROM words saved",
+  )
+
+  parser.add_argument(
+    "--compact-compares",
+    action="store_true",
+    help="Call a routine shared by the whole program for every eq, lt and gt instead of inlining them, "
+         "and report the ROM words and labels saved",
+  )
+
+  parser.add_argument(
+    "-O",
+    "--optimize",
+    action="store_true",
+    help="Fold constant expressions and fuse recurring command sequences into superinstructions "
+         "(see VMOptimizer), "
+         "and report the ROM words and labels saved",
+  )
+
   args = parser.parse_args()
 
   # Use input argument or fall back to INPUT_PATH environment variable
@@ -84,7 +119,14 @@ def main():
 
   print(f"Input: {input_path}")
   print(f"Output: {output_path}")
-  translate(input_path, output_path)
+  start = time.perf_counter()
+  options = {"compact_calls": args.compact_calls, "compact_compares": args.compact_compares,
+             "optimize": args.optimize}
+  counter = RomCounter()
+  lines = translate(input_path, output_path, jobs=args.jobs, counter=counter, **options)
+  print(f"Translated {lines} lines in {time.perf_counter() - start:.3f}s")
+  if any(options.values()):
+    print(size_report(input_path, counter.words, counter.labels, **options))
 
 
 def get_file_name(input_path: Path):
@@ -92,28 +134,112 @@ def get_file_name(input_path: Path):
 
 
 def get_files_from_dir(input_path: Path):
-  return list(input_path.glob("*.vm"))
+  # sorted, so the output does not depend on the order of the directory entries
+  return sorted(input_path.glob("*.vm"))
 
 
-def translate(input_path: Path, output_path):
+def get_files(input_path: Path) -> List[Path]:
   if input_path.is_dir():
-    files = get_files_from_dir(input_path)
+    return get_files_from_dir(input_path)
+  return [input_path]
+
+
+def translate(input_path: Path, output_path, jobs: int = 1, counter: Optional["RomCounter"] = None, **options):
+  """
+  Translate a .vm file or every .vm file of a directory into output_path. With jobs other than 1 the
+  files are translated by a pool of processes (0 or None: one per CPU) and written in the same order.
+  The options (compact_calls, compact_compares, optimize) are given to every VMTranslator. With a
+  counter, the ROM words and labels are counted while the lines are written.
+  Returns the number of lines written.
+  """
+  files = get_files(input_path)
+
+  if jobs == 1 or len(files) <= 1:
+    lines = translate_stream(files, **options)
   else:
-    files = [input_path]
+    lines = translate_parallel(files, jobs, **options)
+  if counter is not None:
+    lines = counter.count(lines)
+  return CodeWriter(output_file=output_path).write_stream(lines)
 
-  translation = []
-  if len(files) > 1:
-    translator_init = VMTranslator()
-    translation.extend(translator_init.get_bootstrap_code())
+
+def get_translator(file: Path, namespaced: bool, **options) -> VMTranslator:
+  # with several files the generated labels get the file name as namespace, they would collide otherwise
+  file_name = get_file_name(file)
+  return VMTranslator(file_name=file_name, label_namespace=file_name if namespaced else "", **options)
+
+
+def translate_stream(files: List[Path], **options) -> Iterator[str]:
+  """The assembly of the files, produced while they are parsed: no file is ever held in memory."""
+  yield from VMTranslator(**options).get_program_header(bootstrap=len(files) > 1)
   for file in files:
     parser = Parser(file)
-    file_name = get_file_name(file)
-    parsed_file = parser.parse()
-    translator = VMTranslator(file_name=file_name)
-    translation.extend(translator.translate(parsed_file))
-
-  code_writer = CodeWriter(output_file=output_path)
-  code_writer.write_file(translation)
+    translator = get_translator(file, len(files) > 1, **options)
+    yield from translator.translate_stream(parser.stream())
+
+
+def translate_file(file: Path, namespaced: bool, options: dict) -> str:
+  """
+  Translation of a single file, as one block of text: it is much cheaper to send back from a worker
+  process than a list of lines. Module level so it can be sent to the worker processes.
+  """
+  translator = get_translator(file, namespaced, **options)
+  return "\n".join(translator.translate_stream(Parser(file).stream()))
+
+
+def translate_parallel(files: List[Path], jobs: Optional[int] = None, **options) -> Iterator[str]:
+  """
+  The same lines as translate_stream, with the files translated in a pool of processes. Each file only
+  depends on its own content, so the results are simply written after the bootstrap in file order.
+  """
+  namespaced = len(files) > 1
+  yield from VMTranslator(**options).get_program_header(bootstrap=namespaced)
+  jobs = jobs or os.cpu_count() or 1
+  with ProcessPoolExecutor(max_workers=jobs) as executor:
+    # an empty file gives an empty block, it would be written as an empty line
+    yield from filter(None, executor.map(translate_file, files, [namespaced] * len(files), [options] * len(files)))
+
+
+def count_rom_words(lines: Iterable[str]) -> Tuple[int, int]:
+  """ROM words and labels of assembly lines: every line but the comments and the labels is a word."""
+  words = labels = 0
+  for line in lines:
+    if line.startswith("("):
+      labels += 1
+    elif not line.startswith("//"):
+      words += 1
+  return words, labels
+
+
+class RomCounter:
+  """Counts the ROM words and labels of the assembly going through count, see count_rom_words."""
+
+  def __init__(self):
+    self.words = 0
+    self.labels = 0
+
+  def count(self, lines: Iterable[str]) -> Iterator[str]:
+    for line in lines:
+      # the parallel translation gives blocks of lines
+      words, labels = count_rom_words(line.split("\n"))
+      self.words += words
+      self.labels += labels
+      yield line
+
+  def __repr__(self):
+    return f"RomCounter(words={self.words}, labels={self.labels})"
+
+
+def size_report(input_path: Path, words: int, labels: int, **options) -> str:
+  """
+  ROM words and labels of the program translated with the options, as counted while writing it, next to
+  the ones of the program translated without them.
+  """
+  inline_words, inline_labels = count_rom_words(translate_stream(get_files(input_path)))
+  saved = inline_words - words
+  modes = ", ".join(name.replace("_", " ") for name, enabled in options.items() if enabled)
+  return (f"{modes.capitalize()}: {words} ROM words instead of {inline_words}, "
+          f"{saved} saved ({saved / inline_words if inline_words else 0:.1%}), {labels} labels instead of {inline_labels}")
 
 
 if __name__ == "__main__":
@@ -1,14 +1,32 @@
+from itertools import islice
 from pathlib import Path
-from typing import List
+from typing import Iterable, List
 
 
 class CodeWriter:
+  # lines joined and written at once by write_stream
+  CHUNK_LINES = 4096
+
   def __init__(self, output_file: Path):
     self.output_path = output_file
 
   def write_file(self, instructions: List[str]):
+    self.write_stream(instructions)
+
+  def write_stream(self, instructions: Iterable[str]) -> int:
+    """
+    Write the instructions as they are produced, in chunks of CHUNK_LINES items, so the output starts
+    right away and only one chunk is in memory. An item may also be a block of lines joined by new lines.
+    Returns the number of lines written.
+    """
+    instructions = iter(instructions)
+    lines = 0
     with open(self.output_path, "w") as file:
-      number_of_lines = len(instructions)
-      for i, instruction in enumerate(instructions):
-        line_number = i + 1
-        file.write(instruction + '\n') if line_number < number_of_lines else file.write(instruction)
+      while chunk := list(islice(instructions, self.CHUNK_LINES)):
+        # lines are separated, not terminated: there is no new line after the last one
+        if lines:
+          file.write("\n")
+        text = "\n".join(chunk)
+        file.write(text)
+        lines += text.count("\n") + 1
+    return lines
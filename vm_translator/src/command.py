@@ -1,5 +1,5 @@
 from vm_translator.src.models import CommandType, ArithmeticCommandTypes, MemorySegment, BranchingCommand
-from typing import Union
+from typing import List, Union
 
 
 class Command:
@@ -48,6 +48,9 @@ class Command:
   def is_call(self):
     return self.command_type == CommandType.CALL
 
+  def is_super(self):
+    return self.command_type == CommandType.SUPER
+
   def is_add(self):
     return self.arg1 == ArithmeticCommandTypes.ADD
 
@@ -86,3 +89,23 @@ class Command:
 
   def is_pointer_segment(self):
     return self.arg1 == MemorySegment.POINTER
+
+
+class SuperCommand(Command):
+  """
+  A superinstruction: a sequence of commands fused by VMOptimizer, that VMTranslator translates as a
+  whole. arg1 is the name of the rule that matched, commands the original commands.
+  """
+
+  def __init__(self, rule: str, commands: List[Command]):
+    super().__init__(command_type=CommandType.SUPER, arg1=rule)
+    self.commands = commands
+
+  def __str__(self):
+    return " / ".join(map(str, self.commands))
+
+  def __repr__(self):
+    return f"SuperCommand(rule={self.arg1!r}, commands={self.commands!r})"
+
+  def __eq__(self, value):
+    return isinstance(value, SuperCommand) and self.arg1 == value.arg1 and self.commands == value.commands
@@ -0,0 +1,133 @@
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from vm_translator.src.command import Command
+from vm_translator.src.models import ArithmeticCommandTypes, BranchingCommand, CommandType, MemorySegment
+
+WORD_MASK = 0xFFFF
+SIGN_BIT = 0x8000
+# largest value of 'push constant', an A-instruction holds 15 bits
+MAX_CONSTANT = 0x7FFF
+TRUE = WORD_MASK
+
+
+def _compare(difference: int, operator: ArithmeticCommandTypes) -> int:
+  """x op y as VMTranslator computes it: from the sign of x - y on 16 bits, overflow included."""
+  difference &= WORD_MASK
+  if operator == ArithmeticCommandTypes.EQ:
+    holds = difference == 0
+  elif operator == ArithmeticCommandTypes.LT:
+    holds = difference >= SIGN_BIT
+  else:
+    holds = difference != 0 and difference < SIGN_BIT
+  return TRUE if holds else 0
+
+
+class ConstantFolder:
+  """
+  Folds the arithmetic on constants of a stream of VM commands: the constants pushed are kept back
+  until a command uses them, operations on known values are computed on the spot (with the 16 bit
+  wrap around of the Hack ALU) and only their result is pushed. Values that do not fit in the 15 bits
+  of 'push constant' are pushed as the 'neg' of their opposite (and -32768 as 'not 32767').
+  Nothing is folded across a command that is not a push constant or arithmetic, e.g. a label.
+
+  Rules:
+    - fold: an unary operation on a constant, or a binary one on two constants.
+    - identity: 'add 0', 'sub 0', 'or 0' and 'and -1' leave the value below unchanged.
+    - cancel: 'not / not' and 'neg / neg' on any value.
+    - branch: an 'if-goto' on a constant becomes a 'goto', or nothing if the constant is false.
+  """
+  RULES = ("fold", "identity", "cancel", "branch")
+  UNARY = {
+    ArithmeticCommandTypes.NEG: lambda x: -x,
+    ArithmeticCommandTypes.NOT: lambda x: ~x,
+  }
+  BINARY = {
+    ArithmeticCommandTypes.ADD: lambda x, y: x + y,
+    ArithmeticCommandTypes.SUB: lambda x, y: x - y,
+    ArithmeticCommandTypes.AND: lambda x, y: x & y,
+    ArithmeticCommandTypes.OR: lambda x, y: x | y,
+    ArithmeticCommandTypes.EQ: lambda x, y: _compare(x - y, ArithmeticCommandTypes.EQ),
+    ArithmeticCommandTypes.LT: lambda x, y: _compare(x - y, ArithmeticCommandTypes.LT),
+    ArithmeticCommandTypes.GT: lambda x, y: _compare(x - y, ArithmeticCommandTypes.GT),
+  }
+  # operations leaving x unchanged with this constant as y
+  IDENTITIES = {
+    ArithmeticCommandTypes.ADD: 0,
+    ArithmeticCommandTypes.SUB: 0,
+    ArithmeticCommandTypes.OR: 0,
+    ArithmeticCommandTypes.AND: TRUE,
+  }
+
+  def __init__(self):
+    # number of commands removed by every rule
+    self.removed: Dict[str, int] = dict.fromkeys(self.RULES, 0)
+
+  @property
+  def total_removed(self) -> int:
+    return sum(self.removed.values())
+
+  def optimize(self, commands: Iterable[Command]) -> List[Command]:
+    return list(self.stream(commands))
+
+  def stream(self, commands: Iterable[Command]) -> Iterator[Command]:
+    # values pushed and not emitted yet, and an unary operation waiting for the one that cancels it
+    constants: List[int] = []
+    unary: Optional[Command] = None
+    for command in commands:
+      if unary is not None:
+        if command.is_arithmetic() and command.arg1 == unary.arg1:
+          self.removed["cancel"] += 2
+          unary = None
+          continue
+        yield unary
+        unary = None
+      if command.is_push() and command.is_constant_segment():
+        constants.append(command.arg2 & WORD_MASK)
+      elif command.is_arithmetic() and command.arg1 in self.UNARY:
+        if constants:
+          constants[-1] = self.UNARY[command.arg1](constants[-1]) & WORD_MASK
+          self.removed["fold"] += 1
+        else:
+          unary = command
+      elif command.is_arithmetic() and len(constants) >= 2:
+        y = constants.pop()
+        constants[-1] = self.BINARY[command.arg1](constants[-1], y) & WORD_MASK
+        self.removed["fold"] += 2
+      elif command.is_arithmetic() and len(constants) == 1 and self.IDENTITIES.get(command.arg1) == constants[0]:
+        constants.pop()
+        self.removed["identity"] += 2
+      elif command.is_branching() and command.arg1 == BranchingCommand.IF_GOTO and constants:
+        taken = constants.pop() != 0
+        yield from self._push_all(constants)
+        constants = []
+        if taken:
+          self.removed["branch"] += 1
+          yield Command(CommandType.BRANCHING, BranchingCommand.GOTO, command.arg2)
+        else:
+          self.removed["branch"] += 2
+      else:
+        yield from self._push_all(constants)
+        constants = []
+        yield command
+    if unary is not None:
+      yield unary
+    yield from self._push_all(constants)
+
+  def _push_all(self, constants: List[int]) -> Iterator[Command]:
+    for value in constants:
+      commands = self.push_value(value)
+      # a value that needs a 'neg' takes back one of the commands removed to compute it
+      self.removed["fold"] -= len(commands) - 1
+      yield from commands
+
+  @staticmethod
+  def push_value(value: int) -> List[Command]:
+    """Commands pushing a 16 bit value: 'push constant' takes 15 bits, the others are negated."""
+    value &= WORD_MASK
+    if value <= MAX_CONSTANT:
+      return [Command(CommandType.PUSH, MemorySegment.CONSTANT, value)]
+    if value == SIGN_BIT:
+      return [Command(CommandType.PUSH, MemorySegment.CONSTANT, MAX_CONSTANT),
+              Command(CommandType.ARITHMETIC, ArithmeticCommandTypes.NOT)]
+    return [Command(CommandType.PUSH, MemorySegment.CONSTANT, -value & WORD_MASK),
+            Command(CommandType.ARITHMETIC, ArithmeticCommandTypes.NEG)]
@@ -0,0 +1,46 @@
+import re
+from typing import Dict, Tuple
+
+# Names of the labels VMTranslator generates. The labels generated inside a file are prefixed by the
+# namespace of the file, if any, 'Main$END_1', see VMTranslator label_namespace.
+
+# shared routines of the compact calls mode, emitted once per program by get_program_header
+CALL_ROUTINE = "VM$CALL"
+RETURN_ROUTINE = "VM$RETURN"
+ROUTINES_END = "VM$ROUTINES_END"
+# one shared routine per comparison, in the compact compares mode
+COMPARE_ROUTINE = "VM${}"
+
+# Labels generated inside a function, they are not a meaningful unit to report on
+GENERATED_LABELS = re.compile(r"^([^$]*\$)?(RETURN_|(EQ|LT|GT)_(TRUE|RETURN)_\d|END_\d)")
+# Return address of a call, RETURN_{function}_{counter}, the called function is a label of its own
+RETURN_LABEL = re.compile(r"^([^$]*\$)?RETURN_(?P<function>.+)_\d+$")
+# Routines shared by the whole program, reported as functions
+SHARED_ROUTINES = re.compile(r"^VM\$(CALL|RETURN|EQ|LT|GT)$")
+
+
+def return_label(prefix: str, function_name: str, counter: int) -> str:
+  return f"{prefix}RETURN_{function_name}_{counter}"
+
+
+def compare_labels(prefix: str, operator: str, counter: int) -> Tuple[str, str]:
+  """Labels of an inlined comparison: where the true value is pushed, and the end of the comparison."""
+  return f"{prefix}{operator}_TRUE_{counter}", f"{prefix}END_{counter}"
+
+
+def compare_return_label(prefix: str, operator: str, counter: int) -> str:
+  """Return address of a call to the shared routine of a comparison."""
+  return f"{prefix}{operator}_RETURN_{counter}"
+
+
+def report_labels(labels: Dict[str, int]) -> Dict[str, int]:
+  """
+  Labels to aggregate a profile or a report by. For VMTranslator output these are the functions, found through the
+  return labels of their calls, and the shared routines: the 'label' commands inside a function also
+  give .asm labels, that would split the function. Otherwise, every label not generated by VMTranslator.
+  """
+  functions = {match.group("function") for match in map(RETURN_LABEL.match, labels) if match}
+  if functions:
+    functions.update(filter(SHARED_ROUTINES.match, labels))
+    return {label: address for label, address in labels.items() if label in functions}
+  return {label: address for label, address in labels.items() if not GENERATED_LABELS.match(label)}
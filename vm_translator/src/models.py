@@ -9,6 +9,8 @@ class CommandType(Enum):
   FUNCTION = 'function'
   CALL = 'call'
   RETURN = 'return'
+  # several commands fused by VMOptimizer
+  SUPER = 'super'
 
 
 class ArithmeticCommandTypes(Enum):
@@ -0,0 +1,108 @@
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from vm_translator.src.command import Command, SuperCommand
+from vm_translator.src.constant_folder import ConstantFolder
+from vm_translator.src.models import ArithmeticCommandTypes, BranchingCommand, MemorySegment
+
+
+class VMOptimizer:
+  """
+  Fuses recurring sequences of VM commands, as the Jack compiler emits them, into superinstructions
+  (SuperCommand) that VMTranslator lowers to much shorter Hack code than the commands one by one: the
+  values go through D instead of the stack. Runs between the Parser and VMTranslator, on a window of
+  the next WINDOW commands, so it can be streamed. Sequences never span a label, which is a command
+  of its own. The constant expressions are folded first (see ConstantFolder), which leaves more
+  'push constant' to fuse.
+
+  Rules, tried in this order at every command:
+    - increment: 'push S i / push constant c / add|sub / pop S i', S i updated in place.
+    - branch_compare: '[push constant c /] eq|lt|gt / [not /] if-goto L', a conditional jump on x - y
+      (or x - c) without materializing the boolean.
+    - move: 'push X / pop Y', X copied to Y through D.
+    - branch_not: 'not / if-goto L', a jump if the popped value is not true (-1).
+  """
+  RULES = ("increment", "branch_compare", "move", "branch_not")
+  WINDOW = 4
+
+  def __init__(self):
+    self.folder = ConstantFolder()
+    self.fused: Dict[str, int] = dict.fromkeys(self.RULES, 0)
+    # number of commands replaced by the superinstructions, per rule
+    self.fused_commands: Dict[str, int] = dict.fromkeys(self.RULES, 0)
+
+  @property
+  def total_fused(self) -> int:
+    return sum(self.fused.values())
+
+  def optimize(self, commands: Iterable[Command]) -> List[Command]:
+    return list(self.stream(commands))
+
+  def stream(self, commands: Iterable[Command]) -> Iterator[Command]:
+    commands = self.folder.stream(commands)
+    window = deque()
+    while True:
+      while len(window) < self.WINDOW:
+        command = next(commands, None)
+        if command is None:
+          break
+        window.append(command)
+      if not window:
+        return
+      fused = self._match(list(window))
+      if fused is None:
+        yield window.popleft()
+        continue
+      for _ in fused.commands:
+        window.popleft()
+      self.fused[fused.arg1] += 1
+      self.fused_commands[fused.arg1] += len(fused.commands)
+      yield fused
+
+  def _match(self, window: List[Command]) -> Optional[SuperCommand]:
+    for rule in self.RULES:
+      length = getattr(self, f"_match_{rule}")(window)
+      if length:
+        return SuperCommand(rule, window[:length])
+    return None
+
+  @staticmethod
+  def _match_increment(window: List[Command]) -> int:
+    if len(window) < 4:
+      return 0
+    push, constant, operation, pop = window
+    if (push.is_push() and not push.is_constant_segment() and constant.is_push() and constant.is_constant_segment()
+        and operation.is_arithmetic() and (operation.is_add() or operation.is_sub())
+        and pop.is_pop() and pop.arg1 == push.arg1 and pop.arg2 == push.arg2):
+      return 4
+    return 0
+
+  @staticmethod
+  def _match_branch_compare(window: List[Command]) -> int:
+    index = 1 if window[0].is_push() and window[0].is_constant_segment() else 0
+    if index >= len(window) or not (window[index].is_arithmetic() and window[index].is_eq_lt_gt()):
+      return 0
+    index += 1
+    if index < len(window) and window[index].is_arithmetic() and window[index].arg1 == ArithmeticCommandTypes.NOT:
+      index += 1
+    if index < len(window) and _is_if_goto(window[index]):
+      return index + 1
+    return 0
+
+  @staticmethod
+  def _match_move(window: List[Command]) -> int:
+    if len(window) >= 2 and window[0].is_push() and window[1].is_pop() \
+        and window[1].arg1 != MemorySegment.CONSTANT:
+      return 2
+    return 0
+
+  @staticmethod
+  def _match_branch_not(window: List[Command]) -> int:
+    if len(window) >= 2 and window[0].is_arithmetic() and window[0].arg1 == ArithmeticCommandTypes.NOT \
+        and _is_if_goto(window[1]):
+      return 2
+    return 0
+
+
+def _is_if_goto(command: Command) -> bool:
+  return command.is_branching() and command.arg1 == BranchingCommand.IF_GOTO
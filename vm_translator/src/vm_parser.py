@@ -1,6 +1,6 @@
 from vm_translator.src.command import Command
 from vm_translator.src.models import CommandType, ArithmeticCommandTypes, MemoryCommand, MemorySegment, BranchingCommand
-from typing import List
+from typing import Iterator, List
 from pathlib import Path
 
 
@@ -9,21 +9,18 @@ class Parser:
     self.file_path = file_path
 
   def parse(self) -> List[Command]:
-    clean_file = []
+    return list(self.stream())
+
+  def stream(self) -> Iterator[Command]:
+    """Yield the commands one by one while the file is read, nothing else is kept in memory."""
     with open(self.file_path, "r") as file:
-      lines = file.readlines()
-      for line in lines:
+      for line in file:
         line = line.strip()
         if not line or line.startswith("//"):
           continue
         elif '//' in line:
           line = line.split("//")[0].strip()
-          command = self._parse_line(line)
-          clean_file.append(command)
-        else:
-          command = self._parse_line(line)
-          clean_file.append(command)
-      return clean_file
+        yield self._parse_line(line)
 
   def _parse_line(self, line) -> Command:
     args = line.split(" ")
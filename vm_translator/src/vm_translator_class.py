@@ -1,16 +1,49 @@
-from typing import List
+from typing import Iterable, Iterator, List, Tuple
 
-from vm_translator.src.command import Command
+from vm_translator.src import labels
+from vm_translator.src.command import Command, SuperCommand
 from vm_translator.src.assembly_expressions import AssemblyExpressions
-from vm_translator.src.models import BranchingCommand, CommandType
+from vm_translator.src.models import ArithmeticCommandTypes, BranchingCommand, CommandType
+from vm_translator.src.vm_optimizer import VMOptimizer
 
 
 class VMTranslator:
   assembly_expressions = AssemblyExpressions()
+  # shared routines of the compact modes, see labels
+  CALL_ROUTINE = labels.CALL_ROUTINE
+  RETURN_ROUTINE = labels.RETURN_ROUTINE
+  ROUTINES_END = labels.ROUTINES_END
+  COMPARE_ROUTINE = labels.COMPARE_ROUTINE
+  # jump of 'not' applied to a comparison
+  NEGATED_JUMPS = {
+    ArithmeticCommandTypes.EQ: "JNE",
+    ArithmeticCommandTypes.LT: "JGE",
+    ArithmeticCommandTypes.GT: "JLE",
+  }
 
-  def __init__(self, file_name: str = "NoFileNameGiven"):
+  def __init__(self, file_name: str = "NoFileNameGiven", label_namespace: str = "", compact_calls: bool = False,
+               compact_compares: bool = False, optimize: bool = False):
+    """
+    label_namespace prefixes every generated label ('{namespace}$EQ_TRUE_1'), so that files translated
+    by different translators, or different processes, never generate the same label.
+
+    With compact_calls every call and return jumps to a routine shared by the whole program instead of
+    inlining the frame handling, and with compact_compares every eq, lt and gt calls the routine of its
+    operator, see get_shared_routines.
+
+    With optimize the commands go through a VMOptimizer first, its superinstructions are lowered to
+    specialized code.
+    """
     self.label_counter = 0
     self.file_name = file_name
+    self.label_prefix = f"{label_namespace}$" if label_namespace else ""
+    self.compact_calls = compact_calls
+    self.compact_compares = compact_compares
+    self.optimizer = VMOptimizer() if optimize else None
+
+  @property
+  def has_shared_routines(self) -> bool:
+    return self.compact_calls or self.compact_compares
 
   def get_bootstrap_code(self, stack_init_position: int = 256, write_comment: bool = True):
     if stack_init_position < 0:
@@ -23,18 +56,85 @@ class VMTranslator:
     # Call Sys.init 0
     vm_code = Command(command_type=CommandType.CALL, arg1="Sys.init", arg2=0)
     assembly_code.extend(self._translate_call_command(vm_code))
+    if self.has_shared_routines:
+      # Sys.init does not return, nothing falls through to the routines
+      assembly_code.extend(self.get_shared_routines(jump_over=False))
+
+    return assembly_code
+
+  def get_program_header(self, bootstrap: bool) -> List[str]:
+    """
+    The code that goes before the translated files: the bootstrap code if bootstrap, otherwise the
+    shared routines of the compact modes (the program starts by jumping over them) or nothing.
+    """
+    if bootstrap:
+      return self.get_bootstrap_code()
+    if self.has_shared_routines:
+      return self.get_shared_routines()
+    return []
+
+  def get_shared_routines(self, jump_over: bool = True) -> List[str]:
+    """
+    The routines of the compact modes, all called with the return address in D:
+      - compact calls: a call site stores the function address in R13 and nArgs in R14 and jumps to
+        VM$CALL, which pushes the frame, repositions ARG and LCL and jumps to R13. A return is a jump
+        to VM$RETURN.
+      - compact compares: VM$EQ, VM$LT and VM$GT replace the two topmost values of the stack by their
+        comparison.
+    """
+    assembly_code = [f"@{self.ROUTINES_END}", "0;JMP"] if jump_over else []
+    if self.compact_calls:
+      assembly_code.extend(self._get_call_routines())
+    if self.compact_compares:
+      for operator in (ArithmeticCommandTypes.EQ, ArithmeticCommandTypes.LT, ArithmeticCommandTypes.GT):
+        assembly_code.extend(self._get_compare_routine(operator))
+    if jump_over:
+      assembly_code.append(f"({self.ROUTINES_END})")
+    return assembly_code
+
+  def _get_compare_routine(self, operator: ArithmeticCommandTypes) -> List[str]:
+    # R15 = returnAddress, D = x - y and x = true
+    assembly_code = [f"({self.COMPARE_ROUTINE.format(operator.value.upper())})", "@R15", "M=D",
+                     "@SP", "AM=M-1", "D=M", "A=A-1", "D=M-D", "M=-1"]
+    # return right away if the comparison holds, else x = false first
+    assembly_code.extend(["@R15", "A=M", f"D;{self.assembly_expressions.jump(operator)}",
+                          "@SP", "A=M-1", "M=0", "@R15", "A=M", "0;JMP"])
+    return assembly_code
 
+  def _get_call_routines(self) -> List[str]:
+    # push returnAddress, LCL, ARG, THIS, THAT: SP is moved to each slot before it is written
+    assembly_code = [f"({self.CALL_ROUTINE})", "@SP", "A=M", "M=D"]
+    for seg in ["LCL", "ARG", "THIS", "THAT"]:
+      assembly_code.extend([f"@{seg}", "D=M", "@SP", "AM=M+1", "M=D"])
+    # ARG = SP - 5 - nArgs
+    assembly_code.extend(["@SP", "MD=M+1", "@R14", "D=D-M", "@5", "D=D-A", "@ARG", "M=D"])
+    # LCL = SP
+    assembly_code.extend(["@SP", "D=M", "@LCL", "M=D"])
+    # goto functionName
+    assembly_code.extend(["@R13", "A=M", "0;JMP"])
+
+    # retAddr = *(LCL - 5), saved first: with no arguments *ARG is the same slot
+    assembly_code.extend([f"({self.RETURN_ROUTINE})", "@5", "D=A", "@LCL", "A=M-D", "D=M", "@R14", "M=D"])
+    # *ARG = pop(), SP = ARG + 1
+    assembly_code.extend(["@SP", "A=M-1", "D=M", "@ARG", "A=M", "M=D", "D=A+1", "@SP", "M=D"])
+    # THAT, THIS, ARG, LCL = *(endFrame - 1), ..., *(endFrame - 4), walking LCL down to restore it last
+    for seg in ["THAT", "THIS", "ARG", "LCL"]:
+      assembly_code.extend(["@LCL", "AM=M-1", "D=M", f"@{seg}", "M=D"])
+    # goto retAddr
+    assembly_code.extend(["@R14", "A=M", "0;JMP"])
     return assembly_code
 
   def translate(self, commands: List[Command], write_comment: bool = True) -> List[str]:
-    output = []
+    return list(self.translate_stream(commands, write_comment))
+
+  def translate_stream(self, commands: Iterable[Command], write_comment: bool = True) -> Iterator[str]:
+    """Yield the assembly lines of each command as soon as it is read from commands."""
+    if self.optimizer:
+      commands = self.optimizer.stream(commands)
     for command in commands:
       if write_comment:
-        comment = f"// {str(command)}"
-        output.append(comment)
-      command_translated = self._translate_command(command)
-      output.extend(command_translated)
-    return output
+        yield f"// {str(command)}"
+      yield from self._translate_command(command)
 
   def _translate_command(self, command: Command) -> List[str]:
     if command.is_arithmetic():
@@ -51,6 +151,8 @@ class VMTranslator:
       return self._translate_return_command(command)
     elif command.is_call():
       return self._translate_call_command(command)
+    elif command.is_super():
+      return self._translate_super_command(command)
     else:
       raise SyntaxError(f"Command {command.command_type.value} not implemented yet.")
 
@@ -59,15 +161,22 @@ class VMTranslator:
       return ["@SP", "A=M-1", "D=M", "A=A-1", "M=D+M", "@SP", "M=M-1"]
     elif command.is_sub():
       return ["@SP", "A=M-1", "D=M", "A=A-1", "M=M-D", "@SP", "M=M-1"]
+    elif command.is_eq_lt_gt() and self.compact_compares:
+      self.label_counter += 1
+      operator = command.arg1.value.upper()
+      return_address = labels.compare_return_label(self.label_prefix, operator, self.label_counter)
+      return [f"@{return_address}", "D=A", f"@{self.COMPARE_ROUTINE.format(operator)}", "0;JMP",
+              f"({return_address})"]
     elif command.is_eq_lt_gt():
       self.label_counter += 1
       jump_command = self.assembly_expressions.jump(command.arg1)
-      return ["@SP", "AM=M-1", "D=M", "A=A-1", "D=M-D", f"@{command.arg1.value.upper()}_TRUE_{self.label_counter}",
+      true_label, end_label = labels.compare_labels(self.label_prefix, command.arg1.value.upper(), self.label_counter)
+      return ["@SP", "AM=M-1", "D=M", "A=A-1", "D=M-D", f"@{true_label}",
               f"D;{jump_command}", "@SP",
-              "A=M-1", "M=0", f"@END_{self.label_counter}", "0;JMP",
-              f"({command.arg1.value.upper()}_TRUE_{self.label_counter})",
+              "A=M-1", "M=0", f"@{end_label}", "0;JMP",
+              f"({true_label})",
               "@SP", "A=M-1",
-              "M=-1", f"(END_{self.label_counter})"]
+              "M=-1", f"({end_label})"]
     elif command.is_not_neg():
       operation = self.assembly_expressions.get_operation(command.arg1)
       return ["@SP", "A=M-1", f"M={operation}M"]
@@ -107,8 +216,11 @@ class VMTranslator:
     else:
       raise SyntaxError(f"Pop Command '{str(command)}' is not valid. Segment {command.arg1} does not exist.")
 
+  def _branch_label(self, command: Command) -> str:
+    return f"{command.arg2}.{self.file_name}"
+
   def _translate_branching_commands(self, command: Command) -> List[str]:
-    label = f"{command.arg2}.{self.file_name}"
+    label = self._branch_label(command)
     if command.arg1 == BranchingCommand.LABEL:
       return [f"({label})"]
     elif command.arg1 == BranchingCommand.GOTO:
@@ -135,6 +247,8 @@ class VMTranslator:
     return assembly_commands
 
   def _translate_return_command(self, command: Command) -> List[str]:
+    if self.compact_calls:
+      return [f"@{self.RETURN_ROUTINE}", "0;JMP"]
 
     # endFrame = LCL
     assembly_command = ["@LCL", "D=M", "@R13", "M=D"]
@@ -160,7 +274,9 @@ class VMTranslator:
   def _translate_call_command(self, command: Command) -> List[str]:
     self.label_counter += 1
     function_name = command.arg1
-    return_address = f"RETURN_{function_name}_{self.label_counter}"
+    return_address = labels.return_label(self.label_prefix, function_name, self.label_counter)
+    if self.compact_calls:
+      return self._translate_compact_call(function_name, command.arg2, return_address)
     # 5 - nVar
     arg_pos = 5 + command.arg2
     # push returnAddress
@@ -178,3 +294,88 @@ class VMTranslator:
     assembly_command.extend([f"({return_address})"])
 
     return assembly_command
+
+  def _translate_compact_call(self, function_name: str, n_args: int, return_address: str) -> List[str]:
+    # R13 = functionName, R14 = nArgs (0 and 1 are constants of the ALU)
+    assembly_command = [f"@{function_name}", "D=A", "@R13", "M=D"]
+    if n_args in (0, 1):
+      assembly_command.extend(["@R14", f"M={n_args}"])
+    else:
+      assembly_command.extend([f"@{n_args}", "D=A", "@R14", "M=D"])
+    # D = returnAddress, goto VM$CALL
+    assembly_command.extend([f"@{return_address}", "D=A", f"@{self.CALL_ROUTINE}", "0;JMP", f"({return_address})"])
+    return assembly_command
+
+  def _translate_super_command(self, command: SuperCommand) -> List[str]:
+    commands = command.commands
+    if command.arg1 == "increment":
+      target, constant, operation = commands[0], commands[1].arg2, commands[2]
+      return self._translate_increment(target, constant if operation.is_add() else -constant)
+    elif command.arg1 == "branch_compare":
+      return self._translate_branch_compare(commands)
+    elif command.arg1 == "move":
+      return self._translate_move(commands[0], commands[1])
+    elif command.arg1 == "branch_not":
+      # jump unless the value is true (-1): x + 1 != 0
+      return ["@SP", "AM=M-1", "D=M+1", f"@{self._branch_label(commands[1])}", "D;JNE"]
+    else:
+      raise SyntaxError(f"Superinstruction '{command.arg1}' does not exist.")
+
+  def _segment_address(self, command: Command) -> Tuple[List[str], bool]:
+    """Instructions leaving the address of a push/pop target in A, and whether they overwrite D."""
+    if command.is_common_segment():
+      segment = self.assembly_expressions.segment(command.arg1)
+      if command.arg2 == 0:
+        return [f"@{segment}", "A=M"], False
+      if command.arg2 <= 2:
+        return [f"@{segment}", "A=M+1"] + ["A=A+1"] * (command.arg2 - 1), False
+      return [f"@{command.arg2}", "D=A", f"@{segment}", "A=D+M"], True
+    elif command.is_temp_segment():
+      return [f"@{5 + command.arg2}"], False
+    elif command.is_static_segment():
+      return [f"@{self.file_name}.{command.arg2}"], False
+    elif command.is_pointer_segment():
+      return [f"@{self.assembly_expressions.get_pointer_mapping(command.arg2)}"], False
+    else:
+      raise SyntaxError(f"Command '{str(command)}' has no address. Segment {command.arg1} does not exist.")
+
+  def _load_value(self, command: Command) -> List[str]:
+    """Instructions leaving the value pushed by command in D."""
+    if command.is_constant_segment():
+      return ["D=0" if command.arg2 == 0 else "D=1"] if command.arg2 in (0, 1) else [f"@{command.arg2}", "D=A"]
+    return self._segment_address(command)[0] + ["D=M"]
+
+  def _store_address_in_r13(self, command: Command) -> List[str]:
+    segment = self.assembly_expressions.segment(command.arg1)
+    return [f"@{command.arg2}", "D=A", f"@{segment}", "D=D+M", "@R13", "M=D"]
+
+  def _translate_increment(self, target: Command, delta: int) -> List[str]:
+    address, uses_d = self._segment_address(target)
+    if delta == 0:
+      return []
+    if delta in (1, -1):
+      return address + ["M=M+1" if delta == 1 else "M=M-1"]
+    operation = "M=D+M" if delta > 0 else "M=M-D"
+    if uses_d:
+      return self._store_address_in_r13(target) + [f"@{abs(delta)}", "D=A", "@R13", "A=M", operation]
+    return [f"@{abs(delta)}", "D=A"] + address + [operation]
+
+  def _translate_move(self, source: Command, target: Command) -> List[str]:
+    address, uses_d = self._segment_address(target)
+    if source.is_constant_segment() and source.arg2 in (0, 1):
+      return address + [f"M={source.arg2}"]
+    if uses_d:
+      return self._store_address_in_r13(target) + self._load_value(source) + ["@R13", "A=M", "M=D"]
+    return self._load_value(source) + address + ["M=D"]
+
+  def _translate_branch_compare(self, commands: List[Command]) -> List[str]:
+    constant = commands[0].arg2 if commands[0].is_push() else None
+    operator = commands[1 if constant is not None else 0].arg1
+    negated = commands[-2].is_arithmetic() and commands[-2].arg1 == ArithmeticCommandTypes.NOT
+    jump = self.NEGATED_JUMPS[operator] if negated else self.assembly_expressions.jump(operator)
+    # D = x - y, as the inline comparison computes it
+    if constant is None:
+      assembly_command = ["@SP", "AM=M-1", "D=M", "@SP", "AM=M-1", "D=M-D"]
+    else:
+      assembly_command = ["@SP", "AM=M-1", "D=M"] + ([f"@{constant}", "D=D-A"] if constant else [])
+    return assembly_command + [f"@{self._branch_label(commands[-1])}", f"D;{jump}"]
@@ -0,0 +1,46 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from vm_translator.main import translate, translate_stream
+from vm_translator.src.code_writer import CodeWriter
+
+
+class TestCodeWriter(unittest.TestCase):
+  """Test cases for the CodeWriter class and the streaming translation"""
+
+  def setUp(self):
+    self.temp_dir = tempfile.TemporaryDirectory()
+    self.output_path = Path(self.temp_dir.name) / "out.asm"
+    self.test_folders = Path(__file__).parent / "test_folders"
+
+  def tearDown(self):
+    self.temp_dir.cleanup()
+
+  def test_lines_are_separated_across_chunks(self):
+    """Test that the output does not depend on the chunk size and has no trailing new line"""
+    lines = [f"@{i}" for i in range(10)]
+    for chunk_lines in (1, 3, 10, 100):
+      with self.subTest(chunk_lines=chunk_lines):
+        writer = CodeWriter(self.output_path)
+        writer.CHUNK_LINES = chunk_lines
+        self.assertEqual(writer.write_stream(iter(lines)), 10)
+        self.assertEqual(self.output_path.read_text(), "\n".join(lines))
+
+  def test_empty_stream(self):
+    """Test that an empty stream gives an empty file"""
+    self.assertEqual(CodeWriter(self.output_path).write_stream(iter(())), 0)
+    self.assertEqual(self.output_path.read_text(), "")
+
+  def test_translation_is_streamed(self):
+    """Test that translate writes the lines produced lazily by translate_stream"""
+    folder = self.test_folders / "FibonacciElement"
+    files = sorted(folder.glob("*.vm"))
+    stream = translate_stream(files)
+    self.assertEqual(next(stream), "// bootstrap code")
+    lines = translate(folder, self.output_path)
+    self.assertEqual(lines, len(self.output_path.read_text().split("\n")))
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,101 @@
+import random
+import tempfile
+import unittest
+from pathlib import Path
+
+from hack_assambler.src.hack_assambler import HackAssambler
+from hack_emulator.src.hack_cpu import HackCPU
+from vm_translator.src.constant_folder import ConstantFolder
+from vm_translator.src.vm_parser import Parser
+from vm_translator.src.vm_translator_class import VMTranslator
+
+
+class TestConstantFolder(unittest.TestCase):
+  """Test cases for the folding of constant expressions"""
+
+  def setUp(self):
+    self.temp_dir = tempfile.TemporaryDirectory()
+    self.temp_path = Path(self.temp_dir.name)
+    self.folder = ConstantFolder()
+
+  def tearDown(self):
+    self.temp_dir.cleanup()
+
+  def _parse(self, *lines: str):
+    path = self.temp_path / "Prog.vm"
+    path.write_text("\n".join(lines) + "\n")
+    return Parser(path).parse()
+
+  def _fold(self, *lines: str):
+    return [str(command) for command in self.folder.optimize(self._parse(*lines))]
+
+  def test_folds_constant_expressions(self):
+    self.assertEqual(self._fold("push constant 2", "push constant 3", "add", "push constant 4", "sub", "pop local 0"),
+                     ["push constant 1", "pop local 0"])
+    self.assertEqual(self._fold("push constant 12", "push constant 10", "and", "not", "not"), ["push constant 8"])
+    self.assertEqual(self._fold("push constant 7", "push constant 7", "eq", "push constant 3", "push constant 5",
+                                "gt", "or"), ["push constant 1", "neg"])
+    self.assertEqual(self.folder.removed["fold"], 4 + 4 + 5)
+
+  def test_values_over_15_bits_are_negated(self):
+    self.assertEqual(self._fold("push constant 30000", "push constant 30000", "add"), ["push constant 5536", "neg"])
+    self.assertEqual(self._fold("push constant 0", "push constant 1", "sub"), ["push constant 1", "neg"])
+    self.assertEqual(self._fold("push constant 16384", "push constant 16384", "add"), ["push constant 32767", "not"])
+    # the neg stays when the value needs it
+    self.assertEqual(self._fold("push constant 5", "neg"), ["push constant 5", "neg"])
+    self.assertEqual(self.folder.removed["fold"], 1 + 1 + 1 + 0)
+
+  def test_comparisons_wrap_around_like_the_alu(self):
+    # 20000 - (-20000) overflows to a negative difference, as in the translated code
+    self.assertEqual(self._fold("push constant 20000", "push constant 20000", "neg", "gt"), ["push constant 0"])
+    self.assertEqual(self._fold("push constant 20000", "push constant 20000", "neg", "lt"), ["push constant 1", "neg"])
+
+  def test_identities_and_cancelling_pairs(self):
+    self.assertEqual(self._fold("push local 0", "push constant 0", "add", "push constant 0", "or", "pop local 1"),
+                     ["push local 0", "pop local 1"])
+    self.assertEqual(self._fold("push local 0", "push constant 1", "neg", "and", "neg", "neg", "not"),
+                     ["push local 0", "not"])
+    self.assertEqual(self.folder.removed["identity"], 6)
+    self.assertEqual(self.folder.removed["cancel"], 2)
+
+  def test_branches_on_constants(self):
+    self.assertEqual(self._fold("push constant 0", "not", "if-goto LOOP", "push constant 0", "if-goto END"),
+                     ["goto LOOP"])
+    self.assertEqual(self.folder.removed["branch"], 1 + 2)
+
+  def test_nothing_is_folded_across_other_commands(self):
+    lines = ["push constant 1", "label L", "push constant 2", "add", "push local 0", "if-goto L", "sub", "not"]
+    self.assertEqual(self._fold(*lines), lines)
+    self.assertEqual(self.folder.total_removed, 0)
+
+  def test_folded_expressions_compute_the_same(self):
+    """Random expressions on constants give the same value folded or translated as they are"""
+    generator = random.Random(25)
+    for expression in range(30):
+      with self.subTest(expression=expression):
+        lines, depth = [], 0
+        while len(lines) < 12:
+          if depth < 2 or generator.random() < 0.4:
+            lines.append(f"push constant {generator.choice((0, 1, generator.randrange(32768)))}")
+            depth += 1
+          elif generator.random() < 0.3:
+            lines.append(generator.choice(("neg", "not")))
+          else:
+            lines.append(generator.choice(("add", "sub", "and", "or", "eq", "lt", "gt")))
+            depth -= 1
+        lines += [generator.choice(("add", "sub", "and", "or", "eq", "lt", "gt")) for _ in range(depth - 1)]
+        commands = self._parse(*lines, "pop static 0", "label END", "goto END")
+        folded = ConstantFolder().optimize(commands)
+        # a single value is left, pushed by one or two commands
+        self.assertLessEqual(len(folded), 3 + 2)
+        self.assertEqual(self._run(folded), self._run(commands))
+
+  def _run(self, commands) -> int:
+    cpu = HackCPU(HackAssambler.assemble_lines(VMTranslator("Prog").translate(commands)))
+    cpu.ram[0] = 256
+    cpu.run(10000)
+    return cpu.ram[16]
+
+
+if __name__ == "__main__":
+  unittest.main()
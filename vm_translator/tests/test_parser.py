@@ -361,6 +361,14 @@ label END
     with self.assertRaises(SyntaxError):
       parser.parse()
 
+  def test_stream_yields_commands_lazily(self):
+    """Test that stream yields the commands one by one, with the same result as parse"""
+    file_path = self._create_test_file("push constant 7\n// comment\npush constant 8 // eight\nadd\n")
+    stream = Parser(file_path).stream()
+    self.assertEqual(next(stream).arg2, 7)
+    self.assertEqual([str(command) for command in stream], ["push constant 8", "add"])
+    self.assertEqual(Parser(file_path).parse(), list(Parser(file_path).stream()))
+
 
 if __name__ == '__main__':
   unittest.main()
@@ -0,0 +1,123 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from hack_assambler.src.hack_assambler import HackAssambler
+from hack_emulator.src.hack_cpu import HackCPU
+from vm_translator.main import RomCounter, count_rom_words, size_report, translate
+
+
+class TestTranslate(unittest.TestCase):
+  """Test cases for the translation of whole programs, sequential and parallel"""
+
+  def setUp(self):
+    self.temp_dir = tempfile.TemporaryDirectory()
+    self.temp_path = Path(self.temp_dir.name)
+    self.test_folders = Path(__file__).parent / "test_folders"
+
+  def tearDown(self):
+    self.temp_dir.cleanup()
+
+  def _write_program(self, files: dict) -> Path:
+    program_dir = self.temp_path / "Program"
+    program_dir.mkdir()
+    for name, content in files.items():
+      (program_dir / f"{name}.vm").write_text(content)
+    return program_dir
+
+  def test_parallel_translation_is_identical(self):
+    """Test that the files translated by a pool of processes are written in the same order"""
+    # an empty file between two others
+    program_dir = self._write_program({
+      "A": "function A.f 0\npush constant 1\nreturn\n",
+      "Empty": "",
+      "Sys": "function Sys.init 0\ncall A.f 0\npop static 0\nlabel END\ngoto END\n",
+    })
+    folders = [self.test_folders / name for name in ("FibonacciElement", "StaticsTest", "NestedCall")] + [program_dir]
+    for folder in folders:
+      with self.subTest(folder=folder.name):
+        sequential = self.temp_path / f"{folder.name}_1.asm"
+        parallel = self.temp_path / f"{folder.name}_2.asm"
+        lines = translate(folder, sequential)
+        self.assertEqual(translate(folder, parallel, jobs=2), lines)
+        self.assertEqual(parallel.read_text(), sequential.read_text())
+
+  def test_generated_labels_do_not_collide_across_files(self):
+    """Test that two files comparing and calling the same function can be assembled together"""
+    program_dir = self._write_program({
+      "Sys": "function Sys.init 0\npush constant 1\npush constant 1\neq\npop static 0\n"
+             "push static 0\ncall A.f 1\ncall B.f 1\npop static 1\nlabel END\ngoto END\n",
+      "A": "function A.f 0\npush argument 0\npush constant 1\neq\ncall Sys.twice 1\nreturn\n",
+      "B": "function B.f 0\npush argument 0\npush constant 2\nlt\ncall Sys.twice 1\nreturn\n"
+           "function Sys.twice 0\npush argument 0\npush argument 0\nadd\nreturn\n",
+    })
+    for jobs in (1, 2):
+      with self.subTest(jobs=jobs):
+        output_path = self.temp_path / f"Program_{jobs}.asm"
+        translate(program_dir, output_path, jobs=jobs)
+        cpu = HackCPU(HackAssambler.assemble_lines(output_path.read_text().splitlines()))
+        cpu.run(2000, stop_on_halt=False)
+        # static 0 = (1 == 1), static 1 = B.f(A.f(static 0)) = B.f(twice(-1 == 1)) = twice(0 < 2)
+        self.assertEqual((cpu.read_signed(16), cpu.read_signed(17)), (-1, -2))
+
+  def test_compact_calls_save_rom_and_keep_results(self):
+    """Test that shared call and return routines make the program smaller and compute the same"""
+    results = {}
+    for compact_calls in (False, True):
+      output_path = self.temp_path / f"FibonacciElement_{compact_calls}.asm"
+      translate(self.test_folders / "FibonacciElement", output_path, compact_calls=compact_calls)
+      lines = output_path.read_text().splitlines()
+      cpu = HackCPU(HackAssambler.assemble_lines(lines))
+      cpu.run(20000, stop_on_halt=False)
+      self.assertEqual(count_rom_words(lines)[0], len(cpu.rom))
+      results[compact_calls] = (len(cpu.rom), cpu.read_signed(261))
+    self.assertEqual(results[True][1], results[False][1])
+    self.assertEqual(results[True][1], 3)
+    self.assertLess(results[True][0], results[False][0])
+
+  def test_rom_is_counted_while_writing(self):
+    """Test that the counts taken while writing match the output, and are used by the size report"""
+    folder = self.test_folders / "FibonacciElement"
+    for jobs in (1, 2):
+      with self.subTest(jobs=jobs):
+        output_path = self.temp_path / f"FibonacciElement_{jobs}.asm"
+        counter = RomCounter()
+        translate(folder, output_path, jobs=jobs, counter=counter, compact_calls=True)
+        words, labels = count_rom_words(output_path.read_text().splitlines())
+        self.assertEqual((counter.words, counter.labels), (words, labels))
+    report = size_report(folder, counter.words, counter.labels, compact_calls=True)
+    self.assertTrue(report.startswith(f"Compact calls: {words} ROM words instead of "))
+    self.assertIn(f"{labels} labels instead of", report)
+
+  def test_compact_compares_give_the_same_results(self):
+    """Test that the shared eq, lt and gt routines compare like the inline code"""
+    pairs = [(0, 0), (1, 2), (2, 1), (-3, -3), (-5, 4), (7, -1), (32767, -32767)]
+    commands = []
+    for x, y in pairs:
+      for operator in ("eq", "lt", "gt"):
+        for value in (x, y):
+          commands.append(f"push constant {abs(value)}")
+          if value < 0:
+            commands.append("neg")
+        commands.append(operator)
+    program_dir = self._write_program({"Compare": "\n".join(commands) + "\n"})
+    stacks, labels = {}, {}
+    for compact_compares in (False, True):
+      output_path = self.temp_path / f"Compare_{compact_compares}.asm"
+      translate(program_dir, output_path, compact_compares=compact_compares)
+      lines = output_path.read_text().splitlines()
+      cpu = HackCPU(HackAssambler.assemble_lines(lines))
+      cpu.ram[0] = 256
+      cpu.run(5000)
+      stacks[compact_compares] = [cpu.read_signed(address) for address in range(256, cpu.ram[0])]
+      labels[compact_compares] = count_rom_words(lines)[1]
+    self.assertEqual(len(stacks[False]), len(pairs) * 3)
+    self.assertEqual(stacks[True], stacks[False])
+    self.assertEqual(stacks[True][:6], [-1, 0, 0, 0, -1, 0])
+    # one return label per comparison instead of a true and an end label
+    self.assertEqual(labels[False], 2 * len(pairs) * 3)
+    self.assertEqual(labels[True], len(pairs) * 3 + 4)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,141 @@
+import random
+import tempfile
+import unittest
+from pathlib import Path
+
+from hack_assambler.src.hack_assambler import HackAssambler
+from hack_emulator.src.hack_cpu import HackCPU
+from vm_translator.benchmark import measure, path_cycles
+from vm_translator.src.command import SuperCommand
+from vm_translator.src.vm_optimizer import VMOptimizer
+from vm_translator.src.vm_parser import Parser
+from vm_translator.src.vm_translator_class import VMTranslator
+
+
+class TestVMOptimizer(unittest.TestCase):
+  """Test cases for the VMOptimizer superinstructions"""
+
+  SEGMENTS = ("local", "argument", "this", "that", "temp", "static")
+  BASES = {1: 300, 2: 400, 3: 3000, 4: 3100}
+
+  def setUp(self):
+    self.temp_dir = tempfile.TemporaryDirectory()
+    self.temp_path = Path(self.temp_dir.name)
+    self.random = random.Random(24)
+
+  def tearDown(self):
+    self.temp_dir.cleanup()
+
+  def _parse(self, source: str):
+    path = self.temp_path / "Prog.vm"
+    path.write_text(source)
+    return Parser(path).parse()
+
+  def _run(self, commands, optimize: bool, ram: dict, statics: dict):
+    """Run the program from the given RAM and static variables. Returns the CPU, ROM size and statics."""
+    assambler = HackAssambler(lines=VMTranslator("Prog", optimize=optimize).translate(commands))
+    assambler.parse()
+    assambler.compile()
+    cpu = HackCPU(assambler.file_compiled)
+    cpu.ram[0] = 256
+    for address, value in ram.items():
+      cpu.ram[address] = value
+    # static variables are allocated in order of first use, which the optimization may change
+    for name, address in assambler.variables.items():
+      cpu.ram[address] = statics[name]
+    cpu.run(100000)
+    return cpu, len(cpu.rom), {name: cpu.ram[address] for name, address in assambler.variables.items()}
+
+  def test_fuses_the_patterns(self):
+    commands = self._parse("\n".join([
+      "push local 2", "push constant 1", "add", "pop local 2",
+      "push argument 0", "pop that 1",
+      "push constant 0", "eq", "if-goto A",
+      "lt", "not", "if-goto B",
+      "not", "if-goto C",
+      "push local 2", "push constant 1", "add", "pop local 3",
+    ]))
+    optimizer = VMOptimizer()
+    optimized = optimizer.optimize(commands)
+    self.assertEqual([command.arg1 for command in optimized[:5]],
+                     ["increment", "move", "branch_compare", "branch_compare", "branch_not"])
+    self.assertEqual(optimized[0], SuperCommand("increment", commands[:4]))
+    self.assertEqual(str(optimized[1]), "push argument 0 / pop that 1")
+    # a different target is not an increment: push, push constant, add stay, the pop is not a move
+    self.assertEqual(optimized[5:], commands[14:])
+    self.assertEqual(optimizer.fused, {"increment": 1, "branch_compare": 2, "move": 1, "branch_not": 1})
+    self.assertEqual(optimizer.fused_commands["branch_compare"], 6)
+
+  def test_patterns_do_not_span_labels(self):
+    commands = self._parse("push local 0\nlabel L\npop local 1\nnot\nlabel M\nif-goto L\n")
+    self.assertEqual(VMOptimizer().optimize(commands), commands)
+
+  def test_optimized_code_computes_the_same(self):
+    """Random sequences of the patterns give the same RAM, optimized or not, and a smaller ROM"""
+    for program in range(20):
+      with self.subTest(program=program):
+        source, ram, statics = self._random_program(program)
+        commands = self._parse(source)
+        plain, plain_words, plain_statics = self._run(commands, False, ram, statics)
+        optimized, optimized_words, optimized_statics = self._run(commands, True, ram, statics)
+        # R13-R15 are scratch registers, and the stack above SP (256 at the end) is garbage
+        for start, end in ((0, 13), (300, 4096)):
+          self.assertEqual(optimized.ram[start:end], plain.ram[start:end])
+        # a static only updated by adding 0 is not used anymore
+        self.assertEqual(optimized_statics, {name: plain_statics[name] for name in optimized_statics})
+        self.assertLess(optimized_words, plain_words)
+
+  def test_benchmark_measures_the_reduction(self):
+    self.assertEqual(path_cycles(["// push constant 1", "@1", "D=A", "// goto L", "@L", "0;JMP", "(L)", "D=M"]), 4)
+    program = Path(__file__).parent / "test_folders" / "FibonacciElement"
+    plain, optimized = measure(program), measure(program, optimize=True)
+    self.assertLess(optimized.words, plain.words)
+    self.assertLess(optimized.path_cycles, plain.path_cycles)
+    self.assertLess(optimized.run_cycles, plain.run_cycles)
+    self.assertEqual(plain.fused, {})
+    self.assertGreater(optimized.fused["branch_compare"], 0)
+
+  def _random_program(self, seed: int):
+    self.random.seed(seed)
+    ram = dict(self.BASES)
+    for base in list(self.BASES.values()) + [5]:
+      for offset in range(8):
+        ram[base + offset] = self.random.randrange(0x10000)
+    statics = {f"Prog.{index}": self.random.randrange(0x10000) for index in range(8)}
+    lines = []
+    for step in range(40):
+      kind = self.random.choice(("increment", "compare", "move", "not", "other"))
+      if kind == "increment":
+        target = self._random_target()
+        lines += [f"push {target}", f"push constant {self._random_constant()}",
+                  self.random.choice(("add", "sub")), f"pop {target}"]
+      elif kind == "move":
+        source = self._random_target() if self.random.random() < 0.6 else f"constant {self._random_constant()}"
+        lines += [f"push {source}", f"pop {self._random_target()}"]
+      elif kind in ("compare", "not"):
+        lines.append(f"push {self._random_target()}")
+        if kind == "compare":
+          second = f"constant {self._random_constant()}" if self.random.random() < 0.5 else self._random_target()
+          lines += [f"push {second}", self.random.choice(("eq", "lt", "gt"))]
+          if self.random.random() < 0.5:
+            lines.append("not")
+        else:
+          lines.append("not")
+        # the not taken path counts in static 7
+        lines += [f"if-goto SKIP{step}", "push static 7", "push constant 1", "add", "pop static 7",
+                  f"label SKIP{step}"]
+      else:
+        lines += [f"push {self._random_target()}", f"push {self._random_target()}", "add", "neg",
+                  f"pop {self._random_target()}"]
+    return "\n".join(lines + ["label END", "goto END"]) + "\n", ram, statics
+
+  def _random_target(self) -> str:
+    segment = self.random.choice(self.SEGMENTS)
+    return f"{segment} {self.random.randrange(8 if segment in ('temp', 'static') else 6)}"
+
+  def _random_constant(self) -> int:
+    return self.random.choice((0, 1, 2, self.random.randrange(32768)))
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,53 @@
+import shutil
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from hack_emulator.src.tst_runner import run_script
+from vm_translator.main import translate
+
+
+class TestVMTranslatorExecution(unittest.TestCase):
+  """Translates every folder of test_folders and runs its CPU emulator test script against the result"""
+
+  def setUp(self):
+    self.test_folders = Path(__file__).parent / "test_folders"
+    self.tmp_dir = TemporaryDirectory()
+    self.tmp_path = Path(self.tmp_dir.name)
+
+  def tearDown(self):
+    self.tmp_dir.cleanup()
+
+  def _translate_folder(self, folder: Path, **options) -> Path:
+    output_dir = self.tmp_path / "_".join(name for name, enabled in options.items() if enabled) / folder.name
+    output_dir.mkdir(parents=True)
+    for vm_file in folder.glob("*.vm"):
+      shutil.copy(vm_file, output_dir)
+    translate(output_dir, output_dir / f"{folder.name}.asm", **options)
+    return output_dir
+
+  def test_test_scripts_pass(self):
+    for script in sorted(self.test_folders.glob("*/*.tst")):
+      if script.stem.endswith("VME"):
+        continue
+      with self.subTest(script=script.name):
+        output_dir = self._translate_folder(script.parent)
+        for compiled in (False, True):
+          result = run_script(script, load_dir=output_dir, compiled=compiled)
+          self.assertTrue(result.passed, result.error)
+        optimized = run_script(script, load_dir=output_dir, optimize=True)
+        self.assertTrue(optimized.passed, optimized.error)
+
+  def test_test_scripts_pass_with_translation_options(self):
+    for options in ({"compact_calls": True}, {"compact_compares": True}, {"optimize": True},
+                    {"compact_calls": True, "compact_compares": True, "optimize": True}):
+      for script in sorted(self.test_folders.glob("*/*.tst")):
+        if script.stem.endswith("VME"):
+          continue
+        with self.subTest(script=script.name, **options):
+          result = run_script(script, load_dir=self._translate_folder(script.parent, **options))
+          self.assertTrue(result.passed, result.error)
+
+
+if __name__ == "__main__":
+  unittest.main()